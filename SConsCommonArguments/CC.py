@@ -98,6 +98,7 @@ __docformat__ = "restructuredText"
 
 import SConsArguments
 import SConsCommonArguments.Util
+import SConsCommonArguments.Flags
 
 #############################################################################
 # NOTE: variable substitutions must be in curly brackets, so use ${prefix}
@@ -125,6 +126,11 @@ _flag_arg_tuples = [
     ( 'SHLINKFLAGS','Flags for linker used when creating shared libraries'),
 ]
 
+_registry = SConsCommonArguments.Util.ArgumentRegistry([
+    ('progs', _prog_arg_tuples),
+    ('flags', _flag_arg_tuples),
+])
+
 #############################################################################
 def Names(name_filter = lambda x : True, **kw):
     """Return list of CC argument names.
@@ -133,7 +139,10 @@ def Names(name_filter = lambda x : True, **kw):
         name_filter : callable
             callable object (e.g. lambda) of type ``name_filter(name) ->
             boolean`` used to filter-out unwanted variables; only these
-            variables are processed, for which name_filter returns ``True``
+            variables are processed, for which name_filter returns ``True``;
+            a sequence of names, a glob pattern or compiled regular
+            expression may be used as well (see
+            `SConsCommonArguments.Util.name_filter_predicate()`)
     :Keywords:
         include_progs
             Whether to include program variables (CC, CXX, ...)
@@ -142,16 +151,16 @@ def Names(name_filter = lambda x : True, **kw):
     :Returns:
         the list of CC argument names
     """
-    names = []
-    seqmap = {  'include_progs': _prog_arg_tuples,
-                'inlude_flags' : _flag_arg_tuples   }
-    for k,seq in seqmap.iteritems():
-        cond = True
-        try: cond = kw[k]
-        except KeyError: pass
-        if cond:
-            names += SConsCommonArguments.Util.names_from_tuples(seq, name_filter)
-    return names
+    return _registry.names(_registry.selected(kw), name_filter)
+
+###############################################################################
+def _extra(family, kw):
+    """Return keywords specific to `family`, see
+    `SConsCommonArguments.Util.family_declarations()`"""
+    flag_type = kw.pop('flag_type', 'string')
+    if family == 'flags' and flag_type == 'flaglist':
+        return { 'converter' : SConsCommonArguments.Flags.FlagList }
+    return {}
 
 ###############################################################################
 def Declarations(**kw):
@@ -164,7 +173,8 @@ def Declarations(**kw):
         name_filter : callable
             callable object (e.g. lambda) of type ``name_filter(name) ->
             boolean`` used to filter-out unwanted variables; only these
-            variables are processed, for which name_filter returns ``True``
+            variables are processed, for which name_filter returns ``True``;
+            see also `Names()`
         nameconv : `SConsArguments._ArgumentNameConv`
             a `SConsArguments._ArgumentNameConv` object used to transform
             *argument* names to *endpoint* (construction variable, command-line
@@ -200,23 +210,79 @@ def Declarations(**kw):
             Whether to include program variables (CC, CXX, ...)
         include_flags
             Whether to include flag variables (CFLAGS, CXXFLAGS, ...)
+        flag_type
+            ``'string'`` (default) or ``'flaglist'``; the latter declares flag
+            variables with `SConsCommonArguments.Flags.FlagList` converter,
+            such that their values are pre-tokenized
+        use_cache
+            Whether to use `SConsCommonArguments.Util.declarations_cache`
+            (default: ``True``); the returned declarations are always private
+            to the caller, regardless of this setting.
 
     :Returns:
         an instance of `SConsArguments._ArgumentDeclarations`
     """
-    if not 'opt_key_transform' in kw:
-        kw['opt_key_transform'] = False
-
-    decls = SConsArguments.ArgumentDeclarations()
-    seqmap = {  'include_progs': _prog_arg_tuples,
-                'inlude_flags' : _flag_arg_tuples   }
-    for k,seq in seqmap.iteritems():
-        cond = True
-        try: cond = kw[k]
-        except KeyError: pass
-        if cond:
-            decls.update(SConsCommonArguments.Util.arguments_from_tuples(seq, **kw))
-    return decls
+    return SConsCommonArguments.Util.family_declarations(__name__, _registry, kw, _extra)
+
+###############################################################################
+def VariantDeclarations(variants, **kw):
+    """Return declarations of CC arguments for several variants at once.
+
+    This is equivalent to (but faster than) calling ``Declarations(**kw)``
+    once per variant with variant's keywords added. The declarations are
+    computed once and then only renamed for each variant.
+
+    .. python::
+        variants = [ dict(env_key_prefix = p, var_key_prefix = p)
+                     for p in ('ARM_DEBUG_', 'ARM_RELEASE_', 'X86_DEBUG_') ]
+        for decls in SConsCommonArguments.CC.VariantDeclarations(variants):
+            ...
+
+    :Parameters:
+        variants : list
+            list of dictionaries with per-variant name conversion keywords
+            (``env_key_prefix``, ``var_key_suffix``, ...).
+    :Keywords:
+        same as for `Declarations()`, shared by all variants.
+    :Returns:
+        a list of `SConsArguments._ArgumentDeclarations`, one per variant
+    """
+    return SConsCommonArguments.Util.family_variant_declarations(__name__, _registry, variants, kw, _extra)
+
+###############################################################################
+def MergePostprocess(args, env, variables, options = False, **kw):
+    """Postprocess committed CC arguments, merging flag arguments.
+
+    This is an alternative to ``args.Postprocess(env, variables, options)``.
+    Values of flag arguments (CFLAGS, CXXFLAGS, ...) from variables files,
+    command line variables and options are merged with the values found in
+    `env`, with ordered de-duplication and last-wins resolution of mutually
+    exclusive options (see `SConsCommonArguments.Flags.Merge()`).
+
+    :Keywords:
+        name_filter
+            restricts the flag arguments being merged, see `Names()`,
+        other keywords are passed to ``args.Postprocess()``.
+    :Returns:
+        a dictionary mapping argument names to lists of collapsed flags
+    """
+    names = Names(kw.pop('name_filter', None), include_progs = False)
+    return SConsCommonArguments.Flags.MergePostprocess(args, env, variables, options, names, **kw)
+
+###############################################################################
+def DeclarationsCacheInfo():
+    """Return statistics of the cache used by `Declarations()`.
+
+    :Returns:
+        a dictionary with ``hits``, ``misses``, ``size`` and ``maxsize``
+        entries; the statistics are shared by all argument families
+    """
+    return SConsCommonArguments.Util.declarations_cache.info()
+
+###############################################################################
+def InvalidateDeclarationsCache():
+    """Drop all `Declarations()` results cached for the CC family."""
+    SConsCommonArguments.Util.declarations_cache.invalidate(__name__)
 
 # Local Variables:
 # # tab-width:4
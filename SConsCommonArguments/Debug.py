@@ -0,0 +1,222 @@
+"""`SConsCommonArguments.Debug`
+
+Defines arguments controlling debug information.
+
+**General Description**
+
+The arguments select the amount of debug information, split DWARF (debug
+fission), compression of debug sections and generation of ``.gdb_index``.
+The `Apply()` function maps them to compile and link flags for the compiler
+family (GCC or Clang) and merges them into the flag arguments of
+`SConsCommonArguments.CC`. Arguments which are not set leave the flags
+untouched.
+
+**Quick start**
+
+.. python::
+    # SConstruct
+    import SConsArguments
+    import SConsCommonArguments.CC
+    import SConsCommonArguments.Debug
+
+    env = Environment()
+    var = Variables()
+    decls = SConsArguments.ArgumentDeclarations()
+    decls.update(SConsCommonArguments.CC.Declarations())
+    decls.update(SConsCommonArguments.Debug.Declarations())
+    args = decls.Commit(env, var, True)
+    args.Postprocess(env, var, True)
+    SConsCommonArguments.Debug.Apply(args, env)
+
+Running examples::
+
+    ptomulik@barakus:$ scons -Q DEBUG_INFO=full SPLIT_DWARF=yes COMPRESS_DEBUG=zlib
+
+**Supported Variables**
+
+    DEBUG_INFO
+        Amount of debug information: ``none``, ``line`` or ``full``
+    SPLIT_DWARF
+        Whether to split DWARF into ``.dwo`` files (``yes`` or ``no``)
+    COMPRESS_DEBUG
+        Compression of debug sections: ``none``, ``zlib`` or ``zstd``
+    GDB_INDEX
+        Whether to let the linker generate ``.gdb_index`` (``yes`` or ``no``),
+        requires gold, lld or mold linker
+"""
+
+#
+# Copyright (c) 2016 by Pawel Tomulik
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+
+__docformat__ = "restructuredText"
+
+import SConsCommonArguments.Util
+import SConsCommonArguments.Flags
+import SConsCommonArguments.Probe
+
+#############################################################################
+_debug_arg_tuples = [
+    ( 'DEBUG_INFO',     'Amount of debug information (none, line, full)'),
+    ( 'SPLIT_DWARF',    'Whether to split DWARF into .dwo files (yes, no)'),
+    ( 'COMPRESS_DEBUG', 'Compression of debug sections (none, zlib, zstd)'),
+    ( 'GDB_INDEX',      'Whether to generate .gdb_index (yes, no)'),
+]
+
+_registry = SConsCommonArguments.Util.ArgumentRegistry([
+    ('debug', _debug_arg_tuples),
+])
+
+_choices = {
+    'DEBUG_INFO'    : ('none', 'line', 'full'),
+    'SPLIT_DWARF'   : ('yes', 'no'),
+    'COMPRESS_DEBUG': ('none', 'zlib', 'zstd'),
+    'GDB_INDEX'     : ('yes', 'no'),
+}
+
+_converters = dict([(k, SConsCommonArguments.Util.choice_converter(k, v)) for (k, v) in _choices.items()])
+
+# (argument, value) -> { family : (compile flags, link flags) }, the 'gcc'
+# entry is used for families not listed explicitly
+_flag_table = {
+    ('DEBUG_INFO', 'none')      : { 'gcc'   : (['-g0'], []) },
+    ('DEBUG_INFO', 'line')      : { 'gcc'   : (['-g1'], []),
+                                    'clang' : (['-gline-tables-only'], []) },
+    ('DEBUG_INFO', 'full')      : { 'gcc'   : (['-g'], []) },
+    ('SPLIT_DWARF', 'yes')      : { 'gcc'   : (['-gsplit-dwarf'], []) },
+    ('SPLIT_DWARF', 'no')       : { 'gcc'   : (['-gno-split-dwarf'], []) },
+    ('COMPRESS_DEBUG', 'none')  : { 'gcc'   : (['-gz=none'], ['-gz=none']) },
+    ('COMPRESS_DEBUG', 'zlib')  : { 'gcc'   : (['-gz=zlib'], ['-gz=zlib']) },
+    ('COMPRESS_DEBUG', 'zstd')  : { 'gcc'   : (['-gz=zstd'], ['-gz=zstd']) },
+    ('GDB_INDEX', 'yes')        : { 'gcc'   : (['-ggnu-pubnames'], ['-Wl,--gdb-index']) },
+}
+
+# linkers supporting --gdb-index
+_gdb_index_linkers = ('gold', 'lld', 'mold')
+
+_compile_flag_names = ['CCFLAGS', 'SHCCFLAGS']
+_link_flag_names = ['LINKFLAGS', 'SHLINKFLAGS']
+
+#############################################################################
+def Names(name_filter = lambda x : True, **kw):
+    """Return list of debug information argument names.
+
+    :Parameters:
+        name_filter : callable
+            selects argument names, see `SConsCommonArguments.CC.Names()`
+    :Returns:
+        the list of debug information argument names
+    """
+    return _registry.names(_registry.families(), name_filter)
+
+###############################################################################
+def Declarations(**kw):
+    """Return declarations of SCons *arguments* for all predefined debug
+    information arguments.
+
+    :Keywords:
+        same as for `SConsCommonArguments.CC.Declarations()`.
+
+    :Returns:
+        an instance of `SConsArguments._ArgumentDeclarations`
+    """
+    return SConsCommonArguments.Util.family_declarations(__name__, _registry, kw,
+                                                         lambda f, kw2 : { 'converters' : _converters })
+
+###############################################################################
+def Flags(values, family = 'gcc', linker = None):
+    """Return compile and link flags for debug information settings.
+
+    :Parameters:
+        values : dict
+            maps argument names (e.g. ``'DEBUG_INFO'``) to values, missing
+            arguments are ignored,
+        family : str
+            compiler family, ``'gcc'`` or ``'clang'``,
+        linker : str
+            linker selected with ``-fuse-ld=`` (if any); ``GDB_INDEX`` is
+            ignored for linkers other than gold, lld and mold.
+    :Returns:
+        a tuple ``(compile_flags, link_flags)``
+    """
+    compile_flags, link_flags = [], []
+    for name, _ in _debug_arg_tuples:
+        value = values.get(name)
+        if value is None:
+            continue
+        if name == 'GDB_INDEX' and linker not in _gdb_index_linkers:
+            continue
+        entry = _flag_table.get((name, _converters[name](value)))
+        if entry is None:
+            continue
+        cflags, lflags = entry.get(family, entry['gcc'])
+        compile_flags.extend(cflags)
+        link_flags.extend(lflags)
+    return compile_flags, link_flags
+
+###############################################################################
+_get = SConsCommonArguments.Util.proxy_value
+
+def _linker(proxy):
+    return SConsCommonArguments.Flags.LinkerName(_get(proxy, 'LINKFLAGS'))
+
+def Apply(args, env, cc_args = None, family = None):
+    """Merge debug information flags into CC flag arguments.
+
+    Should be called after ``args.Postprocess()`` (and after
+    `SConsCommonArguments.Linker.Apply()`, if the linker is selected this
+    way). Compile flags are merged into ``CCFLAGS`` and ``SHCCFLAGS``, link
+    flags into ``LINKFLAGS`` and ``SHLINKFLAGS``.
+
+    :Parameters:
+        args
+            committed debug information arguments, as returned by
+            ``decls.Commit()``,
+        env : SCons.Environment.Environment
+            the environment to be updated,
+        cc_args
+            arguments owning ``CC``/``CXX`` (read to guess `family`) and the
+            compile and link flags debug flags are merged into; their
+            ``LINKFLAGS`` also tell which linker will split or compress debug
+            sections (default: `args`),
+        family : str
+            compiler family; guessed from ``CC`` (or ``CXX``) by default.
+    :Returns:
+        a tuple ``(compile_flags, link_flags)`` of the merged flags
+    """
+    if cc_args is None:
+        cc_args = args
+    proxy = args.EnvProxy(env)
+    cc_proxy = cc_args.EnvProxy(env)
+    values = dict([(name, _get(proxy, name)) for name, _ in _debug_arg_tuples])
+    if family is None:
+        family = SConsCommonArguments.Probe.GuessFamily(_get(cc_proxy, 'CC') or _get(cc_proxy, 'CXX') or '')
+    compile_flags, link_flags = Flags(values, family, _linker(cc_proxy))
+    if compile_flags:
+        SConsCommonArguments.Flags.MergeInto(cc_args, env, _compile_flag_names, compile_flags)
+    if link_flags:
+        SConsCommonArguments.Flags.MergeInto(cc_args, env, _link_flag_names, link_flags)
+    return compile_flags, link_flags
+
+# Local Variables:
+# # tab-width:4
+# # indent-tabs-mode:nil
+# # End:
+# vim: set syntax=python expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,275 @@
+"""`SConsCommonArguments.DiskCache`
+
+Persistent (on-disk) cache of argument declarations.
+
+**General Description**
+
+Computing argument declarations is cheap for a single SCons run, but it adds
+up in environments with thousands of short, incremental builds. This module
+stores the declarations computed by ``Declarations()`` functions on disk, such
+that subsequent SCons runs may load them instead of recomputing.
+
+The cache is disabled by default. To enable it, call
+`SConsCommonArguments.Util.enable_persistent_cache()` in your SConstruct,
+before any ``Declarations()`` is invoked.
+
+.. python::
+    # SConstruct
+    import SConsCommonArguments.Util
+    import SConsCommonArguments.CC
+
+    SConsCommonArguments.Util.enable_persistent_cache()
+    decls = SConsCommonArguments.CC.Declarations()
+
+Entries are keyed by a digest of the ``Declarations()`` keywords, the
+modification times and sizes of the source files of `SConsCommonArguments`
+and `SConsArguments` (and of the family module, if defined elsewhere), the
+version of `SConsArguments` and the python version. The sources are only
+stat'ed (not read), once per process, so a hit stays cheaper than computing
+the declarations. Entries left by older sources are removed automatically.
+Keywords which have no stable textual representation (lambdas, ``nameconv``
+objects) and declarations with default values that can't be marshalled
+bypass the cache.
+"""
+
+#
+# Copyright (c) 2016 by Pawel Tomulik
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+
+__docformat__ = "restructuredText"
+
+import SConsArguments
+import hashlib
+import marshal
+import os
+import sys
+
+#############################################################################
+def _canonical(value):
+    """Return a canonical string representation of plain data `value`, as
+    produced by `SConsCommonArguments.Util.declarations_cache_key()`.
+
+    Raises `TypeError` for objects which have no stable representation.
+    """
+    if value is None or isinstance(value, (bool, int, float)):
+        return repr(value)
+    elif isinstance(value, type):
+        return value.__name__
+    elif isinstance(value, tuple):
+        return '(%s)' % ','.join([_canonical(v) for v in value])
+    elif isinstance(value, frozenset):
+        return '{%s}' % ','.join(sorted([_canonical(v) for v in value]))
+    try:
+        if isinstance(value, basestring):
+            return repr(value)
+        if isinstance(value, long):
+            return repr(value)
+    except NameError:
+        # Python 3
+        if isinstance(value, str):
+            return repr(value)
+    raise TypeError("can't canonicalize %r" % type(value))
+
+#############################################################################
+def _source_stamp(filename):
+    """Return modification time and size of source file corresponding to
+    module file `filename`"""
+    if filename.endswith(('.pyc', '.pyo')):
+        filename = filename[:-1]
+    try:
+        st = os.stat(filename)
+    except OSError:
+        return ''
+    return '%r,%d' % (st.st_mtime, st.st_size)
+
+def _package_sources(module):
+    """Return sorted list of source files of the package `module` is
+    ``__init__`` of (or of `module` alone, if it's not a package)"""
+    filename = getattr(module, '__file__', None)
+    if not filename:
+        return []
+    if os.path.splitext(os.path.basename(filename))[0] != '__init__':
+        return [filename]
+    sources = []
+    for dirpath, dirnames, filenames in os.walk(os.path.dirname(filename)):
+        dirnames[:] = sorted([d for d in dirnames if d != '__pycache__'])
+        sources.extend([os.path.join(dirpath, f) for f in filenames if f.endswith('.py')])
+    return sorted(sources)
+
+# digest of SConsCommonArguments and SConsArguments source stamps, computed
+# once per process
+_packages_digest = None
+
+def _packages_source_digest():
+    global _packages_digest
+    if _packages_digest is None:
+        pkg = sys.modules[__name__.rsplit('.', 1)[0]]
+        parts = []
+        for module in (pkg, SConsArguments):
+            # paths relative to the package (os.path.relpath() is slow)
+            start = len(os.path.dirname(module.__file__)) + 1
+            for filename in _package_sources(module):
+                parts.append('%s=%s' % (filename[start:], _source_stamp(filename)))
+        _packages_digest = _sha1(':'.join(parts))
+    return _packages_digest
+
+#############################################################################
+def _sha1(data):
+    if not isinstance(data, bytes):
+        data = data.encode('utf-8')
+    return hashlib.sha1(data).hexdigest()[:16]
+
+#############################################################################
+def default_directory():
+    """Return default directory for the persistent cache.
+
+    This is the ``.sconscommonargs`` subdirectory of the top-level SCons
+    directory (where ``.sconsign`` usually resides), or of the current
+    working directory if SCons filesystem is not available.
+    """
+    try:
+        import SCons.Node.FS
+        top = SCons.Node.FS.get_default_fs().Dir('#').abspath
+    except Exception:
+        top = os.getcwd()
+    return os.path.join(top, '.sconscommonargs')
+
+#############################################################################
+class DeclarationsDiskCache(object):
+    """Persistent cache of ``(name, decl)`` specs.
+
+    Each entry is stored as a separate marshal file named
+    ``<family>.<sources-digest>.<keywords-digest>.marshal``.
+    """
+    suffix = '.marshal'
+
+    def __init__(self, directory = None):
+        """Initialize the cache.
+
+        :Parameters:
+            directory : str
+                directory to store entries in (default:
+                `default_directory()`), created on first write.
+        """
+        if directory is None:
+            directory = default_directory()
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self._source_digests = dict()
+
+    def _source_digest(self, family):
+        try:
+            return self._source_digests[family]
+        except KeyError:
+            pass
+        parts = [repr(tuple(sys.version_info[:2])),
+                 repr(getattr(SConsArguments, '__version__', None)),
+                 _packages_source_digest()]
+        pkg = __name__.rsplit('.', 1)[0]
+        if not family.startswith(pkg + '.'):
+            # family module defined outside of this package
+            filename = getattr(sys.modules.get(family), '__file__', None)
+            if filename:
+                parts.append(_source_stamp(filename))
+        digest = _sha1(':'.join(parts))
+        self._source_digests[family] = digest
+        self.prune(family, digest)
+        return digest
+
+    def _path(self, key):
+        if key is None:
+            return None
+        family, frozen = key
+        try:
+            kwdigest = _sha1(_canonical(frozen))
+        except TypeError:
+            return None
+        filename = '%s.%s.%s%s' % (family, self._source_digest(family), kwdigest, self.suffix)
+        return os.path.join(self.directory, filename)
+
+    def prune(self, family, digest = None):
+        """Remove entries of `family` which were not created from sources
+        with given `digest` (remove all entries of `family` if `digest` is
+        ``None``)."""
+        try:
+            filenames = os.listdir(self.directory)
+        except OSError:
+            return
+        prefix = family + '.'
+        keep = '%s%s.' % (prefix, digest)
+        for filename in filenames:
+            if filename.startswith(prefix) and filename.endswith(self.suffix) \
+                and (digest is None or not filename.startswith(keep)):
+                try:
+                    os.remove(os.path.join(self.directory, filename))
+                except OSError:
+                    pass
+
+    def get(self, key):
+        """Return specs stored under `key` or ``None``"""
+        path = self._path(key)
+        if path is None:
+            self.misses += 1
+            return None
+        try:
+            with open(path, 'rb') as f:
+                # loads() of the whole file is much faster than load(f)
+                data = marshal.loads(f.read())
+        except (IOError, OSError, EOFError, ValueError, TypeError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return [(name, dict(items)) for (name, items) in data]
+
+    def put(self, key, specs):
+        """Store `specs` under `key`; silently gives up on failure"""
+        path = self._path(key)
+        if path is None:
+            return
+        try:
+            data = marshal.dumps(tuple([(name, tuple(decl.items())) for (name, decl) in specs]))
+        except ValueError:
+            # unmarshallable default values
+            return
+        tmp = '%s.%d.tmp' % (path, os.getpid())
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            if os.path.exists(path):
+                os.remove(path)
+            os.rename(tmp, path)
+        except (IOError, OSError):
+            try: os.remove(tmp)
+            except OSError: pass
+
+    def info(self):
+        """Return a dictionary with cache statistics"""
+        return { 'hits'      : self.hits,
+                 'misses'    : self.misses,
+                 'directory' : self.directory }
+
+# Local Variables:
+# # tab-width:4
+# # indent-tabs-mode:nil
+# # End:
+# vim: set syntax=python expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,190 @@
+"""`SConsCommonArguments.Fingerprint`
+
+Toolchain fingerprint computed from resolved common arguments.
+
+**General Description**
+
+The fingerprint is a digest of the toolchain as seen by the build: program
+arguments (``CC``, ``CXX``, ...) resolved to binaries and identified by path,
+size and modification time, normalized flag arguments (tokenized and
+de-duplicated, see `SConsCommonArguments.Flags.Merge()`) and launcher
+settings (see `SConsCommonArguments.Launcher`). It changes after a compiler
+upgrade or a meaningful change of flags, but not after cosmetic changes (e.g.
+whitespace or repeated flags). Typical uses are partitioning of ``CacheDir``
+per toolchain and short-circuiting of configure checks.
+
+The fingerprint is computed once per invocation (for given arguments,
+environment and names); subsequent calls are dictionary lookups.
+
+**Quick start**
+
+.. python::
+    # SConstruct
+    import SConsCommonArguments.CC
+    import SConsCommonArguments.Fingerprint
+
+    env = Environment()
+    var = Variables()
+    decls = SConsCommonArguments.CC.Declarations()
+    args = decls.Commit(env, var, True)
+    args.Postprocess(env, var, True)
+
+    CacheDir(SConsCommonArguments.Fingerprint.CacheDirFor(args, env, '#/.cache'))
+"""
+
+#
+# Copyright (c) 2016 by Pawel Tomulik
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+
+__docformat__ = "restructuredText"
+
+import hashlib
+import json
+import os
+import SCons.Util
+import SConsCommonArguments.Flags
+import SConsCommonArguments.Probe
+
+#############################################################################
+# (id(args), id(env), names) -> (args, env, fingerprint); args and env are
+# kept alive, so that their ids are not reused by other objects
+_fingerprints = dict()
+
+def _default_names():
+    import SConsCommonArguments.CC
+    import SConsCommonArguments.Launcher
+    progs = SConsCommonArguments.CC.Names(include_flags = False)
+    flags = SConsCommonArguments.CC.Names(include_progs = False)
+    launchers = SConsCommonArguments.Launcher.Names(include_cache = False)
+    settings = SConsCommonArguments.Launcher.Names(include_launchers = False)
+    return progs + launchers, flags + settings
+
+def _program_identity(tokens, path):
+    """Return identity of program given by `tokens` (program followed by
+    its flags); leading launchers, such as ``ccache``, are skipped"""
+    tokens = SConsCommonArguments.Probe.StripLaunchers(tokens)
+    if not tokens:
+        return None
+    resolved = SConsCommonArguments.Probe.ResolveCompiler(tokens[0], path)
+    if resolved is None:
+        return [tokens[0], None, None, list(tokens[1:])]
+    st = os.stat(resolved)
+    return [resolved, st.st_size, st.st_mtime, list(tokens[1:])]
+
+def _value(proxy, env, name):
+    try:
+        value = proxy[name]
+    except KeyError:
+        return None
+    if SCons.Util.is_String(value) and '$' in value and hasattr(env, 'subst'):
+        value = env.subst(value)
+    return value
+
+#############################################################################
+def Compute(args, env, programs = None, flags = None):
+    """Compute toolchain fingerprint (without caching).
+
+    :Parameters:
+        args
+            committed arguments, as returned by ``decls.Commit()``,
+        env : SCons.Environment.Environment
+            the environment with resolved arguments (after
+            ``args.Postprocess()``),
+        programs : list
+            names of program arguments (default: CC programs and launchers),
+        flags : list
+            names of flag and other arguments (default: CC flags and launcher
+            cache settings).
+    :Returns:
+        the fingerprint, a hexadecimal string
+    """
+    if programs is None or flags is None:
+        default_programs, default_flags = _default_names()
+        if programs is None:
+            programs = default_programs
+        if flags is None:
+            flags = default_flags
+    try:
+        path = env['ENV']['PATH']
+    except KeyError:
+        path = None
+    proxy = args.EnvProxy(env)
+    data = []
+    for name in programs:
+        value = _value(proxy, env, name)
+        if value:
+            data.append([name, _program_identity(SConsCommonArguments.Flags.FlagList(value), path)])
+    for name in flags:
+        value = _value(proxy, env, name)
+        if value:
+            if SCons.Util.is_String(value) or SCons.Util.is_Sequence(value):
+                value = list(SConsCommonArguments.Flags.Merge(value)[0])
+            else:
+                value = str(value)
+            data.append([name, value])
+    return hashlib.sha1(json.dumps(data, sort_keys = True).encode('utf-8')).hexdigest()
+
+def Fingerprint(args, env, programs = None, flags = None):
+    """Return toolchain fingerprint, computing it on first call.
+
+    See `Compute()` for parameters. The result is cached for the rest of
+    the invocation; use `ClearCache()` if the arguments are changed after
+    the fingerprint has been taken.
+
+    :Returns:
+        the fingerprint, a hexadecimal string
+    """
+    key = (id(args), id(env),
+           None if programs is None else tuple(programs),
+           None if flags is None else tuple(flags))
+    try:
+        return _fingerprints[key][2]
+    except KeyError:
+        fingerprint = Compute(args, env, programs, flags)
+        _fingerprints[key] = (args, env, fingerprint)
+        return fingerprint
+
+def ClearCache():
+    """Forget fingerprints computed by `Fingerprint()`"""
+    _fingerprints.clear()
+
+def CacheDirFor(args, env, root, length = 16):
+    """Return per-toolchain subdirectory of `root`, to be used with
+    ``CacheDir()``.
+
+    :Parameters:
+        args
+            committed arguments, as returned by ``decls.Commit()``,
+        env : SCons.Environment.Environment
+            the environment with resolved arguments,
+        root : str
+            the common cache directory,
+        length : int
+            number of fingerprint characters used as subdirectory name.
+    :Returns:
+        the path ``root/<fingerprint-prefix>``
+    """
+    return os.path.join(root, Fingerprint(args, env)[:length])
+
+# Local Variables:
+# # tab-width:4
+# # indent-tabs-mode:nil
+# # End:
+# vim: set syntax=python expandtab tabstop=4 shiftwidth=4:
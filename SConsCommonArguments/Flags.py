@@ -0,0 +1,492 @@
+"""`SConsCommonArguments.Flags`
+
+Tokenized flag values for the flag arguments (``CFLAGS``, ``CXXFLAGS``, ...).
+
+**General Description**
+
+By default, flag arguments are declared with ``type='string'``, so a value
+such as ``CXXFLAGS="-O2 -g -Wall"`` enters the SCons environment as a single
+string, which SCons splits again wherever it's substituted. This module
+parses flag strings once, with shell-aware quoting, into
+``SCons.Util.CLVar`` token lists. Tokenizations are cached per raw string.
+
+**Quick start**
+
+.. python::
+    # SConstruct
+    import SConsCommonArguments.CC
+    import SConsCommonArguments.Flags
+
+    env = Environment(tools = [])
+    var = Variables()
+    decls = SConsCommonArguments.CC.Declarations(flag_type = 'flaglist')
+    args = decls.Commit(env, var, True)
+    args.Postprocess(env, var, True)
+    # convert values that came from options and the original environment
+    SConsCommonArguments.Flags.Postprocess(args, env, SConsCommonArguments.CC.Names(include_progs = False))
+
+With ``flag_type='flaglist'``, the flag arguments get `FlagList` as their
+command-line variable converter. `Postprocess()` converts the remaining string
+values (from command-line options or the original environment), so all
+flag values end up as token lists.
+
+**Merging flags**
+
+`Merge()` combines several flag sources into one list, in linear time.
+Mutually exclusive options, such as ``-O2 -O3`` or ``-std=c++11
+-std=c++14``, redefined macros (``-DX=1 -DX=2``) and warning and
+``-f``/``-m``/``-g`` switches toggled on and off (``-fPIC -fno-PIC``,
+``-Werror -Wno-error``) are resolved in favor of the last one, as the
+compiler does. Duplicated include/library paths are removed keeping the first
+occurrence, as their order determines the search order. Any other option
+(``-z now``, ``-Xclang ...``, ``-mllvm ...``, libraries, linker pass-through
+options, ...) and non-option arguments are never dropped, since their
+repetition may be meaningful. `MergePostprocess()` uses it to merge the
+values found in the environment, in variables files and on the command line,
+instead of replacing them.
+"""
+
+#
+# Copyright (c) 2016 by Pawel Tomulik
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+
+__docformat__ = "restructuredText"
+
+import SCons.Util
+import collections
+import os
+import re
+import shlex
+import sys
+
+try:
+    # Python 3
+    from shlex import quote as _quote
+except ImportError:
+    # Python 2
+    from pipes import quote as _quote
+
+_tokenize_cache = dict()
+_tokenize_cache_maxsize = 1024
+_tokenize_stats = { 'hits' : 0, 'misses' : 0 }
+
+#############################################################################
+def Tokenize(value):
+    """Split flag string `value` into tokens, honoring shell quoting.
+
+    Results are cached per raw string.
+
+    :Parameters:
+        value : str
+            flags, e.g. ``'-O2 -DNAME="a b"'``
+    :Returns:
+        a tuple of tokens, e.g. ``('-O2', '-DNAME=a b')``
+    """
+    try:
+        tokens = _tokenize_cache[value]
+    except KeyError:
+        pass
+    else:
+        _tokenize_stats['hits'] += 1
+        return tokens
+    _tokenize_stats['misses'] += 1
+    # backslashes are path separators on Windows, not escapes
+    tokens = tuple(shlex.split(value, posix = (os.name != 'nt')))
+    if len(_tokenize_cache) >= _tokenize_cache_maxsize:
+        _tokenize_cache.clear()
+    _tokenize_cache[value] = tokens
+    return tokens
+
+#############################################################################
+def Join(tokens):
+    """Join `tokens` into a flag string, quoting them so that `Tokenize()`
+    gives them back.
+
+    :Parameters:
+        tokens : list
+            flags, e.g. ``['-O2', '-DNAME=a b']``
+    :Returns:
+        a string, e.g. ``"-O2 '-DNAME=a b'"``
+    """
+    if os.name == 'nt':
+        return ' '.join([('"%s"' % t) if (not t or re.search(r'\s', t)) else t for t in tokens])
+    return ' '.join([_quote(t) for t in tokens])
+
+#############################################################################
+def TokenizeCacheInfo():
+    """Return a dictionary with ``hits``, ``misses`` and ``size`` of the
+    tokenization cache"""
+    info = dict(_tokenize_stats)
+    info['size'] = len(_tokenize_cache)
+    return info
+
+#############################################################################
+def ClearTokenizeCache():
+    """Clear the tokenization cache"""
+    _tokenize_cache.clear()
+
+#############################################################################
+def FlagList(value):
+    """Convert flags `value` to ``SCons.Util.CLVar``.
+
+    Strings are tokenized with `Tokenize()`, sequences are copied. A fresh
+    list is returned each time, so it may be modified (e.g. by
+    ``env.Append()``) without affecting the cache.
+
+    :Returns:
+        an instance of ``SCons.Util.CLVar``
+    """
+    if value is None:
+        return SCons.Util.CLVar([])
+    elif SCons.Util.is_String(value):
+        return SCons.Util.CLVar(list(Tokenize(value)))
+    return SCons.Util.CLVar(list(value))
+
+#############################################################################
+def LinkerName(value):
+    """Return name of the linker selected with ``-fuse-ld=`` in flags `value`.
+
+    The last ``-fuse-ld=`` wins. Paths and the ``ld.`` prefix are stripped,
+    so ``-fuse-ld=/usr/bin/ld.lld`` and ``-fuse-ld=lld`` both give ``'lld'``.
+
+    :Returns:
+        linker name or ``None`` if no linker is selected
+    """
+    linker = None
+    for t in FlagList(value):
+        if t.startswith('-fuse-ld='):
+            linker = os.path.basename(t[len('-fuse-ld='):])
+            if linker.startswith('ld.'):
+                linker = linker[len('ld.'):]
+    return linker
+
+#############################################################################
+def Postprocess(args, env, names):
+    """Convert string values of flag arguments `names` in `env` to token
+    lists.
+
+    :Parameters:
+        args
+            committed arguments, as returned by ``decls.Commit()``,
+        env : SCons.Environment.Environment
+            the environment to be updated,
+        names : list
+            names of flag arguments (e.g.
+            ``SConsCommonArguments.CC.Names(include_progs = False)``).
+    """
+    proxy = args.EnvProxy(env)
+    for name in names:
+        try:
+            value = proxy[name]
+        except KeyError:
+            continue
+        if SCons.Util.is_String(value):
+            proxy[name] = FlagList(value)
+
+#############################################################################
+# Options which take their argument as a separate token
+_options_with_arg = frozenset([
+    '-I', '-D', '-U', '-L', '-include', '-imacros', '-isystem', '-iquote',
+    '-idirafter', '-isysroot', '-framework', '-arch', '-target', '-x', '-MF',
+    '-MT', '-MQ', '-o', '-Xlinker', '-Xpreprocessor', '-Xassembler',
+    '-Xclang', '-mllvm', '-z', '-T', '-include-pch'
+])
+
+# Options with argument, which may be de-duplicated
+_dedup_options_with_arg = frozenset([
+    '-I', '-L', '-include', '-include-pch', '-imacros', '-isystem', '-iquote',
+    '-idirafter', '-isysroot', '-framework'
+])
+
+# Paths, which may be de-duplicated (the first one is kept)
+_dedup_options = re.compile(r'^-(?:I|L|pthread$|pipe$|rdynamic$)')
+
+# Switches, which may be turned on and off (the last one wins), e.g.
+# ``-fPIC``/``-fno-PIC``; groups: prefix and feature name without ``no-``
+_toggle_options = re.compile(r'^-([Wfmg])(?:no-)?(.+)$')
+
+# Pass-through options, which are never dropped
+_passthrough_options = re.compile(r'^-(?:W[alp],|mllvm$)')
+
+# Groups of mutually exclusive options, the last one wins
+_exclusive_options = [
+    ( 'O',          re.compile(r'^-O(?:\d+|s|z|g|fast)?$') ),
+    ( 'std',        re.compile(r'^-std=') ),
+    ( 'stdlib',     re.compile(r'^-stdlib=') ),
+    ( 'march',      re.compile(r'^-march=') ),
+    ( 'mtune',      re.compile(r'^-mtune=') ),
+    ( 'mcpu',       re.compile(r'^-mcpu=') ),
+    ( 'fuse-ld',    re.compile(r'^-fuse-ld=') ),
+    ( 'flto',       re.compile(r'^-f(?:no-)?lto(?:=|$)') ),
+    ( 'fprofile',   re.compile(r'^-f(?:no-)?profile-(?:generate|use|instr-generate|instr-use)(?:=|$)') ),
+    ( 'g',          re.compile(r'^-g(?:[0-3]|line-tables-only|line-directives-only)?$') ),
+    ( 'gz',         re.compile(r'^-gz(?:=|$)') ),
+    ( 'gsplit-dwarf', re.compile(r'^-g(?:no-)?split-dwarf$') ),
+    ( 'm-abi',      re.compile(r'^-m(?:16|32|64|x32)$') ),
+    ( 'pie',        re.compile(r'^-(?:no-)?pie$') ),
+]
+
+def _tokens(value):
+    if value is None:
+        return ()
+    elif SCons.Util.is_String(value):
+        return Tokenize(value)
+    return value
+
+def _units(tokens):
+    """Group tokens into units, e.g. ``('-I', 'dir')``"""
+    units = []
+    i, n = 0, len(tokens)
+    while i < n:
+        t = tokens[i]
+        if (t in _options_with_arg or t.startswith('-Xarch_')) and i + 1 < n:
+            units.append((t, tokens[i + 1]))
+            i += 2
+        else:
+            units.append((t,))
+            i += 1
+    return units
+
+def _unit_key(unit):
+    """Return key used to detect duplicates/conflicts of `unit`, ``None``
+    means the unit is always kept"""
+    t = unit[0]
+    if len(unit) > 1:
+        if t == '-D':
+            return ('last', 'D', unit[1].split('=', 1)[0])
+        elif t in _dedup_options_with_arg:
+            return ('first', unit)
+        return None
+    for group, pattern in _exclusive_options:
+        if pattern.match(t):
+            return ('last', group)
+    if t.startswith('-D'):
+        return ('last', 'D', t[2:].split('=', 1)[0])
+    elif _dedup_options.match(t):
+        return ('first', unit)
+    m = _toggle_options.match(t)
+    if m and not _passthrough_options.match(t):
+        return ('last', m.group(1), m.group(2))
+    return None
+
+#############################################################################
+def Merge(*sources):
+    """Merge flag `sources` with ordered de-duplication.
+
+    :Parameters:
+        sources
+            flag strings or token lists, in order of increasing priority
+            (e.g. environment, variables file, command line).
+    :Returns:
+        a tuple ``(flags, collapsed)``, where ``flags`` is the merged
+        ``SCons.Util.CLVar`` and ``collapsed`` is a list of ``(kind, dropped,
+        kept)`` triples describing what was removed; ``kind`` is either
+        ``'duplicate'`` or ``'overridden'``
+    """
+    units = []
+    for source in sources:
+        units.extend(_units(_tokens(source)))
+    keys = [_unit_key(u) for u in units]
+    last = dict()
+    for i, key in enumerate(keys):
+        if key is not None and key[0] == 'last':
+            last[key] = i
+
+    flags = []
+    collapsed = []
+    seen = set()
+    for i, (unit, key) in enumerate(zip(units, keys)):
+        if key is None:
+            flags.extend(unit)
+        elif key[0] == 'last':
+            j = last[key]
+            if i == j:
+                flags.extend(unit)
+            elif unit == units[j]:
+                collapsed.append(('duplicate', ' '.join(unit), ' '.join(unit)))
+            else:
+                collapsed.append(('overridden', ' '.join(unit), ' '.join(units[j])))
+        elif key in seen:
+            collapsed.append(('duplicate', ' '.join(unit), ' '.join(unit)))
+        else:
+            seen.add(key)
+            flags.extend(unit)
+    return SCons.Util.CLVar(flags), collapsed
+
+#############################################################################
+def _variables_files_values(variables):
+    """Read variables files the way ``SCons.Variables.Variables.Update()``
+    does.
+
+    :Returns:
+        a tuple ``(values, per_file)``, where ``values`` is a dictionary with
+        all the values read and ``per_file`` a list of dictionaries with the
+        values assigned by every file, in the order the files are read
+    """
+    values = dict()
+    per_file = []
+    for filename in getattr(variables, 'files', None) or []:
+        if not os.path.exists(filename):
+            continue
+        with open(filename) as f:
+            source = f.read()
+        dirname = os.path.split(os.path.abspath(filename))[0]
+        if dirname:
+            sys.path.insert(0, dirname)
+        file_values = dict(values)
+        file_values['__name__'] = filename
+        try:
+            exec(compile(source, filename, 'exec'), {}, file_values)
+        finally:
+            if dirname:
+                del sys.path[0]
+            del file_values['__name__']
+        per_file.append(dict([(k, v) for (k, v) in file_values.items()
+                              if k not in values or values[k] is not v]))
+        values = file_values
+    return values, per_file
+
+def _preloaded_args(variables, values):
+    """Return command-line variables with the `values` read from variables
+    files prepended, for ``Update()`` to take them instead of reading the
+    files once again"""
+    keys = set([getattr(o, 'key', None) for o in getattr(variables, 'options', None) or []])
+    preloaded = [(k, v) for (k, v) in values.items() if k in keys]
+    preloaded.extend((getattr(variables, 'args', None) or {}).items())
+    return collections.OrderedDict(preloaded)
+
+def _var_key(args, name):
+    try:
+        return args.get_var_key(name)
+    except (AttributeError, KeyError):
+        return name
+
+def MergePostprocess(args, env, variables, options = False, names = None, **kw):
+    """Run ``args.Postprocess()`` merging (instead of replacing) values of
+    flag arguments `names`.
+
+    The values are merged in order of increasing priority: the value found in
+    `env` beforehand, the values from variables files, the value from the
+    command line variables and finally the value resolved by
+    ``args.Postprocess()``, if it differs from the previous one (e.g. a
+    command-line option).
+
+    Variables files are read once: their values are passed to
+    ``args.Postprocess()`` along with the command-line variables (``variables``
+    is restored afterwards).
+
+    :Parameters:
+        args
+            committed arguments, as returned by ``decls.Commit()``,
+        env : SCons.Environment.Environment
+            the environment to be updated,
+        variables : SCons.Variables.Variables
+            passed to ``args.Postprocess()``,
+        options : boolean
+            passed to ``args.Postprocess()``,
+        names : list
+            names of flag arguments to be merged.
+    :Keywords:
+        passed to ``args.Postprocess()``.
+    :Returns:
+        a dictionary mapping argument names to lists of collapsed flags
+        (see `Merge()`), only arguments with collapsed flags are included
+    """
+    if names is None:
+        raise TypeError("MergePostprocess() requires names of flag arguments")
+    proxy = args.EnvProxy(env)
+    before = dict()
+    for name in names:
+        try:
+            before[name] = proxy[name]
+        except KeyError:
+            pass
+    arguments = getattr(variables, 'args', None) or {}
+    values, files = _variables_files_values(variables)
+    if files:
+        # the files are read only once, Update() gets their values as
+        # command-line variables (they have lower priority than the rest)
+        saved = (variables.files, variables.args)
+        variables.files, variables.args = [], _preloaded_args(variables, values)
+        try:
+            args.Postprocess(env, variables, options, **kw)
+        finally:
+            variables.files, variables.args = saved
+    else:
+        args.Postprocess(env, variables, options, **kw)
+    report = dict()
+    for name in names:
+        try:
+            after = proxy[name]
+        except KeyError:
+            continue
+        if before.get(name) is after:
+            flags, collapsed = Merge(after)
+        else:
+            var_key = _var_key(args, name)
+            sources = [before.get(name)]
+            sources.extend([f[var_key] for f in files if var_key in f])
+            if var_key in arguments:
+                sources.append(arguments[var_key])
+            if list(_tokens(sources[-1])) != list(_tokens(after)):
+                sources.append(after)
+            flags, collapsed = Merge(*sources)
+        proxy[name] = flags
+        if collapsed:
+            report[name] = collapsed
+    return report
+
+#############################################################################
+def MergeInto(args, env, names, flags):
+    """Merge `flags` into flag arguments `names` (e.g. flags generated from
+    other arguments), see `Merge()`.
+
+    :Parameters:
+        args
+            committed arguments, as returned by ``decls.Commit()``,
+        env : SCons.Environment.Environment
+            the environment to be updated,
+        names : list
+            names of flag arguments to be updated,
+        flags : str | list
+            flags to be merged; they take precedence over the flags already
+            present in `env`.
+    :Returns:
+        a dictionary mapping argument names to lists of collapsed flags
+        (see `Merge()`), only arguments with collapsed flags are included
+    """
+    proxy = args.EnvProxy(env)
+    report = dict()
+    for name in names:
+        try:
+            before = proxy[name]
+        except KeyError:
+            before = None
+        merged, collapsed = Merge(before, flags)
+        proxy[name] = merged
+        if collapsed:
+            report[name] = collapsed
+    return report
+
+# Local Variables:
+# # tab-width:4
+# # indent-tabs-mode:nil
+# # End:
+# vim: set syntax=python expandtab tabstop=4 shiftwidth=4:
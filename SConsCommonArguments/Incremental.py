@@ -0,0 +1,306 @@
+"""`SConsCommonArguments.Incremental`
+
+Incremental post-processing of committed arguments.
+
+**General Description**
+
+The documented flow ``decls.Commit(env, var, True)`` followed by
+``args.Postprocess(env, var, True)`` resolves every argument on every SCons
+invocation, although usually nothing (or just one or two variables, such as
+``CC=``) changes between builds. The `Postprocess()` function defined here
+keeps a snapshot of the inputs (command-line variables, variable files,
+command-line options and the original construction variables) and of the
+values resolved last time. Resolved values of arguments whose inputs didn't
+change are applied from the snapshot. If only command-line variables of some
+arguments changed (e.g. ``CC=clang``), just these arguments are converted
+and validated, the way ``Variables.Update()`` would do it; otherwise (e.g.
+after a change of variable files or command-line options) the full
+``args.Postprocess()`` is run. In either case, names of arguments whose
+resolved values changed since the snapshot are returned, so downstream
+tooling may skip reconfiguration when the toolchain arguments are
+unchanged.
+
+**Quick start**
+
+.. python::
+    # SConstruct
+    import SConsCommonArguments.CC
+    import SConsCommonArguments.Incremental
+
+    env = Environment(tools = [])
+    var = Variables()
+    decls = SConsCommonArguments.CC.Declarations()
+    args = decls.Commit(env, var, True)
+    changed = SConsCommonArguments.Incremental.Postprocess(
+        args, env, var, True, names = SConsCommonArguments.CC.Names(),
+        snapshot = '.sconscommonargs/cc-snapshot.json')
+    if changed:
+        print "changed: %s" % ', '.join(changed)
+
+Only string (and ``None``) values are restored from snapshots; if any
+argument resolves to another type, ``args.Postprocess()`` is always run.
+"""
+
+#
+# Copyright (c) 2016 by Pawel Tomulik
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+
+__docformat__ = "restructuredText"
+
+import hashlib
+import json
+import os
+import SCons.Util
+
+_missing = object()
+
+#############################################################################
+class Snapshot(object):
+    """Inputs digests and resolved values of arguments, as seen by the last
+    `Postprocess()`.
+
+    The ``inputs`` attribute holds a dictionary with the digest of inputs
+    shared by all arguments (``'common'``) and digests of inputs of
+    individual arguments (``'names'``). The ``values`` attribute maps
+    argument names to ``repr()`` of their
+    resolved values and is used to detect changes. The ``resolved``
+    attribute holds the values themselves, or ``None`` if they can't be
+    restored from a snapshot.
+    """
+    def __init__(self, inputs = None, values = None, resolved = None):
+        self.inputs = inputs
+        self.values = values
+        self.resolved = resolved
+
+    @classmethod
+    def load(cls, filename):
+        """Load snapshot from JSON file (returns empty snapshot on failure)"""
+        try:
+            with open(filename) as f:
+                data = json.load(f)
+            return cls(data['inputs'], data['values'], data['resolved'])
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            return cls()
+
+    def save(self, filename):
+        """Save snapshot to JSON file"""
+        dirname = os.path.dirname(filename)
+        if dirname and not os.path.isdir(dirname):
+            os.makedirs(dirname)
+        tmp = '%s.%d.tmp' % (filename, os.getpid())
+        with open(tmp, 'w') as f:
+            json.dump({ 'inputs'   : self.inputs,
+                        'values'   : self.values,
+                        'resolved' : self.resolved }, f, sort_keys = True)
+        if os.path.exists(filename):
+            os.remove(filename)
+        os.rename(tmp, filename)
+
+#############################################################################
+def _is_plain(value):
+    try:
+        return value is None or isinstance(value, basestring)
+    except NameError:
+        # Python 3
+        return value is None or isinstance(value, str)
+
+def _proxy_get(proxy, name):
+    try:
+        return proxy[name]
+    except KeyError:
+        return _missing
+
+def _option_values(options):
+    if not options:
+        return []
+    try:
+        import SCons.Script.Main
+        return sorted(vars(SCons.Script.Main.OptionsParser.values).items())
+    except (ImportError, AttributeError, TypeError):
+        return []
+
+def _variables_files(variables):
+    files = []
+    for f in getattr(variables, 'files', None) or []:
+        try:
+            st = os.stat(f)
+            files.append((f, st.st_mtime, st.st_size))
+        except OSError:
+            files.append((f, None, None))
+    return files
+
+#############################################################################
+def _repr(value):
+    # repr() of _missing would differ between invocations
+    return None if value is _missing else repr(value)
+
+def _var_key(args, name):
+    try:
+        return args.get_var_key(name)
+    except (AttributeError, KeyError):
+        return name
+
+def _digest(state):
+    return hashlib.sha1(repr(state).encode('utf-8')).hexdigest()
+
+def InputsDigest(args, proxy, variables, options, names):
+    """Compute digests of everything `Postprocess()` results depend on.
+
+    :Parameters:
+        args
+            committed arguments, as returned by ``decls.Commit()``,
+        proxy
+            environment proxy, as returned by ``args.EnvProxy(env)``,
+        variables : SCons.Variables.Variables
+            SCons variables,
+        options : boolean
+            whether command-line options are taken into account,
+        names : list
+            argument names.
+    :Returns:
+        dictionary with the digest of inputs shared by all arguments
+        (``'common'``) and a dictionary of digests of inputs of individual
+        arguments (``'names'``); all digests are hexadecimal strings
+    """
+    cmdargs = getattr(variables, 'args', None) or {}
+    keys = dict([(_var_key(args, n), n) for n in names])
+    common = ( sorted([(k, repr(v)) for (k, v) in cmdargs.items() if k not in keys]),
+               _variables_files(variables),
+               _option_values(options),
+               sorted(names) )
+    own = dict()
+    for key, name in keys.items():
+        own[name] = _digest((_repr(cmdargs.get(key, _missing)), _repr(_proxy_get(proxy, name))))
+    return { 'common' : _digest(common), 'names' : own }
+
+def _find_option(variables, key):
+    for option in getattr(variables, 'options', None) or []:
+        if getattr(option, 'key', None) == key:
+            return option
+    return None
+
+def _update(args, env, proxy, variables, name):
+    """Resolve single argument `name` from command-line variables, as
+    ``variables.Update()`` does (conversion, then validation).
+
+    Returns ``False`` if the argument can't be resolved alone."""
+    key = _var_key(args, name)
+    try:
+        value = variables.args[key]
+    except (AttributeError, KeyError):
+        # no variable overrides the value found in environment
+        return True
+    option = _find_option(variables, key)
+    if option is None:
+        return False
+    if SCons.Util.is_String(value) and hasattr(env, 'subst'):
+        value = env.subst(value)
+    if getattr(option, 'converter', None):
+        try:
+            value = option.converter(value)
+        except TypeError:
+            value = option.converter(value, env)
+    proxy[name] = value
+    if getattr(option, 'validator', None):
+        option.validator(key, value, env)
+    return True
+
+def _resolve(args, env, proxy, variables, options, names, snap, inputs, **kw):
+    """Bring `names` up to date, reusing `snap` where possible"""
+    old = snap.inputs if isinstance(snap.inputs, dict) else {}
+    if snap.resolved is None or old.get('common') != inputs['common']:
+        args.Postprocess(env, variables, options, **kw)
+        return
+    stale = [n for n in names if old['names'].get(n) != inputs['names'][n]]
+    for name in stale:
+        if not _update(args, env, proxy, variables, name):
+            args.Postprocess(env, variables, options, **kw)
+            return
+    for name, value in snap.resolved.items():
+        if name not in stale and _proxy_get(proxy, name) != value:
+            proxy[name] = value
+
+def Postprocess(args, env, variables, options = False, names = None,
+                snapshot = None, **kw):
+    """Incremental variant of ``args.Postprocess(env, variables, options)``.
+
+    :Parameters:
+        args
+            committed arguments, as returned by ``decls.Commit()``,
+        env : SCons.Environment.Environment
+            SCons environment,
+        variables : SCons.Variables.Variables
+            SCons variables,
+        options : boolean
+            passed to ``args.Postprocess()``,
+        names : list
+            names of the arguments to track (e.g.
+            ``SConsCommonArguments.CC.Names()``),
+        snapshot : `Snapshot` | str
+            the snapshot object (for long-running sessions, such as
+            ``scons --interactive``) or name of the file to keep snapshot in;
+            the snapshot is updated in place.
+    :Keywords:
+        any other keywords are passed to ``args.Postprocess()``.
+    :Returns:
+        sorted list of names of arguments whose resolved values changed since
+        the snapshot was taken (all names for an empty snapshot)
+    """
+    if names is None:
+        raise TypeError("Postprocess() requires names of arguments to track")
+    if isinstance(snapshot, Snapshot) or snapshot is None:
+        snap, filename = snapshot or Snapshot(), None
+    else:
+        snap, filename = Snapshot.load(snapshot), snapshot
+
+    proxy = args.EnvProxy(env)
+    inputs = InputsDigest(args, proxy, variables, options, names)
+    if inputs == snap.inputs and snap.resolved is not None:
+        # Fast path, nothing changed since the snapshot was taken
+        for name, value in snap.resolved.items():
+            if _proxy_get(proxy, name) != value:
+                proxy[name] = value
+        return []
+
+    _resolve(args, env, proxy, variables, options, names, snap, inputs, **kw)
+    old = snap.values or {}
+    resolved = dict()
+    for name in names:
+        value = _proxy_get(proxy, name)
+        if value is not _missing:
+            resolved[name] = value
+    values = dict([(n, repr(v)) for (n, v) in resolved.items()])
+    changed = sorted([n for n in names if old.get(n) != values.get(n)])
+
+    snap.inputs = inputs
+    snap.values = values
+    if all([_is_plain(v) for v in resolved.values()]):
+        snap.resolved = resolved
+    else:
+        snap.resolved = None
+    if filename is not None:
+        snap.save(filename)
+    return changed
+
+# Local Variables:
+# # tab-width:4
+# # indent-tabs-mode:nil
+# # End:
+# vim: set syntax=python expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,314 @@
+"""`SConsCommonArguments.Jobs`
+
+Defines arguments related to build parallelism.
+
+**General Description**
+
+This module provides arguments which control the number of parallel build
+jobs, LTO partition jobs and linker threads. Their default values are computed
+lazily (on first call to `Declarations()`) from the number of CPUs available
+to the process, taking CPU affinity and cgroup CPU quota into account, so
+containerized builders aren't oversubscribed. The `Apply()` function wires the
+values into SCons (``SetOption('num_jobs', ...)``) and into the link flag
+arguments of `SConsCommonArguments.CC`.
+
+**Quick start**
+
+.. python::
+    # SConstruct
+    import SConsArguments
+    import SConsCommonArguments.CC
+    import SConsCommonArguments.Jobs
+
+    env = Environment()
+    var = Variables()
+    decls = SConsArguments.ArgumentDeclarations()
+    decls.update(SConsCommonArguments.CC.Declarations())
+    decls.update(SConsCommonArguments.Jobs.Declarations())
+    args = decls.Commit(env, var, True)
+    args.Postprocess(env, var, True)
+    SConsCommonArguments.Jobs.Apply(args, env)
+
+Running examples::
+
+    ptomulik@barakus:$ scons -Q JOBS=4 LINKFLAGS='-flto -fuse-ld=gold'
+
+**Supported Variables**
+
+    JOBS
+        Number of parallel build jobs (``scons -j``)
+    LTO_JOBS
+        Number of parallel LTO jobs (GCC's ``-flto=N``, Clang's ThinLTO
+        ``--thinlto-jobs=N``)
+    LINK_THREADS
+        Number of linker threads (gold, lld and mold)
+"""
+
+#
+# Copyright (c) 2016 by Pawel Tomulik
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+
+__docformat__ = "restructuredText"
+
+import os
+import SConsCommonArguments.Util
+import SConsCommonArguments.Flags
+import SConsCommonArguments.Probe
+
+#############################################################################
+_jobs_arg_tuples = [
+    ( 'JOBS',           'Number of parallel build jobs'),
+    ( 'LTO_JOBS',       'Number of parallel LTO partition jobs'),
+    ( 'LINK_THREADS',   'Number of linker threads'),
+]
+
+_registry = SConsCommonArguments.Util.ArgumentRegistry([
+    ('jobs',    _jobs_arg_tuples),
+])
+
+_link_flag_names = ['LINKFLAGS', 'SHLINKFLAGS']
+
+#############################################################################
+def _read(filename):
+    try:
+        with open(filename) as f:
+            return f.read().strip()
+    except (IOError, OSError):
+        return None
+
+def _quota(quota, period):
+    quota, period = int(quota), int(period)
+    if quota > 0 and period > 0:
+        return max(1, -(-quota // period))
+    return None
+
+def _cgroup_paths(proc):
+    """Return a dictionary mapping cgroup controllers (``''`` for cgroup v2)
+    to the process' cgroup paths, as listed in ``/proc/self/cgroup``"""
+    paths = dict()
+    data = _read(proc) or ''
+    for line in data.splitlines():
+        fields = line.split(':', 2)
+        if len(fields) == 3:
+            for controller in fields[1].split(','):
+                paths[controller] = fields[2]
+    return paths
+
+def _ancestors(root, path):
+    """Return `root`/`path` and its parent directories up to `root`"""
+    dirs = [root]
+    for part in [p for p in path.split('/') if p]:
+        dirs.append(os.path.join(dirs[-1], part))
+    return reversed(dirs)
+
+def _cgroup_quota(root = '/sys/fs/cgroup', proc = '/proc/self/cgroup'):
+    """Return CPU limit imposed by cgroup CPU quota (``None`` if unlimited).
+
+    The quota of the process' own cgroup (see ``/proc/self/cgroup``) and of
+    its ancestors is taken into account."""
+    paths = _cgroup_paths(proc)
+    limits = []
+    # cgroup v2
+    for d in _ancestors(root, paths.get('', '/')):
+        data = _read(os.path.join(d, 'cpu.max'))
+        if data:
+            fields = data.split()
+            if len(fields) == 2 and fields[0] != 'max':
+                limits.append(_quota(fields[0], fields[1]))
+    if not limits and os.path.exists(os.path.join(root, 'cgroup.controllers')):
+        return None
+    # cgroup v1
+    for sub in ('cpu', 'cpu,cpuacct', 'cpuacct,cpu'):
+        for d in _ancestors(os.path.join(root, sub), paths.get('cpu', '/')):
+            quota = _read(os.path.join(d, 'cpu.cfs_quota_us'))
+            period = _read(os.path.join(d, 'cpu.cfs_period_us'))
+            if quota and period:
+                limits.append(_quota(quota, period))
+    limits = [l for l in limits if l is not None]
+    return min(limits) if limits else None
+
+def _cpu_count():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        pass
+    try:
+        import multiprocessing
+        return multiprocessing.cpu_count()
+    except (ImportError, NotImplementedError):
+        return 1
+
+_available_cpus = None
+
+def AvailableCPUs():
+    """Return number of CPUs available to the process.
+
+    The result is the number of CPUs in process' affinity mask, limited by the
+    cgroup CPU quota (``cpu.max`` or ``cpu.cfs_quota_us``). It's computed once
+    and then cached.
+    """
+    global _available_cpus
+    if _available_cpus is None:
+        count = _cpu_count()
+        try:
+            quota = _cgroup_quota()
+        except ValueError:
+            quota = None
+        if quota is not None:
+            count = min(count, quota)
+        _available_cpus = max(1, count)
+    return _available_cpus
+
+def DefaultValues():
+    """Return default values of the arguments, computed from
+    `AvailableCPUs()`"""
+    cpus = AvailableCPUs()
+    return { 'JOBS' : cpus, 'LTO_JOBS' : cpus, 'LINK_THREADS' : cpus }
+
+def Count(value):
+    """Convert `value` to a positive integer (a converter for the arguments)"""
+    count = int(value)
+    if count < 1:
+        raise ValueError("expected a positive number, got %r" % value)
+    return count
+
+#############################################################################
+def Names(name_filter = lambda x : True, **kw):
+    """Return list of parallelism argument names.
+
+    :Parameters:
+        name_filter : callable
+            selects argument names, see `SConsCommonArguments.CC.Names()`
+    :Returns:
+        the list of parallelism argument names
+    """
+    return _registry.names(_registry.families(), name_filter)
+
+###############################################################################
+def Declarations(**kw):
+    """Return declarations of SCons *arguments* for all predefined parallelism
+    arguments.
+
+    The default values are taken from `DefaultValues()`, unless overridden by
+    the ``defaults`` keyword.
+
+    :Keywords:
+        same as for `SConsCommonArguments.CC.Declarations()`.
+
+    :Returns:
+        an instance of `SConsArguments._ArgumentDeclarations`
+    """
+    defaults = DefaultValues()
+    defaults.update(kw.get('defaults', {}))
+    kw = dict(kw, defaults = defaults)
+    return SConsCommonArguments.Util.family_declarations(__name__, _registry, kw,
+                                                         lambda f, kw2 : { 'converter' : Count })
+
+###############################################################################
+def _get(proxy, name):
+    value = SConsCommonArguments.Util.proxy_value(proxy, name)
+    if value is None:
+        return None
+    return Count(value)
+
+def _link_flags(tokens, lto_jobs, link_threads, family = 'gcc'):
+    """Return `tokens` updated with LTO jobs and linker threads; job counts
+    already given in `tokens` (e.g. ``-flto=8`` or ``-flto=jobserver``) are
+    kept. Only GCC accepts ``-flto=N``, Clang's ``-flto`` is left as is."""
+    result = []
+    thinlto = thinlto_jobs = threads = False
+    for t in tokens:
+        if lto_jobs is not None and family == 'gcc' and t in ('-flto', '-flto=auto'):
+            t = '-flto=%d' % lto_jobs
+        elif t == '-flto=thin':
+            thinlto = True
+        elif t.startswith('-Wl,--thinlto-jobs='):
+            thinlto_jobs = True
+        elif t.startswith('-Wl,--threads') or t.startswith('-Wl,--thread-count='):
+            threads = True
+        result.append(t)
+    if lto_jobs is not None and thinlto and not thinlto_jobs:
+        result.append('-Wl,--thinlto-jobs=%d' % lto_jobs)
+    if link_threads is not None and not threads:
+        linker = SConsCommonArguments.Flags.LinkerName(result)
+        if linker == 'lld':
+            result.append('-Wl,--threads=%d' % link_threads)
+        elif linker == 'gold':
+            result.extend(['-Wl,--threads', '-Wl,--thread-count=%d' % link_threads])
+        elif linker == 'mold':
+            result.append('-Wl,--thread-count=%d' % link_threads)
+    return result
+
+def Apply(args, env, cc_args = None, set_option = True, family = None):
+    """Wire parallelism arguments into SCons and into CC link flags.
+
+    Should be called after ``args.Postprocess()``. ``JOBS`` is passed to
+    ``SetOption('num_jobs', ...)`` (an explicit ``scons -j N`` still wins).
+    ``LTO_JOBS`` turns ``-flto`` or ``-flto=auto`` into ``-flto=N`` (GCC only,
+    Clang rejects it and parallelizes only ThinLTO) or adds
+    ``-Wl,--thinlto-jobs=N`` for ``-flto=thin`` (Clang) in ``LINKFLAGS``
+    and ``SHLINKFLAGS``; nothing is added if LTO is not enabled. ``LINK_THREADS``
+    adds linker-specific thread options if the linker is selected with
+    ``-fuse-ld=`` (gold, lld or mold). Job and thread counts already present
+    in the flags (e.g. ``-flto=jobserver``) are left as they are.
+
+    :Parameters:
+        args
+            committed parallelism arguments, as returned by ``decls.Commit()``,
+        env : SCons.Environment.Environment
+            the environment to be updated,
+        cc_args
+            arguments owning the ``LINKFLAGS`` and ``SHLINKFLAGS`` scanned for
+            LTO and ``-fuse-ld=`` and receiving the job/thread counts
+            (default: `args`); their ``CC`` (or ``CXX``) is read to guess
+            `family`,
+        set_option : boolean
+            whether to call ``SetOption('num_jobs', ...)``,
+        family : str
+            compiler family; guessed from ``CC`` (or ``CXX``) by default.
+    """
+    if cc_args is None:
+        cc_args = args
+    proxy = args.EnvProxy(env)
+    cc_proxy = cc_args.EnvProxy(env)
+    jobs = _get(proxy, 'JOBS')
+    if set_option and jobs is not None:
+        import SCons.Script
+        SCons.Script.SetOption('num_jobs', jobs)
+    lto_jobs = _get(proxy, 'LTO_JOBS')
+    link_threads = _get(proxy, 'LINK_THREADS')
+    if family is None:
+        cc = SConsCommonArguments.Util.proxy_value
+        family = SConsCommonArguments.Probe.GuessFamily(cc(cc_proxy, 'CC') or cc(cc_proxy, 'CXX') or '')
+    for name in _link_flag_names:
+        try:
+            value = cc_proxy[name]
+        except KeyError:
+            continue
+        tokens = SConsCommonArguments.Flags.FlagList(value)
+        flags = _link_flags(tokens, lto_jobs, link_threads, family)
+        if flags != list(tokens):
+            cc_proxy[name] = SConsCommonArguments.Flags.FlagList(flags)
+
+# Local Variables:
+# # tab-width:4
+# # indent-tabs-mode:nil
+# # End:
+# vim: set syntax=python expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,234 @@
+"""`SConsCommonArguments.Launcher`
+
+Defines arguments related to compiler launchers (ccache, sccache, distcc).
+
+**General Description**
+
+A *launcher* is a program which wraps a compiler or linker invocation, for
+example ``ccache gcc -c foo.c``. This module provides arguments to select
+launchers and to configure their caches, and the `Inject()` function which
+prepends the selected launchers to the program arguments of
+`SConsCommonArguments.CC`.
+
+**Quick start**
+
+.. python::
+    # SConstruct
+    import SConsArguments
+    import SConsCommonArguments.CC
+    import SConsCommonArguments.Launcher
+
+    env = Environment()
+    var = Variables()
+    decls = SConsArguments.ArgumentDeclarations()
+    decls.update(SConsCommonArguments.CC.Declarations())
+    decls.update(SConsCommonArguments.Launcher.Declarations())
+    args = decls.Commit(env, var, True)
+    args.Postprocess(env, var, True)
+    SConsCommonArguments.Launcher.Inject(args, env)
+
+    print env.subst("CC: ${CC}")
+
+Running examples::
+
+    ptomulik@barakus:$ scons -Q CC=gcc CC_LAUNCHER=ccache
+    CC: ccache gcc
+
+**Supported Variables**
+
+Launchers:
+
+    CC_LAUNCHER
+        A launcher for C compilers (CC, SHCC)
+    CXX_LAUNCHER
+        A launcher for C++ compilers (CXX, SHCXX)
+    LINK_LAUNCHER
+        A launcher for linkers (LINK, SHLINK)
+
+Cache settings:
+
+    LAUNCHER_CACHE_DIR
+        Cache directory used by the launcher
+    LAUNCHER_CACHE_SIZE
+        Maximum size of the launcher's cache (e.g. 5G)
+"""
+
+#
+# Copyright (c) 2016 by Pawel Tomulik
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+
+__docformat__ = "restructuredText"
+
+import os
+import SCons.Util
+import SConsCommonArguments.Util
+import SConsCommonArguments.Flags
+
+#############################################################################
+_launcher_arg_tuples = [
+    ( 'CC_LAUNCHER',    'A launcher for C compilers (e.g. ccache, distcc)'),
+    ( 'CXX_LAUNCHER',   'A launcher for C++ compilers (e.g. ccache, distcc)'),
+    ( 'LINK_LAUNCHER',  'A launcher for linkers'),
+]
+
+_cache_arg_tuples = [
+    ( 'LAUNCHER_CACHE_DIR',     'Cache directory used by the launcher'),
+    ( 'LAUNCHER_CACHE_SIZE',    'Maximum size of the launcher\'s cache (e.g. 5G)'),
+]
+
+_registry = SConsCommonArguments.Util.ArgumentRegistry([
+    ('launchers',   _launcher_arg_tuples),
+    ('cache',       _cache_arg_tuples),
+])
+
+# launcher argument -> CC program arguments it applies to
+_launched_programs = [
+    ( 'CC_LAUNCHER',    ['CC', 'SHCC'] ),
+    ( 'CXX_LAUNCHER',   ['CXX', 'SHCXX'] ),
+    ( 'LINK_LAUNCHER',  ['LINK', 'SHLINK'] ),
+]
+
+# known launchers -> ENV variables for (cache dir, cache size)
+_known_launchers = {
+    'ccache'    : ('CCACHE_DIR', 'CCACHE_MAXSIZE'),
+    'sccache'   : ('SCCACHE_DIR', 'SCCACHE_CACHE_SIZE'),
+    'distcc'    : ('DISTCC_DIR', None),
+    'icecc'     : (None, None),
+    'buildcache': ('BUILDCACHE_DIR', 'BUILDCACHE_MAX_CACHE_SIZE'),
+}
+
+#############################################################################
+def Names(name_filter = lambda x : True, **kw):
+    """Return list of launcher argument names.
+
+    :Parameters:
+        name_filter : callable
+            selects argument names, see `SConsCommonArguments.CC.Names()`
+    :Keywords:
+        include_launchers
+            Whether to include launcher variables (CC_LAUNCHER, ...)
+        include_cache
+            Whether to include cache variables (LAUNCHER_CACHE_DIR, ...)
+    :Returns:
+        the list of launcher argument names
+    """
+    return _registry.names(_registry.selected(kw), name_filter)
+
+###############################################################################
+def Declarations(**kw):
+    """Return declarations of SCons *arguments* for all predefined launcher
+    arguments.
+
+    :Keywords:
+        include_launchers
+            Whether to include launcher variables (CC_LAUNCHER, ...)
+        include_cache
+            Whether to include cache variables (LAUNCHER_CACHE_DIR, ...)
+        other keywords
+            same as for `SConsCommonArguments.CC.Declarations()`.
+
+    :Returns:
+        an instance of `SConsArguments._ArgumentDeclarations`
+    """
+    return SConsCommonArguments.Util.family_declarations(__name__, _registry, kw)
+
+###############################################################################
+_get = SConsCommonArguments.Util.proxy_value
+
+def _tokens(value):
+    return SConsCommonArguments.Flags.FlagList(value)
+
+def _program_name(token):
+    name = os.path.basename(token)
+    if name.lower().endswith('.exe'):
+        name = name[:-4]
+    return name
+
+def _is_launched(value, launcher):
+    """Check whether program `value` already starts with a launcher"""
+    tokens = _tokens(value)
+    if not tokens:
+        return False
+    first = tokens[0]
+    if _program_name(first) in _known_launchers:
+        return True
+    return first == _tokens(launcher)[0]
+
+###############################################################################
+def Inject(args, env, cc_args = None):
+    """Prepend launchers to the program arguments of the CC family.
+
+    Should be called after ``args.Postprocess()``. Programs which already
+    start with a launcher (the selected one or any known launcher, e.g.
+    ``ccache``) are left untouched, so calling `Inject()` twice is harmless.
+    Endpoint names (prefixes/suffixes from `SConsArguments._ArgumentNameConv`)
+    are respected, as all the values are accessed via ``args.EnvProxy()``.
+    The cache settings are exported to ``env['ENV']`` using variable names
+    appropriate for the launcher (e.g. ``CCACHE_DIR`` for ``ccache``).
+
+    :Parameters:
+        args
+            committed launcher arguments, as returned by ``decls.Commit()``,
+        env : SCons.Environment.Environment
+            the environment to be updated,
+        cc_args
+            arguments owning the programs (``CC``, ``CXX``, ``LINK``, ...)
+            to be prefixed with the launchers (default: `args`).
+    :Returns:
+        the list of names of updated program arguments
+    """
+    if cc_args is None:
+        cc_args = args
+    proxy = args.EnvProxy(env)
+    cc_proxy = cc_args.EnvProxy(env)
+    updated = []
+    launchers = []
+    for launcher_name, programs in _launched_programs:
+        launcher = _get(proxy, launcher_name)
+        if not _tokens(launcher):
+            continue
+        launchers.append(launcher)
+        for name in programs:
+            value = _get(cc_proxy, name)
+            if not value or _is_launched(value, launcher):
+                continue
+            if SCons.Util.is_String(value):
+                cc_proxy[name] = '%s %s' % (launcher, value)
+            else:
+                cc_proxy[name] = _tokens(launcher) + list(value)
+            updated.append(name)
+    _export_cache_settings(proxy, env, launchers)
+    return updated
+
+def _export_cache_settings(proxy, env, launchers):
+    settings = (_get(proxy, 'LAUNCHER_CACHE_DIR'), _get(proxy, 'LAUNCHER_CACHE_SIZE'))
+    if settings == (None, None):
+        return
+    for launcher in launchers:
+        keys = _known_launchers.get(_program_name(_tokens(launcher)[0]), (None, None))
+        for key, value in zip(keys, settings):
+            if key is not None and value is not None:
+                env['ENV'][key] = str(value)
+
+# Local Variables:
+# # tab-width:4
+# # indent-tabs-mode:nil
+# # End:
+# vim: set syntax=python expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,261 @@
+"""`SConsCommonArguments.Linker`
+
+Defines arguments for linker selection.
+
+**General Description**
+
+The ``LINKER`` argument selects the linker used by the compiler driver
+(``-fuse-ld=``). With ``LINKER=auto`` the fastest linker available on the
+host is chosen (``mold``, then ``lld``, then ``gold``). Availability is
+detected by asking the compiler driver to run each linker (``-fuse-ld=X
+-Wl,--version``) and the result is cached on disk per host, compiler and
+``PATH`` (see `AvailableLinkers()`), so only the first run pays for it.
+
+**Quick start**
+
+.. python::
+    # SConstruct
+    import SConsArguments
+    import SConsCommonArguments.CC
+    import SConsCommonArguments.Linker
+
+    env = Environment()
+    var = Variables()
+    decls = SConsArguments.ArgumentDeclarations()
+    decls.update(SConsCommonArguments.CC.Declarations())
+    decls.update(SConsCommonArguments.Linker.Declarations())
+    args = decls.Commit(env, var, True)
+    args.Postprocess(env, var, True)
+    SConsCommonArguments.Linker.Apply(args, env)
+
+Running examples::
+
+    ptomulik@barakus:$ scons -Q LINKER=lld
+
+**Supported Variables**
+
+    LINKER
+        Linker to use: ``auto``, ``bfd``, ``gold``, ``lld`` or ``mold``
+"""
+
+#
+# Copyright (c) 2016 by Pawel Tomulik
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+
+__docformat__ = "restructuredText"
+
+import hashlib
+import json
+import os
+import socket
+import SCons.Util
+import SConsCommonArguments.Util
+import SConsCommonArguments.Flags
+import SConsCommonArguments.Probe
+
+#############################################################################
+_linker_arg_tuples = [
+    ( 'LINKER', 'Linker to use (auto, bfd, gold, lld, mold)', 'auto'),
+]
+
+_registry = SConsCommonArguments.Util.ArgumentRegistry([
+    ('linker', _linker_arg_tuples),
+])
+
+# known linkers, the fastest first
+_linkers = ('mold', 'lld', 'gold', 'bfd')
+
+# linker -> executables looked up when there is no compiler driver to ask
+_executables = {
+    'mold'  : ('ld.mold', 'mold'),
+    'lld'   : ('ld.lld', 'lld'),
+    'gold'  : ('ld.gold', 'gold'),
+    'bfd'   : ('ld.bfd',),
+}
+
+_converters = {
+    'LINKER' : SConsCommonArguments.Util.choice_converter('LINKER', ('auto',) + _linkers),
+}
+
+_flag_names = ['LINKFLAGS', 'SHLINKFLAGS']
+
+# bump whenever detection changes, to invalidate cached results
+_detect_version = 1
+
+# in-memory cache of AvailableLinkers() results
+_available = dict()
+
+#############################################################################
+def Names(name_filter = lambda x : True, **kw):
+    """Return list of linker argument names.
+
+    :Parameters:
+        name_filter : callable
+            selects argument names, see `SConsCommonArguments.CC.Names()`
+    :Returns:
+        the list of linker argument names
+    """
+    return _registry.names(_registry.families(), name_filter)
+
+###############################################################################
+def Declarations(**kw):
+    """Return declarations of SCons *arguments* for all predefined linker
+    arguments.
+
+    :Keywords:
+        same as for `SConsCommonArguments.CC.Declarations()`.
+
+    :Returns:
+        an instance of `SConsArguments._ArgumentDeclarations`
+    """
+    return SConsCommonArguments.Util.family_declarations(__name__, _registry, kw,
+                                                         lambda f, kw2 : { 'converters' : _converters })
+
+###############################################################################
+def _detect(cmd, path):
+    available = []
+    for linker in _linkers:
+        if cmd:
+            status, out = SConsCommonArguments.Probe._run(cmd + ['-fuse-ld=%s' % linker, '-Wl,--version'])
+            if status == 0:
+                available.append(linker)
+        else:
+            for exe in _executables[linker]:
+                if SConsCommonArguments.Probe.Which(exe, path):
+                    available.append(linker)
+                    break
+    return available
+
+def _cache_file(cache_dir, cmd, path):
+    key = [_detect_version, socket.gethostname(), path, cmd[1:]]
+    if cmd:
+        st = os.stat(cmd[0])
+        key.extend([cmd[0], st.st_mtime, st.st_size])
+    key = json.dumps(key)
+    return os.path.join(cache_dir, 'linkers.%s.json' % hashlib.sha1(key.encode('utf-8')).hexdigest())
+
+def AvailableLinkers(command = None, path = None, cache_dir = None):
+    """Return linkers available on this host, the fastest first.
+
+    The results are cached in memory and on disk, keyed by host name,
+    compiler driver (path, modification time and size) and `path`.
+
+    :Parameters:
+        command : str | list
+            compiler driver used for linking (e.g. ``'g++'``); if not given,
+            linker executables (``ld.gold``, ...) are searched for in `path`,
+        path : str
+            search path (default: ``os.environ['PATH']``),
+        cache_dir : str
+            cache directory (default:
+            `SConsCommonArguments.Probe.default_cache_dir()`); pass ``False``
+            to disable the disk cache.
+    :Returns:
+        a list of linker names, e.g. ``['lld', 'gold', 'bfd']``
+    """
+    if isinstance(command, (list, tuple)):
+        cmd = list(command)
+    else:
+        cmd = (command or '').split()
+    if cmd:
+        resolved = SConsCommonArguments.Probe.Which(cmd[0], path)
+        if resolved is None:
+            return []
+        cmd[0] = os.path.realpath(resolved)
+    if path is None:
+        path = os.environ.get('PATH', '')
+    memo_key = (tuple(cmd), path)
+    try:
+        return list(_available[memo_key])
+    except KeyError:
+        pass
+    if cache_dir is None:
+        cache_dir = SConsCommonArguments.Probe.default_cache_dir()
+    filename = _cache_file(cache_dir, cmd, path) if cache_dir else None
+    available = SConsCommonArguments.Probe._load(filename) if filename else None
+    if not isinstance(available, list):
+        available = _detect(cmd, path)
+        if filename:
+            SConsCommonArguments.Probe._save(filename, available)
+    _available[memo_key] = tuple(available)
+    return list(available)
+
+def Select(linker, available):
+    """Resolve `linker` choice against `available` linkers.
+
+    :Returns:
+        the linker name, or ``None`` if the default linker should be used
+        (``auto`` with no linker faster than ``bfd`` available)
+    """
+    if linker != 'auto':
+        return linker
+    for name in _linkers:
+        if name in available and name != 'bfd':
+            return name
+    return None
+
+###############################################################################
+_get = SConsCommonArguments.Util.proxy_value
+
+def Apply(args, env, cc_args = None, cache_dir = None):
+    """Merge ``-fuse-ld=`` for the selected linker into ``LINKFLAGS`` and
+    ``SHLINKFLAGS``.
+
+    Should be called after ``args.Postprocess()``. An explicitly selected
+    linker is used as is; ``LINKER=auto`` picks the fastest linker found by
+    `AvailableLinkers()` for the ``LINK`` program.
+
+    :Parameters:
+        args
+            committed linker arguments, as returned by ``decls.Commit()``,
+        env : SCons.Environment.Environment
+            the environment to be updated,
+        cc_args
+            arguments owning the ``LINK`` program (``CXX`` or ``CC`` if it's
+            not set) probed for supported linkers, and the ``LINKFLAGS`` and
+            ``SHLINKFLAGS`` receiving ``-fuse-ld=`` (default: `args`),
+        cache_dir : str
+            passed to `AvailableLinkers()`.
+    :Returns:
+        the name of selected linker or ``None``
+    """
+    if cc_args is None:
+        cc_args = args
+    proxy = args.EnvProxy(env)
+    cc_proxy = cc_args.EnvProxy(env)
+    linker = _converters['LINKER'](_get(proxy, 'LINKER', 'auto'))
+    if linker == 'auto':
+        try:
+            path = env['ENV']['PATH']
+        except KeyError:
+            path = None
+        command = _get(cc_proxy, 'LINK') or _get(cc_proxy, 'CXX') or _get(cc_proxy, 'CC')
+        if SCons.Util.is_String(command) and '$' in command and hasattr(env, 'subst'):
+            command = env.subst(command)
+        linker = Select(linker, AvailableLinkers(command, path, cache_dir))
+    if linker is not None:
+        SConsCommonArguments.Flags.MergeInto(cc_args, env, _flag_names, ['-fuse-ld=%s' % linker])
+    return linker
+
+# Local Variables:
+# # tab-width:4
+# # indent-tabs-mode:nil
+# # End:
+# vim: set syntax=python expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,218 @@
+"""`SConsCommonArguments.Optimize`
+
+Defines optimization preset arguments.
+
+**General Description**
+
+Instead of hand-written ``CCFLAGS="-O3 -march=native ..."`` strings, the
+``OPT_PROFILE`` argument selects one of predefined presets, and
+``TARGET_ARCH`` selects the target architecture. The presets are kept in flag
+tables per compiler family (GCC, Clang), so all developers get the same,
+cache-friendly command lines. The `Apply()` function merges the resolved
+flags into the flag arguments of `SConsCommonArguments.CC`.
+
+**Quick start**
+
+.. python::
+    # SConstruct
+    import SConsArguments
+    import SConsCommonArguments.CC
+    import SConsCommonArguments.Optimize
+
+    env = Environment()
+    var = Variables()
+    decls = SConsArguments.ArgumentDeclarations()
+    decls.update(SConsCommonArguments.CC.Declarations())
+    decls.update(SConsCommonArguments.Optimize.Declarations())
+    args = decls.Commit(env, var, True)
+    args.Postprocess(env, var, True)
+    SConsCommonArguments.Optimize.Apply(args, env)
+
+Running examples::
+
+    ptomulik@barakus:$ scons -Q OPT_PROFILE=fast TARGET_ARCH=x86-64-v3
+
+**Supported Variables**
+
+    OPT_PROFILE
+        Optimization preset: ``debug``, ``release``, ``fast`` or ``size``
+    TARGET_ARCH
+        Target architecture passed to ``-march=`` (e.g. ``native``,
+        ``x86-64-v3``, ``armv8-a``)
+"""
+
+#
+# Copyright (c) 2016 by Pawel Tomulik
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+
+__docformat__ = "restructuredText"
+
+import SConsCommonArguments.Util
+import SConsCommonArguments.Flags
+import SConsCommonArguments.Probe
+
+#############################################################################
+_opt_arg_tuples = [
+    ( 'OPT_PROFILE',    'Optimization preset (debug, release, fast, size)'),
+    ( 'TARGET_ARCH',    'Target architecture (-march=)'),
+]
+
+_registry = SConsCommonArguments.Util.ArgumentRegistry([
+    ('optimize', _opt_arg_tuples),
+])
+
+_profiles = ('debug', 'release', 'fast', 'size')
+
+_converters = {
+    'OPT_PROFILE' : SConsCommonArguments.Util.choice_converter('OPT_PROFILE', _profiles),
+}
+
+# family -> profile -> (compile flags, link flags), the 'gcc' table is used
+# for families not listed explicitly
+_flag_tables = {
+    'gcc' : {
+        'debug'     : (['-Og', '-g'], []),
+        'release'   : (['-O2', '-DNDEBUG'], ['-Wl,-O1']),
+        'fast'      : (['-O3', '-DNDEBUG'], ['-Wl,-O1']),
+        'size'      : (['-Os', '-DNDEBUG', '-ffunction-sections', '-fdata-sections'], ['-Wl,--gc-sections']),
+    },
+    'clang' : {
+        'debug'     : (['-O0', '-g'], []),
+        'release'   : (['-O2', '-DNDEBUG'], ['-Wl,-O1']),
+        'fast'      : (['-O3', '-DNDEBUG'], ['-Wl,-O1']),
+        'size'      : (['-Oz', '-DNDEBUG', '-ffunction-sections', '-fdata-sections'], ['-Wl,--gc-sections']),
+    },
+}
+
+_compile_flag_names = ['CCFLAGS', 'SHCCFLAGS']
+_link_flag_names = ['LINKFLAGS', 'SHLINKFLAGS']
+
+# (profile, arch, family) -> (compile flags, link flags), both tuples
+_resolved = dict()
+
+#############################################################################
+def Names(name_filter = lambda x : True, **kw):
+    """Return list of optimization argument names.
+
+    :Parameters:
+        name_filter : callable
+            selects argument names, see `SConsCommonArguments.CC.Names()`
+    :Returns:
+        the list of optimization argument names
+    """
+    return _registry.names(_registry.families(), name_filter)
+
+###############################################################################
+def Declarations(**kw):
+    """Return declarations of SCons *arguments* for all predefined
+    optimization arguments.
+
+    :Keywords:
+        same as for `SConsCommonArguments.CC.Declarations()`.
+
+    :Returns:
+        an instance of `SConsArguments._ArgumentDeclarations`
+    """
+    return SConsCommonArguments.Util.family_declarations(__name__, _registry, kw,
+                                                         lambda f, kw2 : { 'converters' : _converters })
+
+###############################################################################
+def Profiles():
+    """Return names of available optimization presets"""
+    return list(_profiles)
+
+def Flags(profile = None, arch = None, family = 'gcc'):
+    """Return compile and link flags for optimization preset.
+
+    The results are computed once per ``(profile, arch, family)``.
+
+    :Parameters:
+        profile : str
+            one of `Profiles()`, or ``None``,
+        arch : str
+            target architecture for ``-march=``, or ``None``,
+        family : str
+            compiler family, ``'gcc'`` or ``'clang'``.
+    :Returns:
+        a tuple ``(compile_flags, link_flags)`` of flag tuples
+    """
+    key = (profile, arch, family)
+    try:
+        return _resolved[key]
+    except KeyError:
+        pass
+    compile_flags, link_flags = [], []
+    if profile is not None:
+        table = _flag_tables.get(family, _flag_tables['gcc'])
+        cflags, lflags = table[_converters['OPT_PROFILE'](profile)]
+        compile_flags.extend(cflags)
+        link_flags.extend(lflags)
+    if arch:
+        # -march= matters at link time too, when LTO is used
+        compile_flags.append('-march=%s' % arch)
+        link_flags.append('-march=%s' % arch)
+    # tuples, as the results are shared by all callers
+    _resolved[key] = (tuple(compile_flags), tuple(link_flags))
+    return _resolved[key]
+
+###############################################################################
+_get = SConsCommonArguments.Util.proxy_value
+
+def Apply(args, env, cc_args = None, family = None):
+    """Merge optimization preset flags into CC flag arguments.
+
+    Should be called after ``args.Postprocess()``. Compile flags are merged
+    into ``CCFLAGS`` and ``SHCCFLAGS``, link flags into ``LINKFLAGS`` and
+    ``SHLINKFLAGS``; conflicting flags already present (e.g. ``-O2`` vs
+    ``-O3``) are replaced (see `SConsCommonArguments.Flags.Merge()`).
+
+    :Parameters:
+        args
+            committed optimization arguments, as returned by
+            ``decls.Commit()``,
+        env : SCons.Environment.Environment
+            the environment to be updated,
+        cc_args
+            arguments owning ``CC``/``CXX`` (read to guess `family`) and the
+            compile and link flags in which ``-O``/``-march`` flags are
+            replaced by the preset (default: `args`),
+        family : str
+            compiler family; guessed from ``CC`` (or ``CXX``) by default.
+    :Returns:
+        a tuple ``(compile_flags, link_flags)`` of the merged flags
+    """
+    if cc_args is None:
+        cc_args = args
+    proxy = args.EnvProxy(env)
+    cc_proxy = cc_args.EnvProxy(env)
+    if family is None:
+        family = SConsCommonArguments.Probe.GuessFamily(_get(cc_proxy, 'CC') or _get(cc_proxy, 'CXX') or '')
+    compile_flags, link_flags = Flags(_get(proxy, 'OPT_PROFILE'), _get(proxy, 'TARGET_ARCH'), family)
+    if compile_flags:
+        SConsCommonArguments.Flags.MergeInto(cc_args, env, _compile_flag_names, compile_flags)
+    if link_flags:
+        SConsCommonArguments.Flags.MergeInto(cc_args, env, _link_flag_names, link_flags)
+    return compile_flags, link_flags
+
+# Local Variables:
+# # tab-width:4
+# # indent-tabs-mode:nil
+# # End:
+# vim: set syntax=python expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,252 @@
+"""`SConsCommonArguments.PCH`
+
+Defines arguments for precompiled C++ headers.
+
+**General Description**
+
+The arguments enable a precompiled header for the whole build and select where
+it's placed. The `Apply()` function computes the flags for the compiler family
+(GCC or Clang) from per-compiler templates and merges them into the
+``CXXFLAGS`` and ``SHCXXFLAGS`` arguments of `SConsCommonArguments.CC`. Static
+and shared objects use separate precompiled headers, as they're compiled with
+different flags (e.g. ``-fPIC``).
+
+**Quick start**
+
+.. python::
+    # SConstruct
+    import SConsArguments
+    import SConsCommonArguments.CC
+    import SConsCommonArguments.PCH
+
+    env = Environment()
+    var = Variables()
+    decls = SConsArguments.ArgumentDeclarations()
+    decls.update(SConsCommonArguments.CC.Declarations())
+    decls.update(SConsCommonArguments.PCH.Declarations())
+    args = decls.Commit(env, var, True)
+    args.Postprocess(env, var, True)
+    pchenv = env.Clone() # without flags using the precompiled header
+    pch = SConsCommonArguments.PCH.Apply(args, env)
+    if pch:
+        # build the precompiled headers before the objects which use them
+        pchenv.Command(pch['static'], pch['header'],
+                       '$CXX $CXXFLAGS $CCFLAGS $_CCCOMCOM %s' % ' '.join(pch['build_static']))
+        pchenv.Command(pch['shared'], pch['header'],
+                       '$SHCXX $SHCXXFLAGS $SHCCFLAGS $_CCCOMCOM %s' % ' '.join(pch['build_shared']))
+
+Running examples::
+
+    ptomulik@barakus:$ scons -Q PCH=yes PCH_HEADER=src/all.h PCH_DIR=build/pch
+
+**Supported Variables**
+
+    PCH
+        Whether to use precompiled header (``yes`` or ``no``)
+    PCH_HEADER
+        Header to be precompiled
+    PCH_DIR
+        Directory for precompiled headers (default: ``build/pch``)
+    PCH_GCC_FLAGS
+        Template of GCC flags using precompiled header
+    PCH_CLANG_FLAGS
+        Template of Clang flags using precompiled header
+
+The templates may refer to ``${PCH_BASE}`` (the name passed to ``-include``)
+and ``${PCH_FILE}`` (the precompiled header file).
+"""
+
+#
+# Copyright (c) 2016 by Pawel Tomulik
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+
+__docformat__ = "restructuredText"
+
+import os
+import string
+import SConsCommonArguments.Util
+import SConsCommonArguments.Flags
+import SConsCommonArguments.Probe
+
+#############################################################################
+_pch_arg_tuples = [
+    ( 'PCH',            'Whether to use precompiled header (yes, no)', 'no'),
+    ( 'PCH_HEADER',     'Header to be precompiled'),
+    ( 'PCH_DIR',        'Directory for precompiled headers', 'build/pch'),
+]
+
+_template_arg_tuples = [
+    ( 'PCH_GCC_FLAGS',  'Template of GCC flags using precompiled header',
+                        '-include ${PCH_BASE} -Winvalid-pch'),
+    ( 'PCH_CLANG_FLAGS','Template of Clang flags using precompiled header',
+                        '-include-pch ${PCH_FILE}'),
+]
+
+_registry = SConsCommonArguments.Util.ArgumentRegistry([
+    ('pch',         _pch_arg_tuples),
+    ('templates',   _template_arg_tuples),
+])
+
+_converters = {
+    'PCH' : SConsCommonArguments.Util.choice_converter('PCH', ('yes', 'no')),
+}
+
+# compiler family -> (template argument, precompiled header suffix)
+_compilers = {
+    'gcc'   : ('PCH_GCC_FLAGS', '.gch'),
+    'clang' : ('PCH_CLANG_FLAGS', '.pch'),
+}
+
+# precompiled headers are build products, keep them out of the source tree
+_default_pch_dir = os.path.join('build', 'pch')
+
+_flag_names = {
+    'static' : ['CXXFLAGS'],
+    'shared' : ['SHCXXFLAGS'],
+}
+
+#############################################################################
+def Names(name_filter = lambda x : True, **kw):
+    """Return list of precompiled header argument names.
+
+    :Parameters:
+        name_filter : callable
+            selects argument names, see `SConsCommonArguments.CC.Names()`
+    :Keywords:
+        include_pch
+            Whether to include PCH, PCH_HEADER and PCH_DIR
+        include_templates
+            Whether to include flag templates (PCH_GCC_FLAGS, ...)
+    :Returns:
+        the list of precompiled header argument names
+    """
+    return _registry.names(_registry.selected(kw), name_filter)
+
+###############################################################################
+def Declarations(**kw):
+    """Return declarations of SCons *arguments* for all predefined
+    precompiled header arguments.
+
+    :Keywords:
+        include_pch
+            Whether to include PCH, PCH_HEADER and PCH_DIR
+        include_templates
+            Whether to include flag templates (PCH_GCC_FLAGS, ...)
+        other keywords
+            same as for `SConsCommonArguments.CC.Declarations()`.
+
+    :Returns:
+        an instance of `SConsArguments._ArgumentDeclarations`
+    """
+    return SConsCommonArguments.Util.family_declarations(__name__, _registry, kw,
+                                                         lambda f, kw2 : { 'converters' : _converters })
+
+###############################################################################
+def Flags(header, pch_dir = None, family = 'gcc', template = None):
+    """Return flags for precompiled `header`.
+
+    :Parameters:
+        header : str
+            header to be precompiled,
+        pch_dir : str
+            directory for precompiled headers (default: ``build/pch``),
+        family : str
+            compiler family, ``'gcc'`` or ``'clang'``,
+        template : str
+            flag template (default: the default value of ``PCH_GCC_FLAGS``
+            or ``PCH_CLANG_FLAGS``).
+    :Returns:
+        a dictionary with entries ``header``, ``static`` and ``shared`` (paths
+        of precompiled headers), ``use_static`` and ``use_shared`` (flags
+        using them), ``build_static`` and ``build_shared`` (flags creating
+        them); ``None`` for unsupported compiler families
+    """
+    try:
+        key, suffix = _compilers[family]
+    except KeyError:
+        return None
+    if template is None:
+        template = dict([t[0::2] for t in _template_arg_tuples])[key]
+    if not pch_dir:
+        pch_dir = _default_pch_dir
+    name = os.path.basename(header)
+    result = { 'header' : header }
+    for kind, subdir in (('static', ''), ('shared', 'shared')):
+        base = os.path.join(pch_dir, subdir, name)
+        pch = base + suffix
+        flags = string.Template(template).safe_substitute(PCH_BASE = base, PCH_FILE = pch)
+        result[kind] = pch
+        result['use_%s' % kind] = list(SConsCommonArguments.Flags.Tokenize(flags))
+        result['build_%s' % kind] = ['-x', 'c++-header', '-o', pch, header]
+    return result
+
+###############################################################################
+_get = SConsCommonArguments.Util.proxy_value
+
+def Apply(args, env, cc_args = None, family = None):
+    """Merge precompiled header flags into ``CXXFLAGS`` and ``SHCXXFLAGS``.
+
+    Should be called after ``args.Postprocess()``. Nothing is done unless
+    ``PCH=yes`` and ``PCH_HEADER`` is set.
+
+    :Parameters:
+        args
+            committed precompiled header arguments, as returned by
+            ``decls.Commit()``,
+        env : SCons.Environment.Environment
+            the environment to be updated,
+        cc_args
+            arguments owning ``CXX`` (read to guess `family`) and the
+            ``CXXFLAGS`` and ``SHCXXFLAGS`` flags the ``-include`` flags are
+            merged into (default: `args`),
+        family : str
+            compiler family; guessed from ``CXX`` by default (``'gcc'`` if it
+            can't be guessed, e.g. ``CXX`` is not set).
+    :Returns:
+        the dictionary returned by `Flags()` or ``None`` if precompiled
+        header is not used
+    """
+    if cc_args is None:
+        cc_args = args
+    proxy = args.EnvProxy(env)
+    cc_proxy = cc_args.EnvProxy(env)
+    if _converters['PCH'](_get(proxy, 'PCH', 'no')) != 'yes':
+        return None
+    header = _get(proxy, 'PCH_HEADER')
+    if header is None:
+        return None
+    if family is None:
+        family = SConsCommonArguments.Probe.GuessFamily(_get(cc_proxy, 'CXX', ''))
+        if family not in _compilers:
+            family = 'gcc'
+    try:
+        template = _get(proxy, _compilers[family][0])
+    except KeyError:
+        return None
+    pch = Flags(str(header), _get(proxy, 'PCH_DIR'), family, template)
+    for kind, names in _flag_names.items():
+        SConsCommonArguments.Flags.MergeInto(cc_args, env, names, pch['use_%s' % kind])
+    return pch
+
+# Local Variables:
+# # tab-width:4
+# # indent-tabs-mode:nil
+# # End:
+# vim: set syntax=python expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,199 @@
+"""`SConsCommonArguments.PGO`
+
+Defines arguments for profile-guided optimization (PGO) and link-time
+optimization (LTO) workflows.
+
+**General Description**
+
+The arguments select PGO phase and LTO mode. The `Apply()` function turns them
+into compile and link flags appropriate for the compiler family (GCC or Clang)
+and merges them into the flag arguments of `SConsCommonArguments.CC`.
+
+**Quick start**
+
+.. python::
+    # SConstruct
+    import SConsArguments
+    import SConsCommonArguments.CC
+    import SConsCommonArguments.PGO
+
+    env = Environment()
+    var = Variables()
+    decls = SConsArguments.ArgumentDeclarations()
+    decls.update(SConsCommonArguments.CC.Declarations())
+    decls.update(SConsCommonArguments.PGO.Declarations())
+    args = decls.Commit(env, var, True)
+    args.Postprocess(env, var, True)
+    SConsCommonArguments.PGO.Apply(args, env)
+
+The two-phase instrumented build::
+
+    ptomulik@barakus:$ scons -Q PGO_MODE=generate PGO_DIR=build/pgo LTO=full
+    ptomulik@barakus:$ ./run-training-workload
+    ptomulik@barakus:$ scons -Q PGO_MODE=use PGO_DIR=build/pgo LTO=full
+
+With Clang, the raw profiles must be merged with ``llvm-profdata merge -o
+build/pgo/default.profdata build/pgo/*.profraw`` before the second phase.
+
+**Supported Variables**
+
+    PGO_MODE
+        Profile-guided optimization phase: ``generate``, ``use`` or ``off``
+    PGO_DIR
+        Directory for profile data
+    LTO
+        Link-time optimization: ``off``, ``thin`` or ``full``
+"""
+
+#
+# Copyright (c) 2016 by Pawel Tomulik
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+
+__docformat__ = "restructuredText"
+
+import SConsCommonArguments.Util
+import SConsCommonArguments.Flags
+import SConsCommonArguments.Probe
+
+#############################################################################
+_pgo_arg_tuples = [
+    ( 'PGO_MODE',   'Profile-guided optimization phase (generate, use, off)', 'off'),
+    ( 'PGO_DIR',    'Directory for profile data'),
+    ( 'LTO',        'Link-time optimization (off, thin, full)', 'off'),
+]
+
+_registry = SConsCommonArguments.Util.ArgumentRegistry([
+    ('pgo', _pgo_arg_tuples),
+])
+
+_choices = {
+    'PGO_MODE'  : ('generate', 'use', 'off'),
+    'LTO'       : ('off', 'thin', 'full'),
+}
+
+_converters = dict([(k, SConsCommonArguments.Util.choice_converter(k, v)) for (k, v) in _choices.items()])
+
+_compile_flag_names = ['CCFLAGS', 'SHCCFLAGS']
+_link_flag_names = ['LINKFLAGS', 'SHLINKFLAGS']
+
+#############################################################################
+def Names(name_filter = lambda x : True, **kw):
+    """Return list of PGO/LTO argument names.
+
+    :Parameters:
+        name_filter : callable
+            selects argument names, see `SConsCommonArguments.CC.Names()`
+    :Returns:
+        the list of PGO/LTO argument names
+    """
+    return _registry.names(_registry.families(), name_filter)
+
+###############################################################################
+def Declarations(**kw):
+    """Return declarations of SCons *arguments* for all predefined PGO/LTO
+    arguments.
+
+    :Keywords:
+        same as for `SConsCommonArguments.CC.Declarations()`.
+
+    :Returns:
+        an instance of `SConsArguments._ArgumentDeclarations`
+    """
+    return SConsCommonArguments.Util.family_declarations(__name__, _registry, kw,
+                                                         lambda f, kw2 : { 'converters' : _converters })
+
+###############################################################################
+def Flags(pgo_mode = 'off', pgo_dir = None, lto = 'off', family = 'gcc'):
+    """Return compile and link flags for given PGO/LTO settings.
+
+    :Parameters:
+        pgo_mode : str
+            ``'generate'``, ``'use'`` or ``'off'``,
+        pgo_dir : str
+            directory for profile data (compiler's default if ``None``),
+        lto : str
+            ``'off'``, ``'thin'`` or ``'full'``; GCC has no ThinLTO, so
+            ``'thin'`` means ``-flto`` there,
+        family : str
+            compiler family, ``'gcc'`` or ``'clang'`` (see
+            `SConsCommonArguments.Probe.GuessFamily()`).
+    :Returns:
+        a tuple ``(compile_flags, link_flags)``
+    """
+    flags = []
+    if pgo_mode == 'generate':
+        flags.append('-fprofile-generate=%s' % pgo_dir if pgo_dir else '-fprofile-generate')
+    elif pgo_mode == 'use':
+        flags.append('-fprofile-use=%s' % pgo_dir if pgo_dir else '-fprofile-use')
+        if family == 'clang':
+            flags.append('-Wno-profile-instr-unprofiled')
+        else:
+            flags.append('-fprofile-correction')
+    if lto == 'thin' and family == 'clang':
+        flags.append('-flto=thin')
+    elif lto in ('thin', 'full'):
+        flags.append('-flto')
+    return flags, list(flags)
+
+###############################################################################
+_get = SConsCommonArguments.Util.proxy_value
+
+def Apply(args, env, cc_args = None, family = None):
+    """Merge PGO/LTO flags into CC flag arguments.
+
+    Should be called after ``args.Postprocess()``. Compile flags are merged
+    into ``CCFLAGS`` and ``SHCCFLAGS``, link flags into ``LINKFLAGS`` and
+    ``SHLINKFLAGS`` (see `SConsCommonArguments.Flags.MergeInto()`).
+
+    :Parameters:
+        args
+            committed PGO/LTO arguments, as returned by ``decls.Commit()``,
+        env : SCons.Environment.Environment
+            the environment to be updated,
+        cc_args
+            arguments owning ``CC``/``CXX`` (read to guess `family`) and the
+            ``CCFLAGS``, ``SHCCFLAGS``, ``LINKFLAGS`` and ``SHLINKFLAGS``
+            flags the PGO/LTO flags are merged into (default: `args`),
+        family : str
+            compiler family; guessed from ``CC`` (or ``CXX``) by default.
+    :Returns:
+        a tuple ``(compile_flags, link_flags)`` of the merged flags
+    """
+    if cc_args is None:
+        cc_args = args
+    proxy = args.EnvProxy(env)
+    cc_proxy = cc_args.EnvProxy(env)
+    pgo_mode = _converters['PGO_MODE'](_get(proxy, 'PGO_MODE', 'off'))
+    lto = _converters['LTO'](_get(proxy, 'LTO', 'off'))
+    pgo_dir = _get(proxy, 'PGO_DIR')
+    if family is None:
+        family = SConsCommonArguments.Probe.GuessFamily(_get(cc_proxy, 'CC') or _get(cc_proxy, 'CXX') or '')
+    compile_flags, link_flags = Flags(pgo_mode, pgo_dir, lto, family)
+    if compile_flags:
+        SConsCommonArguments.Flags.MergeInto(cc_args, env, _compile_flag_names, compile_flags)
+    if link_flags:
+        SConsCommonArguments.Flags.MergeInto(cc_args, env, _link_flag_names, link_flags)
+    return compile_flags, link_flags
+
+# Local Variables:
+# # tab-width:4
+# # indent-tabs-mode:nil
+# # End:
+# vim: set syntax=python expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,368 @@
+"""`SConsCommonArguments.Probe`
+
+Cached capability probing of compilers and linkers.
+
+**General Description**
+
+SConscripts often run the compiler several times to find out its version,
+supported ``-std=`` levels or LTO support. This module runs such probes for
+the programs resolved from CC arguments (``CC``, ``CXX``, ``LINK``), in
+parallel, and caches results on disk, keyed by the resolved binary path, its
+modification time and size, and the probe flags. Subsequent runs (and
+configure steps) get the results without spawning any process.
+
+**Quick start**
+
+.. python::
+    # SConstruct
+    import SConsCommonArguments.CC
+    import SConsCommonArguments.Probe
+
+    env = Environment(tools = [])
+    var = Variables()
+    decls = SConsCommonArguments.CC.Declarations()
+    args = decls.Commit(env, var, True)
+    args.Postprocess(env, var, True)
+
+    caps = SConsCommonArguments.Probe.ProbeArguments(args, env)
+    if 'c++14' in caps['CXX'].std:
+        env.Append(CXXFLAGS = ['-std=c++14'])
+
+The probes understand GCC-compatible drivers (``gcc``, ``clang``, ...).
+Programs which are not found or don't answer the probes yield capabilities
+with ``None`` version and empty feature lists.
+"""
+
+#
+# Copyright (c) 2016 by Pawel Tomulik
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+
+__docformat__ = "restructuredText"
+
+import hashlib
+import json
+import os
+import subprocess
+import tempfile
+import threading
+
+_std_levels = {
+    'c'   : ['c89', 'c99', 'c11', 'c17', 'c2x'],
+    'c++' : ['c++98', 'c++11', 'c++14', 'c++17', 'c++20', 'c++23'],
+}
+
+# argument name -> language of the probes
+_languages = {
+    'CC'    : 'c',
+    'SHCC'  : 'c',
+    'CXX'   : 'c++',
+    'SHCXX' : 'c++',
+    'LINK'  : None,
+    'SHLINK': None,
+}
+
+_probe_source = 'int main(void) { return 0; }\n'
+
+# compiler launchers skipped by GuessFamily()
+_launchers = frozenset(['ccache', 'sccache', 'distcc', 'icecc', 'buildcache'])
+
+# bump whenever probes change, to invalidate cached results
+_probe_version = 2
+
+#############################################################################
+class Capabilities(object):
+    """Capabilities of a single program.
+
+    :IVariables:
+        path : str
+            resolved path to the binary (``None`` if not found),
+        version : str
+            first line of ``--version`` output,
+        family : str
+            ``'gcc'``, ``'clang'`` or ``'unknown'``,
+        std : list
+            supported ``-std=`` levels,
+        lto : boolean
+            whether ``-flto`` is supported.
+    """
+    _fields = ('path', 'version', 'family', 'std', 'lto')
+
+    def __init__(self, path = None, version = None, family = 'unknown', std = None, lto = False):
+        self.path = path
+        self.version = version
+        self.family = family
+        self.std = std or []
+        self.lto = lto
+
+    def as_dict(self):
+        return dict([(k, getattr(self, k)) for k in self._fields])
+
+    def __repr__(self):
+        return 'Capabilities(%s)' % ', '.join(['%s=%r' % (k, getattr(self, k)) for k in self._fields])
+
+#############################################################################
+def Which(prog, path = None):
+    """Find executable `prog` in `path` (``os.environ['PATH']`` by default)"""
+    if os.path.dirname(prog):
+        return os.path.abspath(prog) if os.access(prog, os.X_OK) else None
+    if path is None:
+        path = os.environ.get('PATH', '')
+    exts = ['']
+    if os.name == 'nt':
+        exts += os.environ.get('PATHEXT', '.EXE').split(os.pathsep)
+    for d in path.split(os.pathsep):
+        for ext in exts:
+            f = os.path.join(d, prog + ext)
+            if os.path.isfile(f) and os.access(f, os.X_OK):
+                return f
+    return None
+
+def _is_launcher(prog):
+    name = os.path.basename(prog)
+    return name in _launchers or os.path.splitext(name)[0].lower() in _launchers
+
+def StripLaunchers(command):
+    """Return `command` (a list) without leading compiler launchers, e.g.
+    ``['gcc', '-m32']`` for ``['ccache', 'gcc', '-m32']``"""
+    i = 0
+    while i < len(command) and _is_launcher(command[i]):
+        i += 1
+    return list(command[i:])
+
+def ResolveCompiler(prog, path = None):
+    """Find real path of compiler `prog`, skipping launcher masquerade
+    directories (e.g. ``/usr/lib/ccache/gcc -> ../../bin/ccache``).
+
+    :Returns:
+        the path with symlinks resolved, or ``None`` if not found
+    """
+    if path is None:
+        path = os.environ.get('PATH', '')
+    dirs = path.split(os.pathsep)
+    while True:
+        resolved = Which(prog, os.pathsep.join(dirs))
+        if resolved is None:
+            return None
+        real = os.path.realpath(resolved)
+        if os.path.dirname(prog) or not _is_launcher(real) or _is_launcher(prog):
+            return real
+        masquerade = os.path.dirname(resolved)
+        dirs = [d for d in dirs if os.path.join(d, '') != os.path.join(masquerade, '')]
+
+def _run(cmd, stdin = ''):
+    try:
+        proc = subprocess.Popen(cmd, stdin = subprocess.PIPE, stdout = subprocess.PIPE,
+                                stderr = subprocess.STDOUT)
+        out = proc.communicate(stdin.encode('ascii'))[0]
+    except OSError:
+        return None, ''
+    return proc.returncode, out.decode('utf-8', 'replace')
+
+def _probe(cmd, language):
+    """Run all probes for program `cmd` (a list) and return Capabilities
+    dictionary"""
+    caps = Capabilities()
+    status, out = _run(cmd + ['--version'])
+    if status != 0:
+        return caps
+    lines = out.strip().splitlines()
+    caps.version = lines[0].strip() if lines else ''
+    if 'clang' in out:
+        caps.family = 'clang'
+    elif 'gcc' in out.lower() or 'Free Software Foundation' in out:
+        caps.family = 'gcc'
+    lang = language or 'c'
+    for std in _std_levels.get(language, []):
+        status, out = _run(cmd + ['-x', lang, '-std=%s' % std, '-fsyntax-only', '-'], _probe_source)
+        if status == 0:
+            caps.std.append(std)
+    tmpdir = tempfile.mkdtemp()
+    try:
+        out_file = os.path.join(tmpdir, 'a.out')
+        if language is None:
+            probe = ['-x', lang, '-flto', '-o', out_file, '-']
+        else:
+            probe = ['-x', lang, '-flto', '-c', '-o', out_file, '-']
+        status, out = _run(cmd + probe, _probe_source)
+        caps.lto = (status == 0)
+    finally:
+        for f in os.listdir(tmpdir):
+            os.remove(os.path.join(tmpdir, f))
+        os.rmdir(tmpdir)
+    return caps
+
+#############################################################################
+def GuessFamily(command):
+    """Guess compiler family from program name, without running it.
+
+    :Parameters:
+        command : str | list
+            program with optional flags, e.g. ``'/usr/bin/clang++ -m32'``.
+    :Returns:
+        ``'gcc'``, ``'clang'`` or ``'unknown'``
+    """
+    if not isinstance(command, (list, tuple)):
+        command = str(command).split()
+    command = StripLaunchers(command)
+    if not command:
+        return 'unknown'
+    name = os.path.basename(command[0]).lower()
+    if 'clang' in name:
+        return 'clang'
+    elif 'gcc' in name or 'g++' in name or name in ('cc', 'c++'):
+        return 'gcc'
+    return 'unknown'
+
+#############################################################################
+def default_cache_dir():
+    """Return default cache directory (``.sconscommonargs/probes`` in the
+    top-level directory)"""
+    import SConsCommonArguments.DiskCache
+    return os.path.join(SConsCommonArguments.DiskCache.default_directory(), 'probes')
+
+def _cache_file(cache_dir, cmd, path, language):
+    # `path` is the real compiler (not a launcher), see ProbeProgram()
+    st = os.stat(path)
+    key = json.dumps([_probe_version, path, st.st_mtime, st.st_size, cmd[1:], language])
+    return os.path.join(cache_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.json')
+
+def _load(filename):
+    try:
+        with open(filename) as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+
+def _save(filename, data):
+    dirname = os.path.dirname(filename)
+    try:
+        if not os.path.isdir(dirname):
+            os.makedirs(dirname)
+        tmp = '%s.%d.%d.tmp' % (filename, os.getpid(), threading.current_thread().ident)
+        with open(tmp, 'w') as f:
+            json.dump(data, f)
+        if os.path.exists(filename):
+            os.remove(filename)
+        os.rename(tmp, filename)
+    except (IOError, OSError):
+        pass
+
+#############################################################################
+def ProbeProgram(command, language = None, path = None, cache_dir = None):
+    """Probe single program.
+
+    :Parameters:
+        command : str | list
+            program with optional leading flags, e.g. ``'gcc -m32'``,
+        language : str
+            ``'c'``, ``'c++'``, or ``None`` for linkers (no ``-std=``
+            probes),
+        path : str
+            search path for the program (default: ``os.environ['PATH']``),
+        cache_dir : str
+            cache directory (default: `default_cache_dir()`); pass ``False``
+            to disable caching.
+    :Returns:
+        an instance of `Capabilities`
+    """
+    if isinstance(command, (list, tuple)):
+        cmd = list(command)
+    else:
+        cmd = command.split()
+    # launchers (ccache, distcc, ...) do not change capabilities, so we probe
+    # and identify the compiler itself
+    cmd = StripLaunchers(cmd)
+    if not cmd:
+        return Capabilities()
+    resolved = ResolveCompiler(cmd[0], path)
+    if resolved is None:
+        return Capabilities()
+    cmd[0] = resolved
+    if cache_dir is None:
+        cache_dir = default_cache_dir()
+    filename = _cache_file(cache_dir, cmd, resolved, language) if cache_dir else None
+    if filename:
+        data = _load(filename)
+        try:
+            return Capabilities(**data)
+        except TypeError:
+            pass
+    caps = _probe(cmd, language)
+    caps.path = resolved
+    if filename:
+        _save(filename, caps.as_dict())
+    return caps
+
+#############################################################################
+def ProbePrograms(programs, path = None, cache_dir = None):
+    """Probe several programs in parallel.
+
+    :Parameters:
+        programs : dict
+            maps argument names (e.g. ``'CXX'``) to commands (e.g. ``'g++'``),
+        path : str
+            see `ProbeProgram()`,
+        cache_dir : str
+            see `ProbeProgram()`.
+    :Returns:
+        a dictionary mapping argument names to `Capabilities`
+    """
+    results = dict()
+    def _worker(name, command):
+        results[name] = ProbeProgram(command, _languages.get(name, 'c'), path, cache_dir)
+    threads = [threading.Thread(target = _worker, args = item) for item in programs.items()]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+#############################################################################
+def ProbeArguments(args, env, names = ('CC', 'CXX', 'LINK'), cache_dir = None):
+    """Probe programs given by (postprocessed) CC arguments.
+
+    :Parameters:
+        args
+            committed arguments, as returned by ``decls.Commit()``,
+        env : SCons.Environment.Environment
+            the environment; program values are substituted within it and
+            searched for in ``env['ENV']['PATH']``,
+        names : sequence
+            names of program arguments to probe,
+        cache_dir : str
+            see `ProbeProgram()`.
+    :Returns:
+        a dictionary mapping argument names to `Capabilities`
+    """
+    proxy = args.EnvProxy(env)
+    programs = dict()
+    for name in names:
+        programs[name] = proxy.subst('${%s}' % name)
+    try:
+        path = env['ENV']['PATH']
+    except KeyError:
+        path = None
+    return ProbePrograms(programs, path, cache_dir)
+
+# Local Variables:
+# # tab-width:4
+# # indent-tabs-mode:nil
+# # End:
+# vim: set syntax=python expandtab tabstop=4 shiftwidth=4:
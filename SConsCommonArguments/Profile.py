@@ -0,0 +1,302 @@
+"""`SConsCommonArguments.Profile`
+
+Opt-in instrumentation of the argument pipeline.
+
+**General Description**
+
+When enabled, this module records call counts, wall time and net number of
+allocated (GC-tracked) objects for the following phases
+
+    - ``Names`` and ``Declarations`` of every argument family,
+    - ``Commit`` of argument declarations,
+    - ``Postprocess``, ``GenerateVariablesHelpText`` and ``EnvProxy`` of
+      committed arguments,
+    - ``subst`` performed through environment proxies.
+
+The statistics are kept per phase and per argument family and are dumped at
+exit, as a table or JSON. Garbage collection is left alone by default, so
+the allocation counts are approximate (a collection during a call resets
+the counter); pass ``disable_gc = True`` to `Enable()` for exact counts, at
+the cost of measuring a process without garbage collection. Instrumentation
+is installed by replacing the functions and methods with wrappers when
+profiling gets enabled, so there is no cost at all when it's disabled.
+
+**Quick start**
+
+Profiling may be enabled by ``SCONS_COMMON_ARGS_PROFILE`` environment
+variable (set to ``-`` or ``1`` to print a table on stderr, or to a file name;
+``*.json`` files get JSON output; ``0``, ``no``, ``false`` and ``off`` keep
+profiling disabled)::
+
+    SCONS_COMMON_ARGS_PROFILE=prof.json scons -Q
+
+or by ``--common-args-profile=FILE`` command-line option, which is added
+by `Setup()`:
+
+.. python::
+    # SConstruct
+    import SConsCommonArguments.Profile
+    SConsCommonArguments.Profile.Setup()
+"""
+
+#
+# Copyright (c) 2016 by Pawel Tomulik
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+
+__docformat__ = "restructuredText"
+
+import atexit
+import gc
+import json
+import os
+import sys
+import timeit
+import types
+
+ENV_VAR = 'SCONS_COMMON_ARGS_PROFILE'
+OPTION = '--common-args-profile'
+
+_family_phases = ['Names', 'Declarations']
+_method_phases = ['Commit', 'Postprocess', 'GenerateVariablesHelpText',
+                  'EnvProxy', 'subst']
+# phases whose results carry the family name further down the pipeline
+_tagging_phases = ['Declarations', 'Commit', 'EnvProxy']
+_family_attr = '_common_args_family'
+
+_disabled_values = ('', '0', 'no', 'false', 'off')
+
+_timer = timeit.default_timer
+_stats = dict()
+_patches = []
+_output = None
+_disable_gc = False
+_atexit_registered = False
+
+def ParseSetting(value):
+    """Interpret value of ``SCONS_COMMON_ARGS_PROFILE`` environment variable.
+
+    :Returns:
+        the output for `Enable()`, or ``None`` if `value` is empty or one of
+        ``0``, ``no``, ``false``, ``off`` (case insensitive)
+    """
+    if value is None or value.strip().lower() in _disabled_values:
+        return None
+    return value
+
+#############################################################################
+def Enabled():
+    """Return ``True`` if profiling is enabled"""
+    return bool(_patches)
+
+#############################################################################
+def Stats():
+    """Return recorded statistics.
+
+    :Returns:
+        a list of dictionaries with ``phase``, ``family``, ``calls``,
+        ``seconds`` and ``allocs`` entries, sorted by phase and family
+    """
+    stats = []
+    for (phase, family) in sorted(_stats):
+        calls, seconds, allocs = _stats[(phase, family)]
+        stats.append({ 'phase'   : phase,
+                       'family'  : family,
+                       'calls'   : calls,
+                       'seconds' : seconds,
+                       'allocs'  : allocs })
+    return stats
+
+#############################################################################
+def Reset():
+    """Clear recorded statistics"""
+    _stats.clear()
+
+#############################################################################
+def _record(phase, family, seconds, allocs):
+    try:
+        entry = _stats[(phase, family)]
+    except KeyError:
+        entry = _stats[(phase, family)] = [0, 0.0, 0]
+    entry[0] += 1
+    entry[1] += seconds
+    entry[2] += allocs
+
+def _wrap(func, phase, family = None):
+    def wrapper(*args, **kw):
+        if family is None:
+            fam = getattr(args[0], _family_attr, '*') if args else '*'
+        else:
+            fam = family
+        gc_enabled = _disable_gc and gc.isenabled()
+        if gc_enabled:
+            gc.disable()
+        try:
+            count = gc.get_count()[0]
+            t0 = _timer()
+            result = func(*args, **kw)
+            seconds = _timer() - t0
+            allocs = gc.get_count()[0] - count
+        finally:
+            if gc_enabled:
+                gc.enable()
+        # the counter drops if a collection happened meanwhile
+        _record(phase, fam, seconds, max(allocs, 0))
+        if phase in _tagging_phases:
+            try:
+                setattr(result, _family_attr, fam)
+            except (AttributeError, TypeError):
+                pass
+        return result
+    wrapper.__name__ = getattr(func, '__name__', phase)
+    wrapper.__doc__ = getattr(func, '__doc__', None)
+    return wrapper
+
+#############################################################################
+def instrument(owner, name, phase, family = None):
+    """Replace ``owner.name`` with an instrumented wrapper.
+
+    :Parameters:
+        owner
+            module or class owning the function,
+        name : str
+            name of the function (method) to be instrumented,
+        phase : str
+            name of the phase the function is accounted to,
+        family : str
+            name of the argument family; if ``None``, the family is taken
+            from the object the method is called on (``'*'`` if unknown).
+    """
+    original = owner.__dict__[name]
+    setattr(owner, name, _wrap(original, phase, family))
+    _patches.append((owner, name, original))
+
+#############################################################################
+def _family_modules():
+    import SConsCommonArguments
+    for family in SConsCommonArguments.Families():
+        yield family, getattr(SConsCommonArguments, family)
+
+def _sconsarguments_classes():
+    seen = set()
+    for modname, module in list(sys.modules.items()):
+        if module is None or modname.split('.')[0] != 'SConsArguments':
+            continue
+        for obj in list(vars(module).values()):
+            if isinstance(obj, type) and obj.__module__ == modname and obj not in seen:
+                seen.add(obj)
+                yield obj
+
+#############################################################################
+def Enable(output = None, disable_gc = False):
+    """Enable profiling.
+
+    All argument families listed by `SConsCommonArguments.Families()` get
+    imported and instrumented, together with the relevant methods of
+    `SConsArguments` classes.
+
+    :Parameters:
+        output : str
+            where to dump statistics at exit: ``None`` or ``'-'`` for a table
+            on stderr, a file name ending with ``.json`` for JSON, any other
+            file name for a table,
+        disable_gc : boolean
+            disable garbage collection within instrumented calls, for exact
+            allocation counts.
+    """
+    global _output, _disable_gc, _atexit_registered
+    _output = output
+    _disable_gc = disable_gc
+    if not _atexit_registered:
+        atexit.register(_dump_at_exit)
+        _atexit_registered = True
+    if _patches:
+        return
+    import SConsArguments
+    for family, module in _family_modules():
+        for phase in _family_phases:
+            if phase in module.__dict__:
+                instrument(module, phase, phase, family)
+    for cls in _sconsarguments_classes():
+        for phase in _method_phases:
+            if isinstance(cls.__dict__.get(phase), types.FunctionType):
+                instrument(cls, phase, phase)
+
+#############################################################################
+def Disable():
+    """Disable profiling, restoring the original functions and methods"""
+    global _output, _disable_gc
+    while _patches:
+        owner, name, original = _patches.pop()
+        setattr(owner, name, original)
+    _output = None
+    _disable_gc = False
+
+#############################################################################
+def FormatTable(stats = None):
+    """Format statistics as a plain-text table"""
+    if stats is None:
+        stats = Stats()
+    lines = ['%-28s %-12s %8s %12s %10s' % ('phase', 'family', 'calls', 'time [s]', 'allocs')]
+    for s in stats:
+        lines.append('%-28s %-12s %8d %12.6f %10d' % (s['phase'], s['family'], s['calls'], s['seconds'], s['allocs']))
+    return '\n'.join(lines) + '\n'
+
+#############################################################################
+def Dump(output = None):
+    """Write statistics to `output`, see `Enable()`"""
+    stats = Stats()
+    if output in (None, '', '-', '1'):
+        sys.stderr.write(FormatTable(stats))
+    elif output.endswith('.json'):
+        with open(output, 'w') as f:
+            json.dump(stats, f, indent = 2, sort_keys = True)
+    else:
+        with open(output, 'w') as f:
+            f.write(FormatTable(stats))
+
+def _dump_at_exit():
+    if Enabled():
+        Dump(_output)
+
+#############################################################################
+def Setup(environ = os.environ, disable_gc = False):
+    """Add ``--common-args-profile=FILE`` option to SCons and enable
+    profiling if either the option or ``SCONS_COMMON_ARGS_PROFILE``
+    environment variable is set (see `ParseSetting()`).
+
+    Must be called from SConstruct (or SConscript). The `disable_gc` flag is
+    passed to `Enable()`.
+    """
+    import SCons.Script
+    SCons.Script.AddOption(OPTION, dest = 'common_args_profile', metavar = 'FILE',
+                           help = 'profile the common arguments pipeline and '
+                                  'dump statistics at exit to FILE '
+                                  '(- for stderr, *.json for JSON)')
+    output = SCons.Script.GetOption('common_args_profile')
+    if output is None:
+        output = ParseSetting(environ.get(ENV_VAR))
+    if output:
+        Enable(output, disable_gc)
+
+# Local Variables:
+# # tab-width:4
+# # indent-tabs-mode:nil
+# # End:
+# vim: set syntax=python expandtab tabstop=4 shiftwidth=4:
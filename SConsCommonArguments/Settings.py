@@ -0,0 +1,241 @@
+"""`SConsCommonArguments.Settings`
+
+Export and fast loading of resolved argument values.
+
+**General Description**
+
+Toolchain settings (``CC``, ``CXX``, ``*FLAGS``, ...) are often kept in SCons
+variables files, which are executed as Python by ``Variables()`` on every
+run. This module exports the resolved values of arguments to a compact
+settings file (JSON, or marshal for files named ``*.marshal``) and loads
+them back without evaluating any Python code. The values are stored under
+*argument* names, so they're mapped to endpoint names (construction
+variables, command-line variables) with the same prefixes/suffixes as used
+by ``Declarations()`` (see `SConsArguments._ArgumentNameConv`).
+
+**Quick start**
+
+Export, e.g. from a configure step:
+
+.. python::
+    # SConstruct
+    import SConsCommonArguments.CC
+    import SConsCommonArguments.Settings
+
+    decls = SConsCommonArguments.CC.Declarations()
+    args = decls.Commit(env, var, True)
+    args.Postprocess(env, var, True)
+    SConsCommonArguments.Settings.Export(args, env, SConsCommonArguments.CC.Names(),
+                                         'toolchain.marshal')
+
+Load, instead of ``Variables('toolchain.py')``:
+
+.. python::
+    # SConstruct
+    import SConsCommonArguments.CC
+    import SConsCommonArguments.Settings
+
+    values = SConsCommonArguments.Settings.Load('toolchain.marshal')
+    var = Variables(None, SConsCommonArguments.Settings.VariablesArgs(values, ARGUMENTS))
+    decls = SConsCommonArguments.CC.Declarations()
+    args = decls.Commit(env, var, True)
+    args.Postprocess(env, var, True)
+
+or apply the values directly to an environment with `Apply()`.
+"""
+
+#
+# Copyright (c) 2016 by Pawel Tomulik
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+
+__docformat__ = "restructuredText"
+
+import json
+import marshal
+import os
+import SCons.Util
+import SConsCommonArguments.Flags
+import SConsCommonArguments.Util
+
+#############################################################################
+def _is_marshal(filename):
+    return filename.endswith('.marshal')
+
+def _plain(value):
+    """Convert `value` to a plain (string, ``None`` or list of strings)
+    value"""
+    if value is None or SCons.Util.is_String(value):
+        return value
+    elif SCons.Util.is_Sequence(value):
+        return [str(v) for v in value]
+    return str(value)
+
+#############################################################################
+def Export(args, env, names, filename):
+    """Export resolved values of arguments `names` to settings file.
+
+    :Parameters:
+        args
+            committed arguments, as returned by ``decls.Commit()``,
+        env : SCons.Environment.Environment
+            the environment with resolved arguments (after
+            ``args.Postprocess()``),
+        names : list
+            argument names to export; arguments missing in `env` are skipped,
+        filename : str
+            the settings file, marshal format is used if it ends with
+            ``.marshal``, JSON otherwise.
+    :Returns:
+        the dictionary of exported values
+    """
+    proxy = args.EnvProxy(env)
+    values = dict()
+    for name in names:
+        try:
+            values[name] = _plain(proxy[name])
+        except KeyError:
+            pass
+    dirname = os.path.dirname(filename)
+    if dirname and not os.path.isdir(dirname):
+        os.makedirs(dirname)
+    tmp = '%s.%d.tmp' % (filename, os.getpid())
+    if _is_marshal(filename):
+        with open(tmp, 'wb') as f:
+            marshal.dump(values, f, 2)
+    else:
+        with open(tmp, 'w') as f:
+            json.dump(values, f, sort_keys = True, separators = (',', ':'))
+    if os.name == 'nt' and os.path.exists(filename):
+        # rename() doesn't replace existing files on Windows
+        os.remove(filename)
+    os.rename(tmp, filename)
+    return values
+
+#############################################################################
+def Load(filename):
+    """Load values from settings file written by `Export()`.
+
+    No Python code is evaluated.
+
+    :Returns:
+        a dictionary mapping argument names to values
+    :Raises:
+        `ValueError` if the file is not a valid settings file
+    """
+    if _is_marshal(filename):
+        with open(filename, 'rb') as f:
+            try:
+                values = marshal.load(f)
+            except (EOFError, TypeError) as e:
+                raise ValueError("%s: %s" % (filename, e))
+    else:
+        with open(filename) as f:
+            values = json.load(f)
+    if not isinstance(values, dict):
+        raise ValueError("%s: not a settings file" % filename)
+    return values
+
+#############################################################################
+def _keys(values, column, kw):
+    names = sorted(values.keys())
+    return zip(names, SConsCommonArguments.Util.convert_names(names, **kw)[column])
+
+def VariablesArgs(values, arguments = None, **kw):
+    """Map `values` to command-line variables, for use with
+    ``Variables(None, args)``.
+
+    :Parameters:
+        values : dict
+            values loaded with `Load()`,
+        arguments : dict
+            command-line variables (``ARGUMENTS``); they take precedence over
+            `values`.
+    :Keywords:
+        name conversion keywords (``var_key_prefix``, ...), same as for
+        ``Declarations()``.
+    :Returns:
+        a dictionary mapping command-line variable names to strings; lists
+        are joined with shell quoting (see `SConsCommonArguments.Flags.Join()`)
+    """
+    result = dict()
+    for name, key in _keys(values, 1, kw):
+        if key is None:
+            continue
+        value = values[name]
+        if value is None:
+            continue
+        elif SCons.Util.is_Sequence(value):
+            value = SConsCommonArguments.Flags.Join(value)
+        result[key] = value
+    if arguments:
+        result.update(arguments)
+    return result
+
+def Apply(values, env, validators = None, **kw):
+    """Set construction variables from `values`.
+
+    Only entries that differ from the current values in `env` are validated
+    and set.
+
+    :Parameters:
+        values : dict
+            values loaded with `Load()`,
+        env : SCons.Environment.Environment
+            the environment to be updated,
+        validators : dict
+            maps argument names to callables of type ``validator(value)``,
+            raising an exception for invalid values (e.g. converters of
+            argument declarations).
+    :Keywords:
+        name conversion keywords (``env_key_prefix``, ...), same as for
+        ``Declarations()``.
+    :Returns:
+        sorted list of names of the arguments which were changed
+    """
+    if validators is None:
+        validators = dict()
+    changed = []
+    for name, key in _keys(values, 0, kw):
+        if key is None:
+            continue
+        value = values[name]
+        try:
+            current = _plain(env[key])
+        except KeyError:
+            current = ()
+        if current == value:
+            continue
+        try:
+            validator = validators[name]
+        except KeyError:
+            pass
+        else:
+            validator(value)
+        if SCons.Util.is_Sequence(value):
+            value = SCons.Util.CLVar(value)
+        env[key] = value
+        changed.append(name)
+    return changed
+
+# Local Variables:
+# # tab-width:4
+# # indent-tabs-mode:nil
+# # End:
+# vim: set syntax=python expandtab tabstop=4 shiftwidth=4:
@@ -28,9 +28,49 @@ __docformat__ = 'restructuredText'
 
 import SConsArguments
 import SCons.Util
+import collections
+import fnmatch
+import re
 
 MISSING = SConsArguments.MISSING
 
+try:
+    # Python 2
+    _intern = intern
+except NameError:
+    # Python 3
+    import sys
+    _intern = sys.intern
+
+#############################################################################
+def _is_name_set(name_filter):
+    return SCons.Util.is_Sequence(name_filter) \
+        or isinstance(name_filter, (set, frozenset))
+
+#############################################################################
+def name_filter_predicate(name_filter):
+    """Convert `name_filter` to a predicate of type ``f(name) -> boolean``.
+
+    :Parameters:
+        name_filter
+            one of: a callable object of type ``name_filter(name) ->
+            boolean``; a sequence or set of argument names; a glob pattern
+            string (e.g. ``'SH*FLAGS'``); a compiled regular expression,
+            which is matched against argument names with its ``match()``
+            method.
+    :Returns:
+        a callable object of type ``f(name) -> boolean``
+    """
+    if name_filter is None:
+        return lambda x : True
+    elif SCons.Util.is_String(name_filter):
+        return re.compile(fnmatch.translate(name_filter)).match
+    elif _is_name_set(name_filter):
+        return frozenset(name_filter).__contains__
+    elif not callable(name_filter) and hasattr(name_filter, 'match'):
+        return name_filter.match
+    return name_filter
+
 #############################################################################
 def map_tuples(callback, tuples, name_filter = lambda x : True):
     """Map all predefined GNU variable tuples (name, desc, default) via
@@ -48,14 +88,13 @@ def map_tuples(callback, tuples, name_filter = lambda x : True):
         name_filter : callable
             callable object (e.g. lambda) of type ``name_filter(name) ->
             boolean`` used to filter-out unwanted variables; only these
-            variables are processed, for which name_filter returns ``True``
+            variables are processed, for which name_filter returns ``True``;
+            see also `name_filter_predicate()` for other accepted filters
 
     :Returns:
         returns result of mapping through `callback`
     """
-    if SCons.Util.is_Sequence(name_filter):
-        seq = name_filter
-        name_filter = lambda x : x in seq
+    name_filter = name_filter_predicate(name_filter)
     tuples = filter(lambda t : name_filter(t[0]), tuples)
     return map(lambda x : callback(*x), tuples)
 
@@ -78,9 +117,313 @@ def names_from_tuples(tuples, name_filter = lambda x : True):
     """
     return map_tuples(lambda *x : x[0], tuples, name_filter)
 
+#############################################################################
+class ArgumentRegistry(object):
+    """Index of argument tuples by argument name and by argument family.
+
+    An argument family is a named group of tuples, such as ``'progs'`` or
+    ``'flags'`` in `SConsCommonArguments.CC`. The tuples have same form as
+    these accepted by `map_tuples()`.
+    """
+    def __init__(self, families = ()):
+        """Initialize the registry.
+
+        :Parameters:
+            families : sequence
+                a sequence of ``(family, tuples)`` pairs to be registered.
+        """
+        self._families = collections.OrderedDict()
+        self._index = dict()
+        for family, tuples in families:
+            self.add(family, tuples)
+
+    def add(self, family, tuples):
+        """Register `tuples` as members of `family`"""
+        entries = self._families.setdefault(family, [])
+        for t in tuples:
+            if t[0] in self._index:
+                raise ValueError("argument %r is already registered" % t[0])
+            entry = (len(self._index), family, t)
+            self._index[t[0]] = entry
+            entries.append(entry)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+    def families(self):
+        """Return the list of registered family names"""
+        return list(self._families.keys())
+
+    def selected(self, kw):
+        """Return the list of family names selected by ``include_<family>``
+        keywords in `kw` (families are included by default)"""
+        return [f for f in self._families if kw.get('include_%s' % f, True)]
+
+    def family(self, name):
+        """Return the family name of the argument `name`"""
+        return self._index[name][1]
+
+    def get(self, name):
+        """Return the tuple registered for argument `name`"""
+        return self._index[name][2]
+
+    def select(self, families = None, name_filter = None):
+        """Return tuples of selected arguments, in order of registration.
+
+        If `name_filter` is a sequence or set of names, the selection takes
+        time proportional to the number of selected names, regardless of the
+        registry size.
+
+        :Parameters:
+            families : sequence
+                names of families to select from (default: all families),
+            name_filter
+                filter applied to argument names, see
+                `name_filter_predicate()`.
+        :Returns:
+            a list of tuples
+        """
+        if families is None:
+            families = list(self._families.keys())
+        else:
+            families = list(families)
+        if _is_name_set(name_filter):
+            families = frozenset(families)
+            entries = [ self._index[n] for n in frozenset(name_filter) \
+                        if n in self._index and self._index[n][1] in families ]
+            entries.sort()
+        else:
+            entries = []
+            for f in families:
+                entries.extend(self._families.get(f, []))
+            if name_filter is not None:
+                pred = name_filter_predicate(name_filter)
+                entries = [e for e in entries if pred(e[2][0])]
+            if len(families) > 1:
+                entries.sort()
+        return [e[2] for e in entries]
+
+    def names(self, families = None, name_filter = None):
+        """Return names of selected arguments, see `select()`"""
+        return [t[0] for t in self.select(families, name_filter)]
+
 ###############################################################################
-def arguments_from_tuples(tuples, **kw):
-    """Convert tuples to argument declarations.
+class DeclarationRecord(object):
+    """Compact, immutable declaration of a single argument.
+
+    This is a memory-efficient replacement for the ``decl`` dictionaries
+    accepted by `SConsArguments.DeclareArguments()`. The record provides a
+    read-only, dict-compatible view (``keys()``, ``items()``, ``[key]``,
+    ``**record``, ...), which contains only the keys with values other than
+    `MISSING` (e.g. ``default`` or ``help`` may be missing). The ``type`` and
+    ``metavar`` strings are interned, so they're shared across all records.
+    """
+    __slots__ = ( 'env_key', 'var_key', 'opt_key', 'option', 'type', 'nargs',
+                  'metavar', 'default', 'help', 'converter' )
+
+    def __init__(self, env_key = MISSING, var_key = MISSING, opt_key = MISSING,
+                 option = MISSING, type = MISSING, nargs = MISSING,
+                 metavar = MISSING, default = MISSING, help = MISSING,
+                 converter = MISSING):
+        if isinstance(type, str):
+            type = _intern(type)
+        if isinstance(metavar, str):
+            metavar = _intern(metavar)
+        for k, v in zip(self.__slots__, (env_key, var_key, opt_key, option,
+                                         type, nargs, metavar, default, help,
+                                         converter)):
+            object.__setattr__(self, k, v)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("%s is immutable" % self.__class__.__name__)
+
+    def __delattr__(self, name):
+        raise AttributeError("%s is immutable" % self.__class__.__name__)
+
+    def __getstate__(self):
+        return tuple([getattr(self, k) for k in self.__slots__])
+
+    def __setstate__(self, state):
+        for k, v in zip(self.__slots__, state):
+            object.__setattr__(self, k, v)
+
+    def keys(self):
+        return [k for k in self.__slots__ if getattr(self, k) is not MISSING]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __contains__(self, key):
+        return key in self.__slots__ and getattr(self, key) is not MISSING
+
+    def __getitem__(self, key):
+        if key in self.__slots__:
+            value = getattr(self, key)
+            if value is not MISSING:
+                return value
+        raise KeyError(key)
+
+    def get(self, key, default = None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def items(self):
+        return [(k, getattr(self, k)) for k in self.keys()]
+
+    def values(self):
+        return [getattr(self, k) for k in self.keys()]
+
+    def as_dict(self):
+        """Return a ``decl`` dictionary equivalent to this record"""
+        return dict(self.items())
+
+    def __eq__(self, other):
+        if isinstance(other, (DeclarationRecord, dict)):
+            return self.as_dict() == dict(other)
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '%s(%s)' % (self.__class__.__name__, ', '.join(['%s=%r' % kv for kv in self.items()]))
+
+###############################################################################
+def as_record(decl):
+    """Convert ``decl`` dictionary to `DeclarationRecord` (records are
+    returned unchanged)"""
+    if isinstance(decl, DeclarationRecord):
+        return decl
+    return DeclarationRecord(**decl)
+
+###############################################################################
+def as_dict(decl):
+    """Convert `DeclarationRecord` to ``decl`` dictionary (dictionaries are
+    returned unchanged)"""
+    if isinstance(decl, DeclarationRecord):
+        return decl.as_dict()
+    return decl
+
+###############################################################################
+def declare_arguments(specs):
+    """Create `SConsArguments._ArgumentDeclarations` from ``(name, decl)``
+    specs, where ``decl`` may be a dictionary or `DeclarationRecord`.
+
+    `SConsArguments` expects plain ``decl`` dictionaries, so records are
+    converted with `DeclarationRecord.as_dict()`. `SConsArguments` builds its
+    own declaration object for every argument anyway, the records save memory
+    where they're kept for longer, i.e. in `declarations_cache` and
+    `persistent_cache`.
+
+    :Returns:
+        an instance of `SConsArguments._ArgumentDeclarations`
+    """
+    return SConsArguments.DeclareArguments([(name, as_dict(decl)) for (name, decl) in specs])
+
+###############################################################################
+_nameconv_skip_keys = ['defaults', 'name_filter', 'nameconv', 'type', 'metavar',
+                       'converter', 'converters']
+
+class _NameConvMemo(object):
+    """Memoized results of `SConsArguments._ArgumentNameConv` transforms.
+
+    Results are kept per name conversion settings (either a ``nameconv``
+    object or the keywords used to create one), for a bounded number of
+    most recently used settings.
+    """
+    def __init__(self, maxsize = 64):
+        self.maxsize = maxsize
+        self._entries = collections.OrderedDict()
+
+    def lookup(self, kw):
+        """Return ``(nameconv, memo)`` pair for settings given by `kw`, where
+        ``memo`` is a dict mapping names to tuples of transformed keys."""
+        try:
+            nameconv = kw['nameconv']
+            kw2 = None
+            key = ('nameconv', nameconv)
+            hash(key)
+        except TypeError:
+            key = None
+        except KeyError:
+            nameconv = None
+            kw2 = { k:v for (k,v) in kw.items() if k not in _nameconv_skip_keys }
+            try:
+                key = ('kw', _freeze(kw2))
+            except TypeError:
+                key = None
+        try:
+            entry = self._entries.pop(key)
+        except KeyError:
+            if nameconv is None:
+                nameconv = SConsArguments._ArgumentNameConv(**kw2)
+            entry = (nameconv, dict())
+        if key is not None and self.maxsize > 0:
+            self._entries[key] = entry
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last = False)
+        return entry
+
+    def clear(self):
+        self._entries.clear()
+
+_nameconv_memo = _NameConvMemo()
+
+###############################################################################
+def convert_names(names, **kw):
+    """Transform argument names to endpoint keys in one pass.
+
+    Results are memoized per (name conversion settings, name), so repeated
+    conversions with same settings are reduced to dictionary lookups.
+
+    :Parameters:
+        names : list
+            argument names to be transformed.
+
+    :Keywords:
+        nameconv : `SConsArguments._ArgumentNameConv`
+            a `SConsArguments._ArgumentNameConv` object used to transform
+            *argument* names to *endpoint* names; if not given, other keywords
+            are passed to `SConsArguments._ArgumentNameConv.__init__()`
+            (see `specs_from_tuples()`).
+
+    :Returns:
+        a tuple of four parallel lists ``(env_keys, var_keys, opt_keys,
+        options)``, one element per name
+    """
+    nameconv, memo = _nameconv_memo.lookup(kw)
+    keys = []
+    for name in names:
+        try:
+            keys.append(memo[name])
+        except KeyError:
+            k = ( nameconv.env_key_transform(name),
+                  nameconv.var_key_transform(name),
+                  nameconv.opt_key_transform(name),
+                  nameconv.option_transform(name) )
+            memo[name] = k
+            keys.append(k)
+    if not keys:
+        return ([], [], [], [])
+    return tuple([list(c) for c in zip(*keys)])
+
+###############################################################################
+def specs_from_tuples(tuples, **kw):
+    """Convert tuples to a list of ``(name, decl)`` pairs, where ``decl`` is
+    a `DeclarationRecord` (see also `declare_arguments()`).
 
     :Parameters:
         tuples : list
@@ -104,6 +447,12 @@ def arguments_from_tuples(tuples, **kw):
             create argument of given type (default: 'string')
         metavar
             use as command-line metavar
+        converter
+            converter for the command-line variable (see
+            `SConsCommonArguments.Flags.FlagList` for an example)
+        converters : dict
+            per-argument converters, override ``converter`` for the listed
+            names
         env_key_prefix
             passed to `SConsArguments._ArgumentNameConv.__init__()`,
         env_key_suffix
@@ -132,14 +481,14 @@ def arguments_from_tuples(tuples, **kw):
             passed to `SConsArguments._ArgumentNameConv.__init__()`.
 
     :Returns:
-        an instance of `SConsArguments._ArgumentDeclarations`
+        a list of ``(name, decl)`` pairs
     """
     # TODO: This is quite unorganized, I should get back here and elaborate
-    def _callback(name, *args):
+    def _callback(keys, name, *args):
         try: desc = args[0]
         except IndexError: desc = MISSING
         try: default = defaults.get(name,args[1])
-        except IndexError: default = MISSING
+        except IndexError: default = defaults.get(name,MISSING)
         if metavar:
             _metavar = metavar
         else:
@@ -152,27 +501,369 @@ def arguments_from_tuples(tuples, **kw):
                 _metavar = 'DIR'
             else:
                 _metavar = 'X'
-        decl = { 'env_key'  : nameconv.env_key_transform(name),
-                 'var_key'  : nameconv.var_key_transform(name),
-                 'opt_key'  : nameconv.opt_key_transform(name),
-                 'option'   : nameconv.option_transform(name),
-                 'type'     : _type,
-                 'nargs'    : 1,
-                 'metavar'  : _metavar }
-        if default is not MISSING:
-            decl['default'] = default
-        if desc is not MISSING:
-            decl['help'] = desc
+        decl = DeclarationRecord( env_key   = keys[0],
+                                  var_key   = keys[1],
+                                  opt_key   = keys[2],
+                                  option    = keys[3],
+                                  type      = _type,
+                                  nargs     = 1,
+                                  metavar   = _metavar,
+                                  default   = default,
+                                  help      = desc,
+                                  converter = converters.get(name, converter) )
         return name, decl
 
     defaults = kw.get('defaults', dict())
     name_filter = kw.get('name_filter', lambda s : True)
     _type = kw.get('type', 'string')
     metavar = kw.get('metavar')
+    converter = kw.get('converter', MISSING)
+    converters = kw.get('converters', dict())
+    # a list, as it's iterated twice (map() returns an iterator in Python 3)
+    tuples = list(map_tuples(lambda *x : x, tuples, name_filter))
+    columns = convert_names([t[0] for t in tuples], **kw)
+    return [_callback(keys, *t) for (t, keys) in zip(tuples, zip(*columns))]
+
+###############################################################################
+def arguments_from_tuples(tuples, **kw):
+    """Convert tuples to argument declarations.
+
+    This is `specs_from_tuples()` followed by `declare_arguments()`. See `specs_from_tuples()` for
+    description of parameters and keywords.
+
+    :Returns:
+        an instance of `SConsArguments._ArgumentDeclarations`
+    """
+    return declare_arguments(specs_from_tuples(tuples, **kw))
+
+###############################################################################
+def _freeze(value):
+    """Convert `value` into a hashable object suitable for a cache key.
+
+    Raises `TypeError` if `value` (or any of its items) can't be hashed.
+    """
+    if SCons.Util.is_Dict(value):
+        items = [(k, _freeze(v)) for (k, v) in value.items()]
+        return (dict, tuple(sorted(items, key = lambda x : repr(x[0]))))
+    elif isinstance(value, (set, frozenset)):
+        return (frozenset, frozenset([_freeze(v) for v in value]))
+    elif SCons.Util.is_Sequence(value):
+        return (tuple, tuple([_freeze(v) for v in value]))
+    hash(value)
+    return value
+
+###############################################################################
+def declarations_cache_key(family, kw):
+    """Compute a normalized, hashable key for the `Declarations()` keywords.
+
+    Dictionaries are compared by their contents, sequences (e.g. sequence
+    ``name_filter``) by their items and other objects (e.g. lambdas,
+    ``nameconv`` objects) by their identity.
+
+    :Parameters:
+        family : str
+            name of the argument family (module) the declarations belong to,
+        kw : dict
+            keyword arguments passed to ``Declarations()``.
+    :Returns:
+        the key or ``None`` if `kw` contains objects which can't be hashed
+    """
+    try:
+        return (family, _freeze(kw))
+    except TypeError:
+        return None
+
+###############################################################################
+class DeclarationsCache(object):
+    """Bounded LRU cache of argument declaration specs.
+
+    The cache stores lists of ``(name, decl)`` pairs, as returned by
+    `specs_from_tuples()`. The ``decl`` entries are kept as immutable
+    `DeclarationRecord` objects, so they may be safely shared by all
+    consumers; one consumer can't alter declarations seen by the others.
+    """
+    def __init__(self, maxsize = 64):
+        """Initialize the cache.
+
+        :Parameters:
+            maxsize : int
+                maximum number of entries kept in cache; the least recently
+                used entries are evicted first.
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Return specs cached under `key` or ``None``"""
+        if key is None:
+            self.misses += 1
+            return None
+        try:
+            specs = self._entries.pop(key)
+        except KeyError:
+            self.misses += 1
+            return None
+        self._entries[key] = specs
+        self.hits += 1
+        return list(specs)
+
+    def put(self, key, specs):
+        """Store `specs` under `key`, converting ``decl`` dicts to records"""
+        if key is None or self.maxsize <= 0:
+            return
+        self._entries.pop(key, None)
+        self._entries[key] = tuple([(name, as_record(decl)) for (name, decl) in specs])
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last = False)
+
+    def invalidate(self, family = None):
+        """Drop cached entries.
+
+        :Parameters:
+            family : str
+                if given, drop only entries of the given argument family,
+                otherwise drop all entries.
+        """
+        if family is None:
+            self._entries.clear()
+        else:
+            for key in [k for k in self._entries if k[0] == family]:
+                del self._entries[key]
+
+    def info(self):
+        """Return a dictionary with cache statistics"""
+        return { 'hits'     : self.hits,
+                 'misses'   : self.misses,
+                 'size'     : len(self._entries),
+                 'maxsize'  : self.maxsize }
+
+declarations_cache = DeclarationsCache()
+
+# Optional persistent cache, see `enable_persistent_cache()`.
+persistent_cache = None
+
+###############################################################################
+def enable_persistent_cache(directory = None):
+    """Enable persistent (on-disk) cache of argument declarations.
+
+    :Parameters:
+        directory : str
+            directory to keep the cache in, see
+            `SConsCommonArguments.DiskCache.default_directory()`.
+    :Returns:
+        the `SConsCommonArguments.DiskCache.DeclarationsDiskCache` object
+    """
+    global persistent_cache
+    import SConsCommonArguments.DiskCache
+    persistent_cache = SConsCommonArguments.DiskCache.DeclarationsDiskCache(directory)
+    return persistent_cache
+
+###############################################################################
+def disable_persistent_cache():
+    """Disable persistent cache of argument declarations"""
+    global persistent_cache
+    persistent_cache = None
+
+###############################################################################
+def cached_specs(family, kw, builder):
+    """Return ``(name, decl)`` specs for `family`, computing them with
+    `builder` only when they're not found in `declarations_cache` nor in
+    `persistent_cache` (if enabled).
+
+    :Parameters:
+        family : str
+            name of the argument family (module),
+        kw : dict
+            keywords used to build the specs (they're used as cache key),
+        builder : callable
+            function of type ``builder() -> list`` which computes the specs.
+    :Returns:
+        a list of ``(name, decl)`` pairs, the ``decl`` entries are immutable
+        `DeclarationRecord` objects
+    """
+    key = declarations_cache_key(family, kw)
+    specs = declarations_cache.get(key)
+    if specs is None:
+        if persistent_cache is not None:
+            specs = persistent_cache.get(key)
+        if specs is None:
+            specs = builder()
+            if persistent_cache is not None:
+                persistent_cache.put(key, specs)
+        declarations_cache.put(key, specs)
+    return specs
+
+###############################################################################
+def family_specs(family, registry, kw, extra = None):
+    """Return ``(name, decl)`` specs for ``Declarations()`` of an argument
+    family module, see `family_declarations()`.
+
+    :Returns:
+        a list of ``(name, decl)`` pairs, the ``decl`` entries are immutable
+        `DeclarationRecord` objects
+    """
+    kw = kw.copy()
+    if not 'opt_key_transform' in kw:
+        kw['opt_key_transform'] = False
+    use_cache = kw.pop('use_cache', True)
+
+    def _specs():
+        kw2 = kw.copy()
+        name_filter = kw2.pop('name_filter', None)
+        specs = []
+        for sub in registry.selected(kw2):
+            tuples = registry.select([sub], name_filter)
+            skw = kw2.copy()
+            if extra is not None:
+                skw.update(extra(sub, skw))
+            specs.extend(specs_from_tuples(tuples, **skw))
+        return specs
+
+    if use_cache:
+        return cached_specs(family, kw, _specs)
+    return _specs()
+
+###############################################################################
+def family_declarations(family, registry, kw, extra = None):
+    """Implement ``Declarations()`` of an argument family module.
+
+    :Parameters:
+        family : str
+            name of the argument family (module), used as cache key,
+        registry : `ArgumentRegistry`
+            the registry of family's arguments; the ``include_<name>``
+            keywords select its sub-families,
+        kw : dict
+            keywords passed to ``Declarations()`` (see
+            `SConsCommonArguments.CC.Declarations()`),
+        extra : callable
+            optional function of type ``extra(subfamily, kw) -> dict``
+            returning additional keywords for `specs_from_tuples()`; it
+            receives a copy of `kw` (without ``name_filter``) and may pop
+            family-specific keywords from it.
+    :Returns:
+        an instance of `SConsArguments._ArgumentDeclarations`
+    """
+    return declare_arguments(family_specs(family, registry, kw, extra))
+
+###############################################################################
+# keywords which affect endpoint names only
+_naming_keys = frozenset([
+    'nameconv',
+    'env_key_prefix', 'env_key_suffix', 'env_key_transform',
+    'var_key_prefix', 'var_key_suffix', 'var_key_transform',
+    'opt_key_prefix', 'opt_key_suffix', 'opt_key_transform',
+    'opt_prefix', 'opt_name_prefix', 'opt_name_suffix', 'option_transform',
+])
+
+_endpoint_keys = ('env_key', 'var_key', 'opt_key', 'option')
+
+def family_variant_declarations(family, registry, variants, kw, extra = None):
+    """Implement ``VariantDeclarations()`` of an argument family module.
+
+    The declarations are computed once, as a template, from `kw`. Each
+    variant only renames endpoint keys (``env_key``, ``var_key``, ...) of
+    the template, so filtering, metavar inference and record construction
+    are not repeated per variant. Variants with keywords
+    other than name conversion keywords (``env_key_prefix``, ...) fall back
+    to `family_declarations()`. A ``nameconv`` object can't be combined with
+    other name conversion keywords (it would silently override them), so
+    such variants are rejected.
+
+    :Parameters:
+        family : str
+            name of the argument family (module),
+        registry : `ArgumentRegistry`
+            the registry of family's arguments,
+        variants : list
+            list of dictionaries with per-variant keywords, e.g.
+            ``[{'env_key_prefix' : 'ARM_DEBUG_', 'var_key_prefix' :
+            'ARM_DEBUG_'}, ...]``; they're combined with `kw`,
+        kw : dict
+            keywords shared by all variants, see `family_declarations()`,
+        extra : callable
+            see `family_declarations()`.
+    :Returns:
+        a list of `SConsArguments._ArgumentDeclarations`, one per variant
+    :Raises:
+        TypeError
+            if ``nameconv`` and other name conversion keywords are given for
+            a variant (in `kw` and/or in the variant)
+    """
+    template = None
+    result = []
+    for variant in variants:
+        vkw = kw.copy()
+        vkw.update(variant)
+        if 'nameconv' in vkw:
+            others = sorted([k for k in vkw if k in _naming_keys and k != 'nameconv'])
+            if others:
+                raise TypeError("nameconv can't be combined with %s" % ', '.join(others))
+        if not set(variant).issubset(_naming_keys):
+            result.append(family_declarations(family, registry, vkw, extra))
+            continue
+        if template is None:
+            specs = family_specs(family, registry, kw, extra)
+            names = [name for (name, decl) in specs]
+            template = [as_dict(decl) for (name, decl) in specs]
+        nkw = dict([(k, v) for (k, v) in vkw.items() if k in _naming_keys])
+        if not 'opt_key_transform' in nkw:
+            nkw['opt_key_transform'] = False
+        columns = convert_names(names, **nkw)
+        decls = []
+        for name, decl, keys in zip(names, template, zip(*columns)):
+            decl = decl.copy()
+            decl.update(zip(_endpoint_keys, keys))
+            decls.append((name, decl))
+        result.append(SConsArguments.DeclareArguments(decls))
+    return result
+
+###############################################################################
+def proxy_value(proxy, name, default = None):
+    """Return value of argument `name` seen through an environment proxy.
+
+    :Parameters:
+        proxy
+            environment proxy, as returned by ``args.EnvProxy(env)``,
+        name : str
+            argument name,
+        default
+            value returned when the argument is not set, is ``None`` or is an
+            empty string.
+    :Returns:
+        the argument's value or `default`
+    """
     try:
-        nameconv = kw['nameconv']
+        value = proxy[name]
     except KeyError:
-        skip = ['defaults', 'name_filter', 'nameconv', 'type', 'metavar']
-        kw2 = { k:v for (k,v) in kw.iteritems() if k not in skip }
-        nameconv = SConsArguments._ArgumentNameConv(**kw2)
-    return SConsArguments.DeclareArguments(map_tuples(_callback, tuples, name_filter))
+        return default
+    if value is None or value == '':
+        return default
+    return value
+
+###############################################################################
+def choice_converter(name, choices):
+    """Return converter which accepts only values listed in `choices`.
+
+    :Parameters:
+        name : str
+            argument name, used in error messages,
+        choices : sequence
+            allowed (lowercase) values.
+    :Returns:
+        a callable of type ``converter(value) -> str``, raising `ValueError`
+        for values not in `choices`
+    """
+    choices = tuple(choices)
+    def _converter(value):
+        value = str(value).lower()
+        if value not in choices:
+            raise ValueError("invalid value for %s: %r (expected one of: %s)" %
+                             (name, value, ', '.join(choices)))
+        return value
+    return _converter
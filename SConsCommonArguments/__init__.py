@@ -5,6 +5,17 @@ This package provides definition of some commonly used SCons *arguments*
 submodules, which provide more and more predefined *arguments*
 
     - `SConsCommonArguments.CC` - common variables used with C/C++ tools
+    - `SConsCommonArguments.Launcher` - compiler launchers (ccache, sccache, distcc)
+    - `SConsCommonArguments.Jobs` - build parallelism (jobs, LTO jobs, linker threads)
+    - `SConsCommonArguments.PGO` - profile-guided and link-time optimization
+    - `SConsCommonArguments.PCH` - precompiled headers
+    - `SConsCommonArguments.Linker` - linker selection (bfd, gold, lld, mold)
+    - `SConsCommonArguments.Debug` - debug information (split DWARF, compression, gdb index)
+    - `SConsCommonArguments.Optimize` - optimization presets and target architecture
+
+The submodules are imported lazily, on first access to the corresponding
+package attribute (e.g. ``SConsCommonArguments.CC``). Use ``Families()`` to
+list available submodules without importing them.
 
 Each module provides at least two functions:
 
@@ -46,8 +57,80 @@ The typical usage pattern is (taking `CC` as example):
 
 __docformat__ = "restructuredText"
 
+import os
+import sys
+import types
+import importlib
+
+#############################################################################
+# Static manifest of argument families (submodules) provided by the package.
+# The families are imported lazily, on first attribute access, e.g.
+# ``SConsCommonArguments.CC``. Keep this in sync with the submodules.
+_families = [
+    ( 'CC',       'common variables used with C/C++ tools'),
+    ( 'Launcher', 'compiler launchers (ccache, sccache, distcc)'),
+    ( 'Jobs',     'build parallelism (jobs, LTO jobs, linker threads)'),
+    ( 'PGO',      'profile-guided and link-time optimization'),
+    ( 'PCH',      'precompiled headers'),
+    ( 'Linker',   'linker selection (bfd, gold, lld, mold)'),
+    ( 'Debug',    'debug information (split DWARF, compression, gdb index)'),
+    ( 'Optimize', 'optimization presets and target architecture'),
+]
+
+#############################################################################
+def Families():
+    """Return names of argument families provided by this package.
+
+    The submodules are not imported by this function.
+
+    :Returns:
+        the list of family (submodule) names, e.g. ``['CC']``
+    """
+    return [t[0] for t in _families]
+
+#############################################################################
+def FamilyDescription(name):
+    """Return short description of argument family `name`.
+
+    :Returns:
+        the description string; `KeyError` is raised for unknown families
+    """
+    for t in _families:
+        if t[0] == name:
+            return t[1]
+    raise KeyError(name)
+
+#############################################################################
+class _LazyPackage(types.ModuleType):
+    """Package module which imports argument families on first access"""
+    def __getattr__(self, name):
+        if name in Families():
+            return importlib.import_module('%s.%s' % (__name__, name))
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+    def __dir__(self):
+        return sorted(set(self.__dict__.keys()) | set(Families()))
+
+def _install_lazy_package():
+    module = sys.modules[__name__]
+    try:
+        # Python 3.5+
+        module.__class__ = _LazyPackage
+    except TypeError:
+        lazy = _LazyPackage(__name__, __doc__)
+        lazy.__dict__.update(module.__dict__)
+        # keep the original module alive, otherwise its globals get cleared
+        lazy.__dict__['_module'] = module
+        sys.modules[__name__] = lazy
+
+_install_lazy_package()
 
-## TODO: Place your code here
+# Opt-in profiling, see `SConsCommonArguments.Profile`.
+if os.environ.get('SCONS_COMMON_ARGS_PROFILE'):
+    _profile = importlib.import_module('%s.Profile' % __name__)
+    if _profile.ParseSetting(os.environ['SCONS_COMMON_ARGS_PROFILE']):
+        _profile.Enable(os.environ['SCONS_COMMON_ARGS_PROFILE'])
+    del _profile
 
 # Local Variables:
 # # tab-width:4
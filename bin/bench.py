@@ -0,0 +1,285 @@
+#! /usr/bin/env python
+
+#
+# Copyright (c) 2016 by Pawel Tomulik
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+
+# Benchmarks for the argument pipeline: Names(), Declarations(), Commit(),
+# Postprocess() and GenerateVariablesHelpText(). Normally invoked with
+# ``scons bench``, which sets up PYTHONPATH such that SCons and SConsArguments
+# are importable.
+
+import argparse
+import json
+import os
+import sys
+import timeit
+
+def info(msg, **kw):
+    try: quiet = kw['quiet']
+    except KeyError: quiet = False
+    if not quiet:
+        sys.stdout.write("%s: info: %s\n" % (_script, msg))
+
+def warn(msg, **kw):
+    try: quiet = kw['quiet']
+    except KeyError: quiet = False
+    if not quiet:
+        sys.stderr.write("%s: warning: %s\n" % (_script, msg))
+
+def sizes_list(s):
+    try:
+        return [int(x) for x in s.split(',')]
+    except ValueError:
+        raise argparse.ArgumentTypeError('wrong list of sizes %r' % s)
+
+def synthetic_tuples(n):
+    return [('ARG%05d' % i, 'Synthetic argument #%d' % i) for i in range(n)]
+
+def best_of(repeat, func):
+    """Run ``func() -> seconds`` `repeat` times and return the best result"""
+    return min([func() for i in range(repeat)])
+
+def timed(func, *args):
+    t0 = _timer()
+    func(*args)
+    return _timer() - t0
+
+def bench_pipeline(make_decls, names, repeat):
+    """Time the Commit/Postprocess/help phases for declarations returned by
+    ``make_decls()``."""
+    import SCons.Environment
+    import SCons.Variables
+
+    def _setup():
+        env = SCons.Environment.Environment(tools = [])
+        var = SCons.Variables.Variables()
+        return make_decls(), env, var
+
+    def _commit():
+        decls, env, var = _setup()
+        return timed(decls.Commit, env, var, True)
+
+    def _postprocess():
+        decls, env, var = _setup()
+        args = decls.Commit(env, var, True)
+        return timed(args.Postprocess, env, var, True)
+
+    def _help():
+        decls, env, var = _setup()
+        args = decls.Commit(env, var, True)
+        return timed(args.GenerateVariablesHelpText, var, env)
+
+    return { 'names'        : best_of(repeat, names),
+             'declarations' : best_of(repeat, lambda : timed(make_decls)),
+             'commit'       : best_of(repeat, _commit),
+             'postprocess'  : best_of(repeat, _postprocess),
+             'help'         : best_of(repeat, _help) }
+
+def bench_synthetic(n, repeat):
+    import SConsCommonArguments.Util
+    tuples = synthetic_tuples(n)
+    registry = SConsCommonArguments.Util.ArgumentRegistry([
+        ('progs', tuples[:n//2]),
+        ('flags', tuples[n//2:])
+    ])
+    selected = [t[0] for t in tuples[::2]]
+
+    def _decls():
+        tuples = registry.select(None, selected)
+        return SConsCommonArguments.Util.arguments_from_tuples(tuples, opt_key_transform = False)
+
+    def _names():
+        return timed(registry.names, None, selected)
+
+    return bench_pipeline(_decls, _names, repeat)
+
+def bench_cc(repeat):
+    import SConsCommonArguments.CC
+    _decls = lambda : SConsCommonArguments.CC.Declarations(use_cache = False)
+    _names = lambda : timed(SConsCommonArguments.CC.Names)
+    return bench_pipeline(_decls, _names, repeat)
+
+def bench_variants(n, repeat):
+    """Time declarations of `n` CC variants, one by one and in bulk"""
+    import SConsCommonArguments.CC
+    variants = [dict(env_key_prefix = 'V%d_' % i, var_key_prefix = 'V%d_' % i) for i in range(n)]
+
+    def _loop():
+        for v in variants:
+            SConsCommonArguments.CC.Declarations(use_cache = False, **v)
+
+    def _bulk():
+        SConsCommonArguments.CC.VariantDeclarations(variants, use_cache = False)
+
+    return { 'variants-loop'    : best_of(repeat, lambda : timed(_loop)),
+             'variants-bulk'    : best_of(repeat, lambda : timed(_bulk)) }
+
+def bench_disk_cache(repeat):
+    """Time CC.Declarations() loaded from the persistent cache in a fresh
+    process (simulated), against computing them"""
+    import shutil
+    import tempfile
+    import SConsCommonArguments.CC
+    import SConsCommonArguments.DiskCache
+    import SConsCommonArguments.Util
+    tmpdir = tempfile.mkdtemp()
+
+    def _fresh():
+        # forget everything a new SCons process wouldn't know
+        SConsCommonArguments.DiskCache._packages_digest = None
+        SConsCommonArguments.Util.declarations_cache.invalidate()
+        SConsCommonArguments.Util.enable_persistent_cache(tmpdir)
+
+    def _hit():
+        _fresh()
+        return timed(SConsCommonArguments.CC.Declarations)
+
+    def _miss():
+        _fresh()
+        SConsCommonArguments.Util.persistent_cache.prune('SConsCommonArguments.CC')
+        return timed(SConsCommonArguments.CC.Declarations)
+
+    try:
+        return { 'disk-cache-miss'  : best_of(repeat, _miss),
+                 'disk-cache-hit'   : best_of(repeat, _hit) }
+    finally:
+        SConsCommonArguments.Util.disable_persistent_cache()
+        SConsCommonArguments.Util.declarations_cache.invalidate()
+        shutil.rmtree(tmpdir)
+
+def run_benchmarks(sizes, repeat, **kw):
+    results = dict()
+    info("benchmarking CC", **kw)
+    for phase, t in bench_cc(repeat).items():
+        results['%s/CC' % phase] = t
+    info("benchmarking persistent cache of CC", **kw)
+    for phase, t in bench_disk_cache(repeat).items():
+        results['%s/CC' % phase] = t
+    info("benchmarking 16 CC variants", **kw)
+    for phase, t in bench_variants(16, repeat).items():
+        results['%s/CC16' % phase] = t
+    for n in sizes:
+        info("benchmarking %d synthetic arguments" % n, **kw)
+        for phase, t in bench_synthetic(n, repeat).items():
+            results['%s/%d' % (phase, n)] = t
+    return results
+
+def compare(results, baseline, threshold):
+    """Return list of ``(key, baseline, current)`` for results slower than
+    baseline by more than `threshold` percent"""
+    regressions = []
+    for key in sorted(results):
+        try: base = baseline[key]
+        except KeyError: continue
+        if base > 0 and results[key] > base * (1.0 + threshold / 100.0):
+            regressions.append((key, base, results[key]))
+    return regressions
+
+def write_json(filename, data):
+    dirname = os.path.dirname(filename)
+    if dirname and not os.path.exists(dirname):
+        os.makedirs(dirname)
+    with open(filename, 'w') as f:
+        json.dump(data, f, indent = 2, sort_keys = True)
+
+def main(args):
+    kw = vars(args)
+    results = run_benchmarks(args.sizes, args.repeat, **kw)
+    write_json(args.output, results)
+    info("results written to '%s'" % args.output, **kw)
+
+    if args.save_baseline:
+        write_json(args.baseline, results)
+        info("baseline written to '%s'" % args.baseline, **kw)
+        return 0
+
+    if not os.path.exists(args.baseline):
+        warn("baseline '%s' not found, skipping comparison" % args.baseline, **kw)
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+    for key, base, cur in regressions:
+        warn("%s: %.6fs -> %.6fs (+%.1f%%)" % (key, base, cur, 100.0 * (cur - base) / base))
+    if regressions:
+        warn("%d regression(s) above %g%% threshold" % (len(regressions), args.threshold))
+        return 1
+    info("no regressions above %g%% threshold" % args.threshold, **kw)
+    return 0
+
+# The script...
+_script = os.path.basename(sys.argv[0])
+_scriptabs = os.path.realpath(sys.argv[0])
+_scriptdir = os.path.dirname(_scriptabs)
+_topsrcdir = os.path.realpath(os.path.join(_scriptdir, '..'))
+_timer = timeit.default_timer
+
+_default_sizes = [10, 100, 1000, 10000]
+_default_output = os.path.join(_topsrcdir, 'build', 'bench', 'results.json')
+_default_baseline = os.path.join(_topsrcdir, 'build', 'bench', 'baseline.json')
+
+_parser = argparse.ArgumentParser(
+        prog=_script,
+        description="""\
+        This tool runs benchmarks of the scons-common-arguments argument
+        pipeline over synthetic argument sets, writes the results as JSON and
+        compares them against a stored baseline.
+        """)
+
+_parser.add_argument('--quiet',
+                      action='store_true',
+                      help='do not print messages')
+_parser.add_argument('--sizes',
+                      type=sizes_list,
+                      default=_default_sizes,
+                      metavar='N[,N...]',
+                      help='sizes of synthetic argument sets (default: %s)' % ','.join(map(str, _default_sizes)))
+_parser.add_argument('--repeat',
+                      type=int,
+                      default=5,
+                      metavar='N',
+                      help='number of repetitions, the best time is reported (default: 5)')
+_parser.add_argument('--output',
+                      default=_default_output,
+                      metavar='FILE',
+                      help='JSON file to write results to')
+_parser.add_argument('--baseline',
+                      default=_default_baseline,
+                      metavar='FILE',
+                      help='JSON file with baseline results')
+_parser.add_argument('--threshold',
+                      type=float,
+                      default=25.0,
+                      metavar='PCT',
+                      help='regression threshold in percent (default: 25)')
+_parser.add_argument('--save-baseline',
+                      action='store_true',
+                      help='store results as new baseline instead of comparing')
+
+if __name__ == '__main__':
+    sys.exit(main(_parser.parse_args()))
+
+# Local Variables:
+# # tab-width:4
+# # indent-tabs-mode:nil
+# # End:
+# vim: set syntax=python expandtab tabstop=4 shiftwidth=4:
@@ -30,6 +30,17 @@ import tarfile
 import re
 import io
 import shutil
+import hashlib
+import json
+import threading
+import time
+
+try:
+    # Python 3
+    import queue
+except ImportError:
+    # Python 2
+    import Queue as queue
 
 try:
     # Python 3
@@ -74,20 +85,216 @@ def untar(tar, **kw):
     except KeyError:    member_name_filter = lambda x : True
     try:                path = kw['path']
     except KeyError:    path = '.'
-    # Download the tar file
-    members = [m for m in tar.getmembers() if len(m.name.split('/')) > strip_components]
-    if strip_components > 0:
-        for m in members:
-            m.name = '/'.join(m.name.split('/')[strip_components:])
-
-    members = [m for m in members if member_name_filter(m.name) ]
-    tar.extractall(path = path, members = members)
+    # Extract members one by one, as they come from the (stream) tar file
+    for m in tar:
+        parts = m.name.split('/')
+        if len(parts) <= strip_components:
+            continue
+        if strip_components > 0:
+            m.name = '/'.join(parts[strip_components:])
+            if m.islnk():
+                m.linkname = '/'.join(m.linkname.split('/')[strip_components:])
+        if member_name_filter(m.name):
+            tar.extract(m, path = path)
+
+class HashingReader(object):
+    """File-like object which computes sha256 of the data being read and
+    optionally copies the data to another file"""
+    def __init__(self, fileobj, copy = None):
+        self.fileobj = fileobj
+        self.copy = copy
+        self.sha256 = hashlib.sha256()
+
+    def read(self, size = -1):
+        data = self.fileobj.read(size)
+        self.sha256.update(data)
+        if self.copy is not None:
+            self.copy.write(data)
+        return data
+
+    def drain(self):
+        while self.read(io.DEFAULT_BUFFER_SIZE):
+            pass
+
+    def hexdigest(self):
+        return self.sha256.hexdigest()
+
+def default_cache_dir():
+    try: base = os.environ['XDG_CACHE_HOME']
+    except KeyError: base = os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'scons-common-arguments', 'downloads')
+
+def makedirs(path, **kw):
+    """Create directory `path` (with parents), tolerating it being created
+    concurrently by another download thread"""
+    if os.path.isdir(path):
+        return
+    info("creating '%s'" % path, **kw)
+    try:
+        os.makedirs(path)
+    except OSError:
+        if not os.path.isdir(path):
+            raise
+
+def file_sha256(path):
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for data in iter(lambda : f.read(io.DEFAULT_BUFFER_SIZE), b''):
+            sha256.update(data)
+    return sha256.hexdigest()
+
+def is_moving_ref(ver):
+    """Whether `ver` names a branch (``master``, ``tip``, ...), whose
+    tarballs change over time, rather than a release or commit"""
+    return ver in _moving_refs
+
+class TarballCache(object):
+    """Content-addressed cache of downloaded tarballs.
+
+    Tarballs are stored as ``blobs/<sha256>``, and ``index.json`` maps
+    source URLs (which contain the version) to blob digests and download
+    times. Safe to use from several threads."""
+    _lock = threading.Lock()
+    def __init__(self, cachedir):
+        self.cachedir = cachedir
+        self.blobdir = os.path.join(cachedir, 'blobs')
+        self.indexfile = os.path.join(cachedir, 'index.json')
+
+    def _load_index(self):
+        try:
+            with open(self.indexfile) as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return dict()
+
+    def _save_index(self, index):
+        tmp = '%s.%d.tmp' % (self.indexfile, os.getpid())
+        with open(tmp, 'w') as f:
+            json.dump(index, f, indent = 2, sort_keys = True)
+        if os.path.exists(self.indexfile):
+            os.remove(self.indexfile)
+        os.rename(tmp, self.indexfile)
+
+    @staticmethod
+    def _entry(entry):
+        if isinstance(entry, dict):
+            return entry['digest'], entry.get('time', 0)
+        return entry, 0
+
+    def lookup(self, url, max_age = None):
+        """Return ``(path, digest)`` of cached tarball for `url` or ``None``;
+        entries older than `max_age` seconds are ignored"""
+        try:
+            digest, stamp = self._entry(self._load_index()[url])
+        except KeyError:
+            return None
+        if max_age is not None and time.time() - stamp > max_age:
+            return None
+        path = os.path.join(self.blobdir, digest)
+        if not os.path.isfile(path):
+            return None
+        return path, digest
+
+    def forget(self, url):
+        with self._lock:
+            index = self._load_index()
+            entry = index.pop(url, None)
+            self._save_index(index)
+        digest = None if entry is None else self._entry(entry)[0]
+        if digest is not None and digest not in [self._entry(e)[0] for e in index.values()]:
+            try: os.remove(os.path.join(self.blobdir, digest))
+            except OSError: pass
+
+    def tmpfile(self):
+        with self._lock:
+            makedirs(self.blobdir, quiet = True)
+        tmp = os.path.join(self.blobdir, 'incoming.%d.%d.tmp' % (os.getpid(), threading.current_thread().ident))
+        return tmp, open(tmp, 'wb')
+
+    def store(self, url, tmp, digest):
+        """Move downloaded `tmp` file into cache as blob `digest`"""
+        path = os.path.join(self.blobdir, digest)
+        with self._lock:
+            if os.path.exists(path):
+                os.remove(tmp)
+            else:
+                os.rename(tmp, path)
+            index = self._load_index()
+            index[url] = { 'digest' : digest, 'time' : time.time() }
+            self._save_index(index)
+
+def open_source(url, **kw):
+    """Open tarball ``kw['name']`` (e.g. ``scons-arguments-master.tar.gz``)
+    which originates from `url`, trying mirrors first"""
+    try: name = kw['name']
+    except KeyError: name = url.split('/')[-1]
+    try: mirrors = kw['mirrors'] or []
+    except KeyError: mirrors = []
+    for mirror in mirrors:
+        if '://' in mirror:
+            src = '%s/%s' % (mirror.rstrip('/'), name)
+            try:
+                return src, urlopen(src)
+            except (IOError, OSError):
+                continue
+        else:
+            src = os.path.join(mirror, name)
+            if os.path.isfile(src):
+                return src, open(src, 'rb')
+    try: offline = kw['offline']
+    except KeyError: offline = False
+    if offline:
+        raise IOError("%s not found in cache nor mirrors (offline mode)" % name)
+    return url, urlopen(url)
 
 def urluntar(url, **kw):
-    # Download the tar file
-    tar = tarfile.open(fileobj = io.BytesIO(urlopen(url).read()))
-    untar(tar, **kw)
-    tar.close()
+    """Download (or take from cache or mirrors) tarball from `url` and
+    extract it on the fly"""
+    try: cachedir = kw['cache_dir']
+    except KeyError: cachedir = None
+    cache = TarballCache(cachedir) if cachedir else None
+
+    # Tarballs of branches (e.g. 'master') change over time, so their cache
+    # entries expire after kw['cache_ttl'] seconds (default: immediately),
+    # unless we're offline
+    try: moving = kw['moving'] and not kw['offline']
+    except KeyError: moving = kw.get('moving', False)
+    try: ttl = kw['cache_ttl']
+    except KeyError: ttl = 0
+    found = cache.lookup(url, ttl if moving else None) if cache else None
+    if found:
+        path, digest = found
+        if file_sha256(path) != digest:
+            warn("cached '%s' is corrupted, removing it" % path, **kw)
+            cache.forget(url)
+        else:
+            info("using cached '%s'" % path, **kw)
+            with open(path, 'rb') as f:
+                tar = tarfile.open(fileobj = f, mode = 'r|*')
+                untar(tar, **kw)
+                tar.close()
+            return
+
+    src, fileobj = open_source(url, **kw)
+    if src != url:
+        info("using mirror '%s'" % src, **kw)
+    tmp, copy = cache.tmpfile() if cache else (None, None)
+    try:
+        reader = HashingReader(fileobj, copy)
+        tar = tarfile.open(fileobj = reader, mode = 'r|*')
+        untar(tar, **kw)
+        tar.close()
+        reader.drain()
+    except:
+        if copy is not None:
+            copy.close()
+            os.remove(tmp)
+        raise
+    finally:
+        fileobj.close()
+    if cache:
+        copy.close()
+        cache.store(url, tmp, reader.hexdigest())
 
 def info(msg, **kw):
     try: quiet = kw['quiet']
@@ -101,6 +308,11 @@ def warn(msg, **kw):
     if not quiet:
         sys.stderr.write("%s: warning: %s\n" % (_script, msg))
 
+def _fetch_kw(kw):
+    """Pick options relevant to `urluntar()` from `kw`"""
+    keys = ['quiet', 'cache_dir', 'cache_ttl', 'mirrors', 'offline']
+    return dict([(k, kw[k]) for k in keys if k in kw])
+
 def dload_scons_test(**kw):
     try: ver = kw['scons_test_version']
     except KeyError:
@@ -126,9 +338,10 @@ def dload_scons_test(**kw):
         return 0
 
     url = "https://bitbucket.org/scons/scons/get/%s.tar.gz" % ver
-    info("downloading '%s' -> '%s'" % (url, destdir))
+    info("downloading '%s' -> '%s'" % (url, destdir), **kw)
     member_name_filter = lambda s : re.match('(?:^runtest\.py$|QMTest/)', s)
-    urluntar(url, path = destdir, strip_components = 1, member_name_filter = member_name_filter)
+    urluntar(url, path = destdir, strip_components = 1, member_name_filter = member_name_filter,
+             name = 'scons-test-%s.tar.gz' % ver, moving = is_moving_ref(ver), **_fetch_kw(kw))
     return 0
 
 def dload_scons_docbook(**kw):
@@ -148,14 +361,13 @@ def dload_scons_docbook(**kw):
             shutil.rmtree(destdir)
         return 0
 
-    if not os.path.exists(destdir):
-        info("creating '%s'" % destdir, **kw)
-        os.makedirs(destdir)
+    makedirs(destdir, **kw)
 
     url = "https://bitbucket.org/dirkbaechle/scons_docbook/get/%s.tar.gz" % ver
-    info("downloading '%s' -> '%s'" % (url, destdir))
+    info("downloading '%s' -> '%s'" % (url, destdir), **kw)
     member_name_filter = lambda s : re.match('(?:^__init__\.py$|utils/|docbook-xsl-[^/]+/)', s)
-    urluntar(url, path = destdir, strip_components = 1, member_name_filter = member_name_filter)
+    urluntar(url, path = destdir, strip_components = 1, member_name_filter = member_name_filter,
+             name = 'scons-docbook-%s.tar.gz' % ver, moving = is_moving_ref(ver), **_fetch_kw(kw))
     return 0
 
 def dload_scons_arguments(**kw):
@@ -176,14 +388,13 @@ def dload_scons_arguments(**kw):
             shutil.rmtree(destdir)
         return 0
 
-    if not os.path.exists(site_scons):
-        info("creating '%s'" % site_scons, **kw)
-        os.makedirs(site_scons)
+    makedirs(site_scons, **kw)
 
     url = "https://github.com/ptomulik/scons-arguments/archive/%s.tar.gz" % ver
-    info("downloading '%s' -> '%s'" % (url, destdir))
+    info("downloading '%s' -> '%s'" % (url, destdir), **kw)
     member_name_filter = lambda s : re.match('^SConsArguments(?:/.+)?$', s)
-    urluntar(url, path = site_scons, strip_components = 1, member_name_filter = member_name_filter)
+    urluntar(url, path = site_scons, strip_components = 1, member_name_filter = member_name_filter,
+             name = 'scons-arguments-%s.tar.gz' % ver, moving = is_moving_ref(ver), **_fetch_kw(kw))
     return 0
 
 
@@ -221,6 +432,9 @@ _default_scons_docbook_version = _scons_docbook_versions[0]
 _scons_arguments_versions = [ 'master' ]
 _default_scons_arguments_version = _scons_arguments_versions[0]
 
+# branch names; their tarballs are not cached for longer than --cache-ttl
+_moving_refs = frozenset([ 'tip', 'default', 'master', 'HEAD' ])
+
 _parser = argparse.ArgumentParser(
         prog=_script,
         description="""\
@@ -258,6 +472,34 @@ _parser.add_argument('--scons-arguments-version',
                       default=_default_scons_arguments_version,
                       metavar='VER',
                       help='version of scons-arguments module to be downloaded')
+_parser.add_argument('--cache-dir',
+                      default=default_cache_dir(),
+                      metavar='DIR',
+                      help='directory to cache downloaded tarballs in (default: %(default)s)')
+_parser.add_argument('--no-cache',
+                      dest='cache_dir',
+                      action='store_const',
+                      const=None,
+                      help='do not use the tarball cache')
+_parser.add_argument('--cache-ttl',
+                      type=int,
+                      default=0,
+                      metavar='SECONDS',
+                      help='reuse cached tarballs of branches (e.g. master, tip) not older than SECONDS (default: %(default)s, always download them)')
+_parser.add_argument('--mirror',
+                      dest='mirrors',
+                      action='append',
+                      default=[],
+                      metavar='DIR|URL',
+                      help='directory or file:// URL with <package>-<version>.tar.gz tarballs, tried before the upstream URL (may be repeated)')
+_parser.add_argument('--offline',
+                      action='store_true',
+                      help='use only the cache and mirrors, never the network')
+_parser.add_argument('-j', '--jobs',
+                      type=int,
+                      default=1,
+                      metavar='N',
+                      help='fetch and extract up to N packages concurrently (0: all at once)')
 _parser.add_argument('packages',
                       metavar='PKG',
                       type=str,
@@ -265,17 +507,75 @@ _parser.add_argument('packages',
                       default = _all_packages,
                       help='package to download (%s)' % ', '.join(_all_packages))
 
-_args = _parser.parse_args()
-
-for pkg in _args.packages:
-    if pkg.lower() == 'scons-test':
-        dload_scons_test(**vars(_args))
-    elif pkg.lower() == 'scons-docbook':
-        dload_scons_docbook(**vars(_args))
-    elif pkg.lower() == 'scons-arguments':
-        dload_scons_arguments(**vars(_args))
+def run_task(pkg, func, **kw):
+    """Run ``func(**kw)`` and return ``(pkg, seconds, error)``"""
+    info("%s: started" % pkg, **kw)
+    t0 = time.time()
+    error = None
+    try:
+        func(**kw)
+    except Exception as e:
+        error = e
+    seconds = time.time() - t0
+    if error is None:
+        info("%s: done in %.2fs" % (pkg, seconds), **kw)
     else:
-        warn("unsupported package: %(pkg)r" % locals())
+        info("%s: failed after %.2fs" % (pkg, seconds), **kw)
+    return pkg, seconds, error
+
+def run_tasks(tasks, jobs = 1, **kw):
+    """Run `tasks` (a list of ``(pkg, func)`` pairs) on `jobs` threads.
+
+    Returns list of ``(pkg, seconds, error)`` triples, in order of `tasks`"""
+    results = [None] * len(tasks)
+    pending = queue.Queue()
+    for i, task in enumerate(tasks):
+        pending.put((i, task))
+
+    def worker():
+        while True:
+            try:
+                i, (pkg, func) = pending.get_nowait()
+            except queue.Empty:
+                return
+            results[i] = run_task(pkg, func, **kw)
+
+    if jobs < 1:
+        jobs = len(tasks)
+    threads = [threading.Thread(target = worker) for i in range(min(jobs, len(tasks)))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+def main(args):
+    kw = vars(args)
+    tasks = []
+    for pkg in args.packages:
+        try:
+            tasks.append((pkg, _dload_funcs[pkg.lower()]))
+        except KeyError:
+            warn("unsupported package: %(pkg)r" % locals())
+
+    t0 = time.time()
+    results = run_tasks(tasks, **kw)
+    errors = [(pkg, error) for (pkg, seconds, error) in results if error is not None]
+    if len(tasks) > 1:
+        info("%d package(s) processed in %.2fs" % (len(tasks), time.time() - t0), **kw)
+    for pkg, error in errors:
+        warn("%s: %s" % (pkg, error))
+    if errors:
+        warn("%d package(s) failed" % len(errors))
+        return 1
+    return 0
+
+_dload_funcs = { 'scons-test'      : dload_scons_test,
+                 'scons-docbook'   : dload_scons_docbook,
+                 'scons-arguments' : dload_scons_arguments }
+
+if __name__ == '__main__':
+    sys.exit(main(_parser.parse_args()))
 
 # Local Variables:
 # # tab-width:4
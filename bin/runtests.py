@@ -0,0 +1,195 @@
+#! /usr/bin/env python
+
+#
+# Copyright (c) 2016 by Pawel Tomulik
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+
+# Run end-to-end tests (test/**/sconstest-*.py) in parallel, each test in its
+# own runtest.py process with a private temporary directory, and write a
+# per-test wall-time report. Normally invoked with ``scons test
+# --test-jobs=N``, which sets up the environment required by runtest.py.
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+try:
+    # Python 3
+    import queue
+except ImportError:
+    # Python 2
+    import Queue as queue
+
+def info(msg, **kw):
+    try: quiet = kw['quiet']
+    except KeyError: quiet = False
+    if not quiet:
+        sys.stdout.write("%s: info: %s\n" % (_script, msg))
+
+def warn(msg, **kw):
+    try: quiet = kw['quiet']
+    except KeyError: quiet = False
+    if not quiet:
+        sys.stderr.write("%s: warning: %s\n" % (_script, msg))
+
+def find_tests(paths):
+    """Return sorted list of sconstest-*.py scripts found under `paths`"""
+    tests = []
+    for path in paths:
+        if os.path.isfile(path):
+            tests.append(path)
+            continue
+        for dirpath, dirnames, filenames in os.walk(path):
+            for f in filenames:
+                if f.startswith('sconstest-') and f.endswith('.py'):
+                    tests.append(os.path.join(dirpath, f))
+    return sorted(tests)
+
+def run_test(test, runtest, tmproot):
+    """Run single `test` and return ``(test, seconds, status, output)``"""
+    tmpdir = tempfile.mkdtemp(prefix = 'sconstest-', dir = tmproot)
+    env = os.environ.copy()
+    for var in ('TMPDIR', 'TEMP', 'TMP'):
+        env[var] = tmpdir
+    t0 = time.time()
+    try:
+        proc = subprocess.Popen([sys.executable, runtest, test], env = env,
+                                stdout = subprocess.PIPE, stderr = subprocess.STDOUT)
+        output = proc.communicate()[0]
+        status = proc.returncode
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors = True)
+    return test, time.time() - t0, status, output
+
+def run_tests(tests, **kw):
+    """Run `tests` on ``kw['jobs']`` worker processes, returns list of
+    results"""
+    try: jobs = kw['jobs']
+    except KeyError: jobs = 1
+    try: runtest = kw['runtest']
+    except KeyError: runtest = 'runtest.py'
+    results = []
+    lock = threading.Lock()
+    pending = queue.Queue()
+    for test in tests:
+        pending.put(test)
+    tmproot = tempfile.mkdtemp(prefix = 'runtests-')
+
+    def worker():
+        while True:
+            try:
+                test = pending.get_nowait()
+            except queue.Empty:
+                return
+            result = run_test(test, runtest, tmproot)
+            with lock:
+                results.append(result)
+                status = 'PASSED' if result[2] == 0 else 'FAILED'
+                info("%s %s (%.2fs)" % (status, test, result[1]), **kw)
+                if result[2] != 0:
+                    sys.stdout.write(result[3].decode('utf-8', 'replace'))
+
+    if jobs < 1:
+        jobs = 1
+    threads = [threading.Thread(target = worker) for i in range(min(jobs, len(tests)))]
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        shutil.rmtree(tmproot, ignore_errors = True)
+    return results
+
+def write_report(filename, results):
+    """Write per-test wall times, slowest first"""
+    dirname = os.path.dirname(filename)
+    if dirname and not os.path.exists(dirname):
+        os.makedirs(dirname)
+    with open(filename, 'w') as f:
+        for test, seconds, status, output in sorted(results, key = lambda r : -r[1]):
+            f.write("%10.3fs  %-6s  %s\n" % (seconds, 'PASSED' if status == 0 else 'FAILED', test))
+
+def main(args):
+    kw = vars(args)
+    tests = find_tests(args.paths)
+    if not tests:
+        warn("no tests found in %s" % ', '.join(args.paths))
+        return 1
+    t0 = time.time()
+    results = run_tests(tests, **kw)
+    write_report(args.report, results)
+    failed = [r[0] for r in results if r[2] != 0]
+    info("%d test(s) run in %.2fs on %d job(s), report written to '%s'" %
+         (len(results), time.time() - t0, args.jobs, args.report), **kw)
+    if failed:
+        warn("%d test(s) failed:\n  %s" % (len(failed), '\n  '.join(sorted(failed))))
+        return 1
+    return 0
+
+# The script...
+_script = os.path.basename(sys.argv[0])
+_scriptabs = os.path.realpath(sys.argv[0])
+_scriptdir = os.path.dirname(_scriptabs)
+_topsrcdir = os.path.realpath(os.path.join(_scriptdir, '..'))
+
+_parser = argparse.ArgumentParser(
+        prog=_script,
+        description="""\
+        This tool runs end-to-end tests in parallel, each one in a separate
+        runtest.py process with a private temporary directory, and writes a
+        report of per-test wall times, slowest first.
+        """)
+
+_parser.add_argument('--quiet',
+                      action='store_true',
+                      help='do not print messages')
+_parser.add_argument('-j', '--jobs',
+                      type=int,
+                      default=1,
+                      metavar='N',
+                      help='number of tests to run concurrently (default: 1)')
+_parser.add_argument('--runtest',
+                      default=os.path.join(_topsrcdir, 'runtest.py'),
+                      metavar='FILE',
+                      help='path to runtest.py')
+_parser.add_argument('--report',
+                      default=os.path.join(_topsrcdir, 'build', 'test', 'times.txt'),
+                      metavar='FILE',
+                      help='file to write per-test wall times to')
+_parser.add_argument('paths',
+                      metavar='PATH',
+                      nargs='*',
+                      default=[os.path.join(_topsrcdir, 'test')],
+                      help='test scripts or directories to search for sconstest-*.py')
+
+if __name__ == '__main__':
+    sys.exit(main(_parser.parse_args()))
+
+# Local Variables:
+# # tab-width:4
+# # indent-tabs-mode:nil
+# # End:
+# vim: set syntax=python expandtab tabstop=4 shiftwidth=4:
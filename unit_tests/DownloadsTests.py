@@ -0,0 +1,292 @@
+""" DownloadsTests
+
+Unit tests for bin/downloads.py
+"""
+
+from __future__ import absolute_import
+
+__docformat__ = "restructuredText"
+
+#
+# Copyright (c) 2015 by Pawel Tomulik
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+
+import io
+import os
+import sys
+import shutil
+import tarfile
+import tempfile
+import unittest
+
+_mock_missing = True
+try:
+    import unittest.mock as mock
+    _mock_missing = False
+except ImportError:
+    try:
+        import mock
+        _mock_missing = False
+    except ImportError:
+        pass
+
+_script = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'bin', 'downloads.py')
+
+def _load_downloads():
+    try:
+        from importlib.util import spec_from_file_location, module_from_spec
+    except ImportError:
+        import imp
+        return imp.load_source('downloads', _script)
+    spec = spec_from_file_location('downloads', _script)
+    module = module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+downloads = _load_downloads()
+
+def _mktarball(path, top, files):
+    """Create tarball `path` with `files` under `top`, like github/bitbucket
+    archives do"""
+    tmpdir = tempfile.mkdtemp()
+    try:
+        for name in files:
+            fname = os.path.join(tmpdir, top, name)
+            if not os.path.isdir(os.path.dirname(fname)):
+                os.makedirs(os.path.dirname(fname))
+            with open(fname, 'w') as f:
+                f.write('# %s\n' % name)
+        tar = tarfile.open(path, 'w:gz')
+        tar.add(os.path.join(tmpdir, top), arcname = top)
+        tar.close()
+    finally:
+        shutil.rmtree(tmpdir)
+
+#############################################################################
+class Test_makedirs(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_creates(self):
+        "makedirs(path) creates path with parents"
+        path = os.path.join(self.tmpdir, 'a', 'b')
+        downloads.makedirs(path, quiet = True)
+        self.assertTrue(os.path.isdir(path))
+
+    @unittest.skipIf(_mock_missing, "mock not installed")
+    def test_created_concurrently(self):
+        "makedirs(path) tolerates path created by another thread meanwhile"
+        path = os.path.join(self.tmpdir, 'a')
+        os.makedirs(path)
+        with mock.patch.object(downloads.os.path, 'isdir', side_effect = [False, True]):
+            downloads.makedirs(path, quiet = True)
+        self.assertTrue(os.path.isdir(path))
+
+    def test_file_in_the_way(self):
+        "makedirs(path) raises OSError if path is a file"
+        path = os.path.join(self.tmpdir, 'a')
+        open(path, 'w').close()
+        self.assertRaises(OSError, downloads.makedirs, path, quiet = True)
+
+#############################################################################
+class Test_run_tasks(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.mirror = os.path.join(self.tmpdir, 'mirror')
+        self.topsrcdir = os.path.join(self.tmpdir, 'top')
+        os.makedirs(self.mirror)
+        os.makedirs(self.topsrcdir)
+        _mktarball(os.path.join(self.mirror, 'scons-test-tip.tar.gz'), 'scons-tip',
+                   ['runtest.py', 'QMTest/TestSCons.py', 'src/other.py'])
+        _mktarball(os.path.join(self.mirror, 'scons-docbook-tip.tar.gz'), 'docbook-tip',
+                   ['__init__.py', 'utils/xsltver.py', 'README'])
+        _mktarball(os.path.join(self.mirror, 'scons-arguments-master.tar.gz'), 'scons-arguments-master',
+                   ['SConsArguments/__init__.py', 'README.md'])
+        self._saved_topsrcdir = downloads._topsrcdir
+        downloads._topsrcdir = self.topsrcdir
+
+    def tearDown(self):
+        downloads._topsrcdir = self._saved_topsrcdir
+        shutil.rmtree(self.tmpdir)
+
+    def _run(self, jobs):
+        mirror = 'file://' + self.mirror.replace(os.sep, '/')
+        tasks = sorted(downloads._dload_funcs.items())
+        return downloads.run_tasks(tasks, jobs = jobs, quiet = True, mirrors = [mirror],
+                                   offline = True, cache_dir = None)
+
+    def _check(self, results):
+        self.assertEqual([(pkg, err) for (pkg, sec, err) in results], [
+            ('scons-arguments', None), ('scons-docbook', None), ('scons-test', None)
+        ])
+        top = self.topsrcdir
+        self.assertTrue(os.path.isfile(os.path.join(top, 'runtest.py')))
+        self.assertTrue(os.path.isfile(os.path.join(top, 'QMTest', 'TestSCons.py')))
+        self.assertFalse(os.path.exists(os.path.join(top, 'src')))
+        self.assertTrue(os.path.isfile(os.path.join(top, 'site_scons', 'site_tools', 'docbook', 'utils', 'xsltver.py')))
+        self.assertFalse(os.path.exists(os.path.join(top, 'site_scons', 'site_tools', 'docbook', 'README')))
+        self.assertTrue(os.path.isfile(os.path.join(top, 'site_scons', 'SConsArguments', '__init__.py')))
+
+    def test_sequential(self):
+        "run_tasks(jobs = 1) fetches all packages from a file:// mirror"
+        self._check(self._run(1))
+
+    def test_parallel(self):
+        "run_tasks(jobs = 3) fetches all packages from a file:// mirror concurrently"
+        for i in range(5):
+            shutil.rmtree(os.path.join(self.topsrcdir))
+            os.makedirs(self.topsrcdir)
+            self._check(self._run(3))
+
+def _mklinktarball(path, top):
+    """Create tarball `path` with a file, a symbolic and a hard link to it
+    under `top`"""
+    tar = tarfile.open(path, 'w:gz')
+    data = b'# data\n'
+    info = tarfile.TarInfo('%s/dir/file.py' % top)
+    info.size = len(data)
+    tar.addfile(info, io.BytesIO(data))
+    info = tarfile.TarInfo('%s/dir/symlink.py' % top)
+    info.type = tarfile.SYMTYPE
+    info.linkname = 'file.py'
+    tar.addfile(info)
+    info = tarfile.TarInfo('%s/hardlink.py' % top)
+    info.type = tarfile.LNKTYPE
+    info.linkname = '%s/dir/file.py' % top
+    tar.addfile(info)
+    tar.close()
+
+def _file_url(path):
+    return 'file://' + os.path.abspath(path).replace(os.sep, '/')
+
+#############################################################################
+class Test_urluntar(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.srcdir = os.path.join(self.tmpdir, 'src')
+        self.cachedir = os.path.join(self.tmpdir, 'cache')
+        self.destdir = os.path.join(self.tmpdir, 'dest')
+        os.makedirs(self.srcdir)
+        self.tarball = os.path.join(self.srcdir, 'pkg-master.tar.gz')
+        _mktarball(self.tarball, 'pkg-master', ['v1.py'])
+        self.url = _file_url(self.tarball)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def fetch(self, **kw):
+        if os.path.isdir(self.destdir):
+            shutil.rmtree(self.destdir)
+        os.makedirs(self.destdir)
+        kw.setdefault('cache_dir', self.cachedir)
+        downloads.urluntar(kw.pop('url', self.url), path = self.destdir, strip_components = 1,
+                           name = 'pkg-master.tar.gz', quiet = True, **kw)
+        return sorted(os.listdir(self.destdir))
+
+    def replace_tarball(self, files):
+        os.remove(self.tarball)
+        _mktarball(self.tarball, 'pkg-master', files)
+
+    def test_cache_hit(self):
+        "urluntar() extracts cached tarball of a fixed version"
+        self.assertEqual(self.fetch(), ['v1.py'])
+        os.remove(self.tarball)
+        self.assertEqual(self.fetch(), ['v1.py'])
+        cache = downloads.TarballCache(self.cachedir)
+        path, digest = cache.lookup(self.url)
+        self.assertEqual(downloads.file_sha256(path), digest)
+
+    def test_moving_ref_expires(self):
+        "urluntar() downloads tarball of a branch again once cache_ttl expired"
+        self.fetch(moving = True)
+        self.replace_tarball(['v2.py'])
+        self.assertEqual(self.fetch(moving = True, cache_ttl = 3600), ['v1.py'])
+        self.assertEqual(self.fetch(moving = True, cache_ttl = 0), ['v2.py'])
+        self.assertEqual(self.fetch(moving = True, cache_ttl = 3600), ['v2.py'])
+
+    def test_moving_ref_offline(self):
+        "urluntar() uses cached tarball of a branch in offline mode"
+        self.fetch(moving = True)
+        os.remove(self.tarball)
+        self.assertEqual(self.fetch(moving = True, cache_ttl = 0, offline = True), ['v1.py'])
+
+    def test_corrupted_cache(self):
+        "urluntar() removes cached tarball with wrong sha256 and downloads it again"
+        self.fetch()
+        cache = downloads.TarballCache(self.cachedir)
+        path, digest = cache.lookup(self.url)
+        with open(path, 'ab') as f:
+            f.write(b'garbage')
+        self.replace_tarball(['v2.py'])
+        self.assertEqual(self.fetch(), ['v2.py'])
+        path2, digest2 = cache.lookup(self.url)
+        self.assertNotEqual(digest2, digest)
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(downloads.file_sha256(path2), digest2)
+
+    def test_mirror_fallback(self):
+        "urluntar() tries mirrors in order before the original URL"
+        mirror = os.path.join(self.tmpdir, 'mirror')
+        os.makedirs(mirror)
+        _mktarball(os.path.join(mirror, 'pkg-master.tar.gz'), 'pkg-master', ['mirrored.py'])
+        missing = os.path.join(self.tmpdir, 'missing')
+        mirrors = [missing, _file_url(missing), _file_url(mirror)]
+        self.assertEqual(self.fetch(mirrors = mirrors, cache_dir = None), ['mirrored.py'])
+        self.assertEqual(self.fetch(mirrors = [missing], cache_dir = None), ['v1.py'])
+
+    def test_offline(self):
+        "urluntar() fails in offline mode if tarball isn't cached nor mirrored"
+        self.assertRaises(IOError, self.fetch, offline = True)
+        self.assertRaises(IOError, self.fetch, offline = True, mirrors = [self.srcdir + '-missing'])
+        self.assertEqual(self.fetch(offline = True, mirrors = [self.srcdir]), ['v1.py'])
+
+    def test_links(self):
+        "urluntar() strips leading components of members and hard link targets"
+        _mklinktarball(self.tarball, 'pkg-master')
+        self.assertEqual(self.fetch(cache_dir = None), ['dir', 'hardlink.py'])
+        with open(os.path.join(self.destdir, 'hardlink.py'), 'rb') as f:
+            self.assertEqual(f.read(), b'# data\n')
+        if hasattr(os, 'symlink'):
+            self.assertEqual(os.readlink(os.path.join(self.destdir, 'dir', 'symlink.py')), 'file.py')
+
+#############################################################################
+if __name__ == "__main__":
+    ldr = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    # Load tests to test suite
+    tclasses = [ Test_makedirs,
+                 Test_run_tasks,
+                 Test_urluntar
+               ]
+
+    for tclass in tclasses:
+        suite.addTests(ldr.loadTestsFromTestCase(tclass))
+
+    if not unittest.TextTestRunner(verbosity = 2).run(suite).wasSuccessful():
+        sys.exit(1)
+
+# Local Variables:
+# # tab-width:4
+# # indent-tabs-mode:nil
+# # End:
+# vim: set syntax=python expandtab tabstop=4 shiftwidth=4:
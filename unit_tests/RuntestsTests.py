@@ -0,0 +1,156 @@
+""" RuntestsTests
+
+Unit tests for bin/runtests.py
+"""
+
+from __future__ import absolute_import
+
+__docformat__ = "restructuredText"
+
+#
+# Copyright (c) 2016 by Pawel Tomulik
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+
+import os
+import sys
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+_script = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'bin', 'runtests.py')
+
+# Stand-in for SCons' runtest.py: records the temporary directory seen by the
+# test, creates a file in it, sleeps for a while if asked to and exits with
+# the status found in the test's name (e.g. sconstest-fail-3.py exits with 3)
+_fake_runtest = r'''
+import os
+import re
+import sys
+import tempfile
+import time
+test = os.path.basename(sys.argv[1])
+tmpdir = tempfile.gettempdir()
+open(os.path.join(tmpdir, 'scratch'), 'w').close()
+with open(os.path.join(os.environ['RUNTESTS_LOG'], test + '.tmpdir'), 'w') as f:
+    f.write(tmpdir)
+if 'slow' in test:
+    time.sleep(0.5)
+m = re.search(r'fail-(\d+)', test)
+sys.stdout.write('output of %s\n' % test)
+sys.exit(int(m.group(1)) if m else 0)
+'''
+
+#############################################################################
+class Test_runtests(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.testdir = os.path.join(self.tmpdir, 'test', 'sub')
+        self.logdir = os.path.join(self.tmpdir, 'log')
+        self.runtest = os.path.join(self.tmpdir, 'runtest.py')
+        self.report = os.path.join(self.tmpdir, 'build', 'test', 'times.txt')
+        os.makedirs(self.testdir)
+        os.makedirs(self.logdir)
+        with open(self.runtest, 'w') as f:
+            f.write(_fake_runtest)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def mktests(self, names):
+        for name in names:
+            open(os.path.join(self.testdir, name), 'w').close()
+        # not a test
+        open(os.path.join(self.testdir, 'helper.py'), 'w').close()
+
+    def run_tests(self, jobs):
+        env = dict(os.environ, RUNTESTS_LOG = self.logdir)
+        cmd = [sys.executable, _script, '--quiet', '-j', str(jobs), '--runtest', self.runtest,
+               '--report', self.report, os.path.join(self.tmpdir, 'test')]
+        proc = subprocess.Popen(cmd, env = env, stdout = subprocess.PIPE, stderr = subprocess.PIPE)
+        out, err = proc.communicate()
+        return proc.returncode, out.decode('utf-8'), err.decode('utf-8')
+
+    def read_report(self):
+        with open(self.report) as f:
+            return [line.split() for line in f]
+
+    def test_private_tmpdir(self):
+        "runtests.py runs every test with its own, removed afterwards, TMPDIR"
+        names = ['sconstest-%d.py' % i for i in range(4)]
+        self.mktests(names)
+        status, out, err = self.run_tests(2)
+        self.assertEqual(status, 0)
+        tmpdirs = []
+        for name in names:
+            with open(os.path.join(self.logdir, name + '.tmpdir')) as f:
+                tmpdirs.append(f.read())
+        self.assertEqual(len(set(tmpdirs)), len(names))
+        for tmpdir in tmpdirs:
+            self.assertTrue(os.path.basename(tmpdir).startswith('sconstest-'))
+            self.assertNotEqual(os.path.dirname(tmpdir), tempfile.gettempdir())
+            self.assertFalse(os.path.exists(tmpdir))
+
+    def test_failure_status(self):
+        "runtests.py exits with non-zero status and reports failed tests"
+        self.mktests(['sconstest-ok.py', 'sconstest-fail-3.py', 'sconstest-fail-1.py'])
+        status, out, err = self.run_tests(3)
+        self.assertEqual(status, 1)
+        self.assertIn('output of sconstest-fail-3.py', out)
+        self.assertNotIn('output of sconstest-ok.py', out)
+        self.assertIn('2 test(s) failed', err)
+        os.remove(os.path.join(self.testdir, 'sconstest-fail-3.py'))
+        os.remove(os.path.join(self.testdir, 'sconstest-fail-1.py'))
+        self.assertEqual(self.run_tests(3)[0], 0)
+
+    def test_report(self):
+        "runtests.py writes wall times of all tests to report, slowest first"
+        self.mktests(['sconstest-a.py', 'sconstest-slow.py', 'sconstest-fail-2.py'])
+        self.run_tests(2)
+        report = self.read_report()
+        self.assertEqual(len(report), 3)
+        self.assertEqual(report[0][1:], ['PASSED', os.path.join(self.testdir, 'sconstest-slow.py')])
+        self.assertEqual(sorted([tuple(r[1:]) for r in report[1:]]), [
+            ('FAILED', os.path.join(self.testdir, 'sconstest-fail-2.py')),
+            ('PASSED', os.path.join(self.testdir, 'sconstest-a.py')),
+        ])
+        seconds = [float(r[0].rstrip('s')) for r in report]
+        self.assertEqual(seconds, sorted(seconds, reverse = True))
+        self.assertGreaterEqual(seconds[0], 0.5)
+
+#############################################################################
+if __name__ == "__main__":
+    ldr = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    # Load tests to test suite
+    tclasses = [ Test_runtests
+               ]
+
+    for tclass in tclasses:
+        suite.addTests(ldr.loadTestsFromTestCase(tclass))
+
+    if not unittest.TextTestRunner(verbosity = 2).run(suite).wasSuccessful():
+        sys.exit(1)
+
+# Local Variables:
+# # tab-width:4
+# # indent-tabs-mode:nil
+# # End:
+# vim: set syntax=python expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,172 @@
+""" SConsCommonArguments.CCTests
+
+Unit tests for SConsCommonArguments.CC
+"""
+
+__docformat__ = "restructuredText"
+
+#
+# Copyright (c) 2016 by Pawel Tomulik
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+
+import SConsCommonArguments.CC
+import SConsCommonArguments.Util
+import SConsArguments
+import sys
+import unittest
+
+#############################################################################
+class Test_Declarations(unittest.TestCase):
+    def setUp(self):
+        SConsCommonArguments.CC.InvalidateDeclarationsCache()
+
+    def test_declares_all_names(self):
+        "CC.Declarations() declares all CC arguments"
+        decls = SConsCommonArguments.CC.Declarations()
+        self.assertEqual(sorted(decls.keys()), sorted(SConsCommonArguments.CC.Names()))
+
+    def test_name_filter(self):
+        "CC.Declarations() declares only arguments selected by name_filter"
+        decls = SConsCommonArguments.CC.Declarations(name_filter = ['CC', 'CFLAGS'])
+        self.assertEqual(sorted(decls.keys()), ['CC', 'CFLAGS'])
+
+    def test_flag_type(self):
+        "CC.Declarations(flag_type = 'flaglist') sets converter for flags"
+        import SConsCommonArguments.Flags
+        decls = SConsCommonArguments.CC.Declarations(flag_type = 'flaglist')
+        self.assertIs(decls['CFLAGS']['converter'], SConsCommonArguments.Flags.FlagList)
+        self.assertNotIn('converter', decls['CC'])
+
+    def test_cache_hit(self):
+        "CC.Declarations() reuses cached declarations for equal keywords"
+        info = SConsCommonArguments.CC.DeclarationsCacheInfo()
+        SConsCommonArguments.CC.Declarations(env_key_prefix = 'X_')
+        SConsCommonArguments.CC.Declarations(env_key_prefix = 'X_')
+        info2 = SConsCommonArguments.CC.DeclarationsCacheInfo()
+        self.assertEqual(info2['misses'] - info['misses'], 1)
+        self.assertEqual(info2['hits'] - info['hits'], 1)
+
+    def test_results_are_independent(self):
+        "CC.Declarations() results may be updated independently"
+        decls1 = SConsCommonArguments.CC.Declarations()
+        decls1.update(SConsCommonArguments.CC.Declarations(env_key_prefix = 'X_'))
+        decls2 = SConsCommonArguments.CC.Declarations()
+        self.assertIsNot(decls1, decls2)
+        self.assertIsNot(decls1['CC'], decls2['CC'])
+
+    def test_use_cache_false(self):
+        "CC.Declarations(use_cache = False) bypasses the cache"
+        info = SConsCommonArguments.CC.DeclarationsCacheInfo()
+        SConsCommonArguments.CC.Declarations(use_cache = False)
+        self.assertEqual(SConsCommonArguments.CC.DeclarationsCacheInfo(), info)
+
+#############################################################################
+class Test_Names(unittest.TestCase):
+    def test_all(self):
+        "CC.Names() returns all CC argument names"
+        self.assertEqual(len(SConsCommonArguments.CC.Names()), 14)
+
+    def test_include_flags(self):
+        "CC.Names(include_flags = False) returns only program names"
+        self.assertEqual(SConsCommonArguments.CC.Names(include_flags = False),
+                         ['CC', 'CXX', 'LINK', 'SHCC', 'SHCXX', 'SHLINK'])
+
+    def test_name_filter(self):
+        "CC.Names() accepts sequences and glob patterns as name_filter"
+        self.assertEqual(SConsCommonArguments.CC.Names(['LINK', 'CC']), ['CC', 'LINK'])
+        self.assertEqual(SConsCommonArguments.CC.Names('SH*FLAGS'),
+                         ['SHCFLAGS', 'SHCXXFLAGS', 'SHCCFLAGS', 'SHLINKFLAGS'])
+
+#############################################################################
+class Test_VariantDeclarations(unittest.TestCase):
+    def setUp(self):
+        SConsCommonArguments.CC.InvalidateDeclarationsCache()
+        prefixes = ['%s_%s_' % (a, b) for a in ('ARM', 'X86') for b in ('DEBUG', 'RELEASE')]
+        self.variants = [dict(env_key_prefix = p, var_key_prefix = p) for p in prefixes * 4]
+
+    def plain(self, decls_list):
+        return [dict([(k, dict(d)) for (k, d) in decls.items()]) for decls in decls_list]
+
+    def test_equivalent(self):
+        "CC.VariantDeclarations() is equivalent to calling Declarations() per variant"
+        bulk = SConsCommonArguments.CC.VariantDeclarations(self.variants, flag_type = 'flaglist')
+        loop = [SConsCommonArguments.CC.Declarations(flag_type = 'flaglist', **v) for v in self.variants]
+        self.assertEqual(self.plain(bulk), self.plain(loop))
+        self.assertEqual(bulk[0]['CC']['env_key'], 'ARM_DEBUG_CC')
+
+    def test_template_computed_once(self):
+        "CC.VariantDeclarations() computes declarations once for all variants"
+        info = SConsCommonArguments.CC.DeclarationsCacheInfo()
+        SConsCommonArguments.CC.VariantDeclarations(self.variants)
+        info2 = SConsCommonArguments.CC.DeclarationsCacheInfo()
+        self.assertEqual(info2['misses'] + info2['hits'] - info['misses'] - info['hits'], 1)
+
+    def test_other_keywords(self):
+        "CC.VariantDeclarations() accepts variants with other keywords"
+        decls = SConsCommonArguments.CC.VariantDeclarations([{'name_filter' : ['CC']}, {}])
+        self.assertEqual([sorted(d.keys()) for d in decls], [['CC'], sorted(SConsCommonArguments.CC.Names())])
+
+    def test_work_counts(self):
+        "CC.VariantDeclarations() computes family keywords once, Declarations() once per variant"
+        calls = []
+        def extra(family, kw):
+            calls.append(family)
+            return SConsCommonArguments.CC._extra(family, kw)
+        registry = SConsCommonArguments.CC._registry
+        SConsCommonArguments.Util.family_declarations('SConsCommonArguments.CC', registry, {'use_cache' : False}, extra)
+        once = len(calls)
+        del calls[:]
+        SConsCommonArguments.Util.family_variant_declarations('SConsCommonArguments.CC', registry, self.variants,
+                                                              {'use_cache' : False}, extra)
+        self.assertEqual(len(calls), once)
+        del calls[:]
+        for v in self.variants:
+            SConsCommonArguments.Util.family_declarations('SConsCommonArguments.CC', registry, dict(v, use_cache = False), extra)
+        self.assertEqual(len(calls), once * len(self.variants))
+
+    def test_nameconv(self):
+        "CC.VariantDeclarations() rejects nameconv combined with other naming keywords"
+        nameconv = SConsArguments._ArgumentNameConv(env_key_prefix = 'X_')
+        self.assertRaises(TypeError, SConsCommonArguments.CC.VariantDeclarations, self.variants, nameconv = nameconv)
+        self.assertRaises(TypeError, SConsCommonArguments.CC.VariantDeclarations, [{'nameconv' : nameconv}], env_key_prefix = 'Y_')
+        decls = SConsCommonArguments.CC.VariantDeclarations([{'nameconv' : nameconv}])
+        self.assertEqual(decls[0]['CC']['env_key'], 'X_CC')
+
+#############################################################################
+if __name__ == "__main__":
+    ldr = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    # Load tests to test suite
+    tclasses = [ Test_Declarations,
+                 Test_Names,
+                 Test_VariantDeclarations
+               ]
+
+    for tclass in tclasses:
+        suite.addTests(ldr.loadTestsFromTestCase(tclass))
+
+    if not unittest.TextTestRunner(verbosity = 2).run(suite).wasSuccessful():
+        sys.exit(1)
+
+# Local Variables:
+# # tab-width:4
+# # indent-tabs-mode:nil
+# # End:
+# vim: set syntax=python expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,115 @@
+""" SConsCommonArguments.DebugTests
+
+Unit tests for SConsCommonArguments.Debug
+"""
+
+__docformat__ = "restructuredText"
+
+#
+# Copyright (c) 2016 by Pawel Tomulik
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+
+import SConsCommonArguments.Debug
+from unit_tests.SConsCommonArguments import Args
+import sys
+import unittest
+
+#############################################################################
+class Test_Declarations(unittest.TestCase):
+    def test_declarations(self):
+        "Debug.Declarations() declares debug information arguments"
+        decls = SConsCommonArguments.Debug.Declarations()
+        self.assertEqual(sorted(decls.keys()), ['COMPRESS_DEBUG', 'DEBUG_INFO', 'GDB_INDEX', 'SPLIT_DWARF'])
+        self.assertNotIn('default', decls['DEBUG_INFO'])
+        self.assertRaises(ValueError, decls['COMPRESS_DEBUG']['converter'], 'lzma')
+
+#############################################################################
+class Test_Flags(unittest.TestCase):
+    def test_gcc(self):
+        "Debug.Flags() returns GCC flags"
+        flags = SConsCommonArguments.Debug.Flags({'DEBUG_INFO' : 'line', 'SPLIT_DWARF' : 'yes',
+                                                  'COMPRESS_DEBUG' : 'zlib'}, 'gcc')
+        self.assertEqual(flags, (['-g1', '-gsplit-dwarf', '-gz=zlib'], ['-gz=zlib']))
+
+    def test_clang(self):
+        "Debug.Flags() returns Clang flags"
+        flags = SConsCommonArguments.Debug.Flags({'DEBUG_INFO' : 'line'}, 'clang')
+        self.assertEqual(flags, (['-gline-tables-only'], []))
+
+    def test_gdb_index(self):
+        "Debug.Flags() generates .gdb_index only with capable linkers"
+        self.assertEqual(SConsCommonArguments.Debug.Flags({'GDB_INDEX' : 'yes'}, 'gcc', 'lld'),
+                         (['-ggnu-pubnames'], ['-Wl,--gdb-index']))
+        self.assertEqual(SConsCommonArguments.Debug.Flags({'GDB_INDEX' : 'yes'}, 'gcc', None), ([], []))
+
+#############################################################################
+class Test_Apply(unittest.TestCase):
+    def test_apply(self):
+        "Debug.Apply() merges flags into CC flag arguments"
+        env = {'CC' : 'gcc', 'DEBUG_INFO' : 'full', 'GDB_INDEX' : 'yes',
+               'CCFLAGS' : '-O2 -g0', 'LINKFLAGS' : '-fuse-ld=gold'}
+        SConsCommonArguments.Debug.Apply(Args(), env)
+        self.assertEqual(list(env['CCFLAGS']), ['-O2', '-g', '-ggnu-pubnames'])
+        self.assertEqual(list(env['LINKFLAGS']), ['-fuse-ld=gold', '-Wl,--gdb-index'])
+
+    def test_linker_path(self):
+        "Debug.Apply() recognizes linkers given by path or with ld. prefix"
+        for linker in ('/usr/bin/ld.lld', 'ld.gold'):
+            env = {'CC' : 'gcc', 'GDB_INDEX' : 'yes', 'LINKFLAGS' : '-fuse-ld=%s' % linker}
+            SConsCommonArguments.Debug.Apply(Args(), env)
+            self.assertEqual(list(env['LINKFLAGS']), ['-fuse-ld=%s' % linker, '-Wl,--gdb-index'])
+
+    def test_prefixed(self):
+        "Debug.Apply() reads and updates prefixed arguments"
+        env = {'X_CC' : 'gcc', 'ARM_DEBUG_INFO' : 'full', 'ARM_GDB_INDEX' : 'yes',
+               'X_CCFLAGS' : '-O2 -g0', 'X_LINKFLAGS' : '-fuse-ld=gold', 'CCFLAGS' : '-g0'}
+        SConsCommonArguments.Debug.Apply(Args('ARM_'), env, Args('X_'))
+        self.assertEqual(list(env['X_CCFLAGS']), ['-O2', '-g', '-ggnu-pubnames'])
+        self.assertEqual(list(env['X_LINKFLAGS']), ['-fuse-ld=gold', '-Wl,--gdb-index'])
+        self.assertEqual(env['CCFLAGS'], '-g0')
+        self.assertNotIn('LINKFLAGS', env)
+
+    def test_unset(self):
+        "Debug.Apply() leaves flags untouched when nothing is set"
+        env = {'CC' : 'gcc', 'CCFLAGS' : '-g'}
+        SConsCommonArguments.Debug.Apply(Args(), env)
+        self.assertEqual(env, {'CC' : 'gcc', 'CCFLAGS' : '-g'})
+
+#############################################################################
+if __name__ == "__main__":
+    ldr = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    # Load tests to test suite
+    tclasses = [ Test_Declarations,
+                 Test_Flags,
+                 Test_Apply
+               ]
+
+    for tclass in tclasses:
+        suite.addTests(ldr.loadTestsFromTestCase(tclass))
+
+    if not unittest.TextTestRunner(verbosity = 2).run(suite).wasSuccessful():
+        sys.exit(1)
+
+# Local Variables:
+# # tab-width:4
+# # indent-tabs-mode:nil
+# # End:
+# vim: set syntax=python expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,159 @@
+""" SConsCommonArguments.DiskCacheTests
+
+Unit tests for SConsCommonArguments.DiskCache
+"""
+
+__docformat__ = "restructuredText"
+
+#
+# Copyright (c) 2016 by Pawel Tomulik
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+
+import SConsCommonArguments
+import SConsCommonArguments.CC
+import SConsCommonArguments.DiskCache
+import SConsCommonArguments.Util
+import SConsArguments
+import os
+import shutil
+import sys
+import tempfile
+import types
+import unittest
+
+#############################################################################
+class Test_DeclarationsDiskCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.cache = SConsCommonArguments.DiskCache.DeclarationsDiskCache(self.tmpdir)
+        self.key = ('F', (dict, (('env_key_prefix', 'X_'),)))
+        self.specs = [('CC', {'env_key' : 'X_CC', 'nargs' : 1})]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_roundtrip(self):
+        "DeclarationsDiskCache stores and loads specs"
+        self.assertIsNone(self.cache.get(self.key))
+        self.cache.put(self.key, self.specs)
+        cache2 = SConsCommonArguments.DiskCache.DeclarationsDiskCache(self.tmpdir)
+        self.assertEqual(cache2.get(self.key), self.specs)
+        self.assertEqual(cache2.info()['hits'], 1)
+
+    def test_unstable_key_bypasses_cache(self):
+        "DeclarationsDiskCache ignores keys with identity-hashed objects"
+        key = ('F', (dict, (('name_filter', lambda x : True),)))
+        self.cache.put(key, self.specs)
+        self.assertIsNone(self.cache.get(key))
+        self.assertEqual(os.listdir(self.tmpdir), [])
+
+    def test_unmarshallable_specs_bypass_cache(self):
+        "DeclarationsDiskCache ignores specs which can't be marshalled"
+        self.cache.put(self.key, [('CC', {'default' : object()})])
+        self.assertIsNone(self.cache.get(self.key))
+
+    def test_stale_entries_are_pruned(self):
+        "DeclarationsDiskCache removes entries created from other sources"
+        self.cache.put(self.key, self.specs)
+        stale = os.listdir(self.tmpdir)[0].replace(self.cache._source_digest('F'), '0' * 16)
+        os.rename(os.path.join(self.tmpdir, os.listdir(self.tmpdir)[0]), os.path.join(self.tmpdir, stale))
+        cache2 = SConsCommonArguments.DiskCache.DeclarationsDiskCache(self.tmpdir)
+        self.assertIsNone(cache2.get(self.key))
+        self.assertEqual(os.listdir(self.tmpdir), [])
+
+    def test_source_digest_covers_packages(self):
+        "DeclarationsDiskCache digest covers all modules of both packages"
+        sources = [os.path.basename(f) for f in SConsCommonArguments.DiskCache._package_sources(SConsCommonArguments)]
+        for name in ('__init__.py', 'CC.py', 'Flags.py', 'Util.py', 'DiskCache.py'):
+            self.assertIn(name, sources)
+        self.assertTrue(SConsCommonArguments.DiskCache._package_sources(SConsArguments))
+        self.assertEqual(SConsCommonArguments.DiskCache._package_sources(SConsCommonArguments.CC),
+                         [SConsCommonArguments.CC.__file__])
+
+    def test_source_digest_tracks_stamps(self):
+        "DeclarationsDiskCache digest changes with size of a family module"
+        filename = os.path.join(self.tmpdir, 'family.py')
+        with open(filename, 'w') as f:
+            f.write('# v1\n')
+        module = types.ModuleType('family')
+        module.__file__ = filename
+        sys.modules['family'] = module
+        try:
+            digest = self.cache._source_digest('family')
+            with open(filename, 'a') as f:
+                f.write('# v2\n')
+            cache2 = SConsCommonArguments.DiskCache.DeclarationsDiskCache(self.tmpdir)
+            self.assertNotEqual(cache2._source_digest('family'), digest)
+        finally:
+            del sys.modules['family']
+
+#############################################################################
+class Test_persistent_cache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        SConsCommonArguments.Util.enable_persistent_cache(self.tmpdir)
+        SConsCommonArguments.Util.declarations_cache.invalidate()
+
+    def tearDown(self):
+        SConsCommonArguments.Util.disable_persistent_cache()
+        SConsCommonArguments.Util.declarations_cache.invalidate()
+        shutil.rmtree(self.tmpdir)
+
+    def test_cached_specs(self):
+        "Util.cached_specs() consults persistent cache on memory cache miss"
+        calls = []
+        def builder():
+            calls.append(1)
+            return [('A', {'help' : 'a'})]
+        kw = {'env_key_prefix' : 'X_'}
+        SConsCommonArguments.Util.cached_specs('F', kw, builder)
+        SConsCommonArguments.Util.declarations_cache.invalidate()
+        specs = SConsCommonArguments.Util.cached_specs('F', kw, builder)
+        self.assertEqual(specs, [('A', {'help' : 'a'})])
+        self.assertEqual(len(calls), 1)
+
+    def test_variants_from_disk(self):
+        "CC.VariantDeclarations() accepts specs loaded from persistent cache"
+        SConsCommonArguments.CC.Declarations()
+        SConsCommonArguments.Util.declarations_cache.invalidate()
+        decls = SConsCommonArguments.CC.VariantDeclarations([{'env_key_prefix' : 'A_'}])
+        self.assertEqual(len(decls), 1)
+        self.assertEqual(SConsCommonArguments.Util.persistent_cache.info()['hits'], 1)
+
+#############################################################################
+if __name__ == "__main__":
+    ldr = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    # Load tests to test suite
+    tclasses = [ Test_DeclarationsDiskCache,
+                 Test_persistent_cache
+               ]
+
+    for tclass in tclasses:
+        suite.addTests(ldr.loadTestsFromTestCase(tclass))
+
+    if not unittest.TextTestRunner(verbosity = 2).run(suite).wasSuccessful():
+        sys.exit(1)
+
+# Local Variables:
+# # tab-width:4
+# # indent-tabs-mode:nil
+# # End:
+# vim: set syntax=python expandtab tabstop=4 shiftwidth=4:
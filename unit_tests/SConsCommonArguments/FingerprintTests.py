@@ -0,0 +1,131 @@
+""" SConsCommonArguments.FingerprintTests
+
+Unit tests for SConsCommonArguments.Fingerprint
+"""
+
+__docformat__ = "restructuredText"
+
+#
+# Copyright (c) 2016 by Pawel Tomulik
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+
+import SConsCommonArguments.Fingerprint
+from unit_tests.SConsCommonArguments import Args
+import gc
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+import weakref
+
+#############################################################################
+class Test_Fingerprint(unittest.TestCase):
+    def setUp(self):
+        SConsCommonArguments.Fingerprint.ClearCache()
+        self.tmpdir = tempfile.mkdtemp()
+        self.cc = os.path.join(self.tmpdir, 'fakecc')
+        with open(self.cc, 'w') as f:
+            f.write('#!/bin/sh\n')
+        os.chmod(self.cc, 0o755)
+
+    def tearDown(self):
+        SConsCommonArguments.Fingerprint.ClearCache()
+        shutil.rmtree(self.tmpdir)
+
+    def env(self, **kw):
+        env = {'CC' : 'fakecc', 'CFLAGS' : '-O2 -Wall', 'ENV' : {'PATH' : self.tmpdir}}
+        env.update(kw)
+        return env
+
+    def compute(self, env):
+        return SConsCommonArguments.Fingerprint.Compute(Args(), env)
+
+    def test_normalized(self):
+        "Fingerprint.Compute() ignores cosmetic changes of flags"
+        self.assertEqual(self.compute(self.env()), self.compute(self.env(CFLAGS = ['-O2', '-Wall', '-Wall'])))
+        self.assertNotEqual(self.compute(self.env()), self.compute(self.env(CFLAGS = '-O3 -Wall')))
+
+    def test_binary_identity(self):
+        "Fingerprint.Compute() changes when the compiler binary changes"
+        fp = self.compute(self.env())
+        with open(self.cc, 'a') as f:
+            f.write('exit 0\n')
+        self.assertNotEqual(self.compute(self.env()), fp)
+
+    def test_launcher(self):
+        "Fingerprint.Compute() includes launcher settings"
+        self.assertNotEqual(self.compute(self.env()), self.compute(self.env(CC_LAUNCHER = 'ccache')))
+
+    def test_program_launcher(self):
+        "Fingerprint.Compute() identifies the compiler behind CC='ccache fakecc'"
+        launcher = os.path.join(self.tmpdir, 'ccache')
+        with open(launcher, 'w') as f:
+            f.write('#!/bin/sh\nexec "$@"\n')
+        os.chmod(launcher, 0o755)
+        fp = self.compute(self.env(CC = 'ccache fakecc'))
+        self.assertEqual(fp, self.compute(self.env()))
+        with open(self.cc, 'a') as f:
+            f.write('exit 0\n')
+        self.assertNotEqual(self.compute(self.env(CC = 'ccache fakecc')), fp)
+
+    def test_cached(self):
+        "Fingerprint.Fingerprint() is computed once per invocation"
+        args, env = Args(), self.env()
+        fp = SConsCommonArguments.Fingerprint.Fingerprint(args, env)
+        env['CFLAGS'] = '-O0'
+        self.assertEqual(SConsCommonArguments.Fingerprint.Fingerprint(args, env), fp)
+        SConsCommonArguments.Fingerprint.ClearCache()
+        self.assertNotEqual(SConsCommonArguments.Fingerprint.Fingerprint(args, env), fp)
+
+    def test_cached_keeps_objects(self):
+        "Fingerprint.Fingerprint() keeps cached objects alive, so their ids are not recycled"
+        args = Args()
+        ref = weakref.ref(args)
+        SConsCommonArguments.Fingerprint.Fingerprint(args, self.env())
+        del args
+        gc.collect()
+        self.assertIsNotNone(ref())
+
+    def test_cache_dir(self):
+        "Fingerprint.CacheDirFor() returns per-toolchain subdirectory"
+        args, env = Args(), self.env()
+        path = SConsCommonArguments.Fingerprint.CacheDirFor(args, env, 'cache')
+        self.assertEqual(path, os.path.join('cache', SConsCommonArguments.Fingerprint.Fingerprint(args, env)[:16]))
+
+#############################################################################
+if __name__ == "__main__":
+    ldr = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    # Load tests to test suite
+    tclasses = [ Test_Fingerprint
+               ]
+
+    for tclass in tclasses:
+        suite.addTests(ldr.loadTestsFromTestCase(tclass))
+
+    if not unittest.TextTestRunner(verbosity = 2).run(suite).wasSuccessful():
+        sys.exit(1)
+
+# Local Variables:
+# # tab-width:4
+# # indent-tabs-mode:nil
+# # End:
+# vim: set syntax=python expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,280 @@
+""" SConsCommonArguments.FlagsTests
+
+Unit tests for SConsCommonArguments.Flags
+"""
+
+__docformat__ = "restructuredText"
+
+#
+# Copyright (c) 2016 by Pawel Tomulik
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+
+import SConsCommonArguments.Flags
+from unit_tests.SConsCommonArguments import Args
+import SCons.Util
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+#############################################################################
+class Test_Tokenize(unittest.TestCase):
+    def setUp(self):
+        SConsCommonArguments.Flags.ClearTokenizeCache()
+
+    def test_split(self):
+        "Flags.Tokenize() splits flags"
+        self.assertEqual(SConsCommonArguments.Flags.Tokenize('-O2  -g -Wall'), ('-O2', '-g', '-Wall'))
+
+    @unittest.skipIf(os.name == 'nt', "posix quoting")
+    def test_quoting(self):
+        "Flags.Tokenize() honors shell quoting"
+        self.assertEqual(SConsCommonArguments.Flags.Tokenize('-DNAME="a b" \'-I my dir\''), ('-DNAME=a b', '-I my dir'))
+
+    @unittest.skipIf(os.name == 'nt', "posix quoting")
+    def test_join(self):
+        "Flags.Join() quotes tokens for Flags.Tokenize()"
+        tokens = ('-O2', '-DNAME=a b', '-DQ="x"', '')
+        self.assertEqual(SConsCommonArguments.Flags.Join(['-O2', '-g']), '-O2 -g')
+        self.assertEqual(SConsCommonArguments.Flags.Tokenize(SConsCommonArguments.Flags.Join(tokens)), tokens)
+
+    def test_cached(self):
+        "Flags.Tokenize() caches results per raw string"
+        t1 = SConsCommonArguments.Flags.Tokenize('-O2 -g')
+        t2 = SConsCommonArguments.Flags.Tokenize('-O2 -g')
+        self.assertIs(t1, t2)
+        info = SConsCommonArguments.Flags.TokenizeCacheInfo()
+        self.assertEqual(info['size'], 1)
+        self.assertGreaterEqual(info['hits'], 1)
+
+#############################################################################
+class Test_FlagList(unittest.TestCase):
+    def test_string(self):
+        "Flags.FlagList() converts strings to CLVar"
+        flags = SConsCommonArguments.Flags.FlagList('-O2 -g')
+        self.assertIsInstance(flags, SCons.Util.CLVar)
+        self.assertEqual(list(flags), ['-O2', '-g'])
+
+    def test_fresh_lists(self):
+        "Flags.FlagList() returns fresh lists"
+        f1 = SConsCommonArguments.Flags.FlagList('-O2 -g')
+        f1.append('-Wall')
+        f2 = SConsCommonArguments.Flags.FlagList('-O2 -g')
+        self.assertEqual(list(f2), ['-O2', '-g'])
+
+    def test_sequence_and_none(self):
+        "Flags.FlagList() accepts sequences and None"
+        self.assertEqual(list(SConsCommonArguments.Flags.FlagList(['-g'])), ['-g'])
+        self.assertEqual(list(SConsCommonArguments.Flags.FlagList(None)), [])
+
+#############################################################################
+class Test_LinkerName(unittest.TestCase):
+    def test_linker_name(self):
+        "Flags.LinkerName() returns the linker selected with -fuse-ld="
+        self.assertEqual(SConsCommonArguments.Flags.LinkerName('-fuse-ld=gold -fuse-ld=lld'), 'lld')
+        self.assertEqual(SConsCommonArguments.Flags.LinkerName(['-fuse-ld=/usr/bin/ld.lld']), 'lld')
+        self.assertEqual(SConsCommonArguments.Flags.LinkerName('-fuse-ld=ld.gold'), 'gold')
+        self.assertIsNone(SConsCommonArguments.Flags.LinkerName('-s'))
+        self.assertIsNone(SConsCommonArguments.Flags.LinkerName(None))
+
+#############################################################################
+class Test_Postprocess(unittest.TestCase):
+    def test_postprocess(self):
+        "Flags.Postprocess() converts string flags in environment"
+        env = {'CFLAGS' : '-O2 -g', 'LINKFLAGS' : ['-s']}
+        SConsCommonArguments.Flags.Postprocess(Args(), env, ['CFLAGS', 'CXXFLAGS', 'LINKFLAGS'])
+        self.assertIsInstance(env['CFLAGS'], SCons.Util.CLVar)
+        self.assertEqual(list(env['CFLAGS']), ['-O2', '-g'])
+        self.assertEqual(env['LINKFLAGS'], ['-s'])
+        self.assertNotIn('CXXFLAGS', env)
+
+#############################################################################
+class Test_Merge(unittest.TestCase):
+    def test_dedup(self):
+        "Flags.Merge() removes duplicated paths keeping first occurrence"
+        flags, collapsed = SConsCommonArguments.Flags.Merge('-I inc -Llib -g', '-Llib -I inc -I other')
+        self.assertEqual(list(flags), ['-I', 'inc', '-Llib', '-g', '-I', 'other'])
+        self.assertEqual(collapsed, [('duplicate', '-Llib', '-Llib'), ('duplicate', '-I inc', '-I inc')])
+
+    def test_dedup_switches(self):
+        "Flags.Merge() removes duplicated switches keeping last occurrence"
+        flags, collapsed = SConsCommonArguments.Flags.Merge('-Wall -I inc -g', '-I inc -Wall -Wextra')
+        self.assertEqual(list(flags), ['-I', 'inc', '-g', '-Wall', '-Wextra'])
+        self.assertEqual(collapsed, [('duplicate', '-Wall', '-Wall'), ('duplicate', '-I inc', '-I inc')])
+
+    def test_toggles(self):
+        "Flags.Merge() resolves switches turned on and off in favor of the last one"
+        for sources, expected in [(('-fexceptions', '-fno-exceptions', '-fexceptions'), ['-fexceptions']),
+                                  (('-Wall -Werror', '-Wno-error', '-Werror'), ['-Wall', '-Werror']),
+                                  (('-O2 -fPIC', '-fno-PIC', '-fPIC -O3'), ['-fPIC', '-O3']),
+                                  (('-fPIC', '-fno-PIC'), ['-fno-PIC']),
+                                  (('-m32 -msse4', '-m64 -mno-sse4'), ['-m64', '-mno-sse4'])]:
+            flags, collapsed = SConsCommonArguments.Flags.Merge(*sources)
+            self.assertEqual(list(flags), expected)
+
+    def test_last_wins(self):
+        "Flags.Merge() resolves exclusive options in favor of the last one"
+        flags, collapsed = SConsCommonArguments.Flags.Merge('-O2 -std=c++11 -DX=1', ['-O3', '-DX=2', '-std=c++14'])
+        self.assertEqual(list(flags), ['-O3', '-DX=2', '-std=c++14'])
+        self.assertEqual(collapsed, [('overridden', '-O2', '-O3'),
+                                     ('overridden', '-std=c++11', '-std=c++14'),
+                                     ('overridden', '-DX=1', '-DX=2')])
+
+    def test_options_with_arg(self):
+        "Flags.Merge() keeps repeated options taking arguments"
+        for flags in ('-z relro -z now', '-Xclang -load -Xclang libfoo.so',
+                      '-mllvm -opt-a -mllvm -opt-b', '-T a.ld -T b.ld',
+                      '-Xlinker -rpath -Xlinker /lib', '-Xassembler -a -Xassembler -b',
+                      '-Xarch_x86_64 -msse -Xarch_x86_64 -msse4'):
+            merged, collapsed = SConsCommonArguments.Flags.Merge(flags)
+            self.assertEqual(list(merged), flags.split())
+            self.assertEqual(collapsed, [])
+
+    def test_unknown_options(self):
+        "Flags.Merge() never drops repeated unknown options"
+        flags, collapsed = SConsCommonArguments.Flags.Merge('-s -nostdlib', '-s -nostdlib -Wall -Wall')
+        self.assertEqual(list(flags), ['-s', '-nostdlib', '-s', '-nostdlib', '-Wall'])
+
+    def test_keeps_libraries(self):
+        "Flags.Merge() never drops libraries and non-option arguments"
+        flags, collapsed = SConsCommonArguments.Flags.Merge('-lfoo -lbar foo.o', '-lfoo foo.o')
+        self.assertEqual(list(flags), ['-lfoo', '-lbar', 'foo.o', '-lfoo', 'foo.o'])
+        self.assertEqual(collapsed, [])
+
+#############################################################################
+class _PostprocessArgs(object):
+    def __init__(self, values):
+        self.values = values
+    def EnvProxy(self, env):
+        return env
+    def Postprocess(self, env, variables, options = False):
+        env.update(self.values)
+
+class _Option(object):
+    def __init__(self, key):
+        self.key = key
+
+class _Variables(object):
+    def __init__(self, files, args, keys = ()):
+        self.files = files
+        self.args = args
+        self.options = [_Option(k) for k in keys]
+
+class _UpdateArgs(_PostprocessArgs):
+    """Postprocess() reads variables like SCons.Variables.Variables.Update()"""
+    def __init__(self):
+        pass
+    def Postprocess(self, env, variables, options = False):
+        values = dict()
+        for filename in variables.files:
+            with open(filename) as f:
+                exec(f.read(), {}, values)
+        values.update(variables.args)
+        env.update([(o.key, values[o.key]) for o in variables.options if o.key in values])
+
+class Test_MergePostprocess(unittest.TestCase):
+    def test_merge(self):
+        "Flags.MergePostprocess() merges flags from environment and Postprocess"
+        env = {'CFLAGS' : '-O2 -Wall', 'CXXFLAGS' : '-g'}
+        args = _PostprocessArgs({'CFLAGS' : '-O3 -Wall'})
+        report = SConsCommonArguments.Flags.MergePostprocess(args, env, None, names = ['CFLAGS', 'CXXFLAGS', 'LINKFLAGS'])
+        self.assertEqual(list(env['CFLAGS']), ['-O3', '-Wall'])
+        self.assertEqual(list(env['CXXFLAGS']), ['-g'])
+        self.assertEqual(report, {'CFLAGS' : [('overridden', '-O2', '-O3'), ('duplicate', '-Wall', '-Wall')]})
+
+    def test_variables_file(self):
+        "Flags.MergePostprocess() merges flags from variables files and command line"
+        tmpdir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(tmpdir, 'vars.py')
+            with open(filename, 'w') as f:
+                f.write("CFLAGS = '-O2 -Wall'\n")
+            variables = _Variables([filename], {'CFLAGS' : '-Wextra'})
+            env = {'CFLAGS' : '-g'}
+            args = _PostprocessArgs({'CFLAGS' : '-Wextra'})
+            SConsCommonArguments.Flags.MergePostprocess(args, env, variables, names = ['CFLAGS'])
+            self.assertEqual(list(env['CFLAGS']), ['-g', '-O2', '-Wall', '-Wextra'])
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def test_variables_file_read_once(self):
+        "Flags.MergePostprocess() reads variables files once"
+        tmpdir = tempfile.mkdtemp()
+        try:
+            counter = os.path.join(tmpdir, 'counter')
+            filename = os.path.join(tmpdir, 'vars.py')
+            with open(filename, 'w') as f:
+                f.write("open(%r, 'a').write('x')\n" % counter)
+                f.write("CFLAGS = '-O2 -Wall'\nCXXFLAGS = '-g'\n")
+            arguments = {'CFLAGS' : '-Wextra'}
+            variables = _Variables([filename], arguments, ['CFLAGS', 'CXXFLAGS'])
+            env = {'CFLAGS' : '-O0'}
+            SConsCommonArguments.Flags.MergePostprocess(_UpdateArgs(), env, variables, names = ['CFLAGS', 'CXXFLAGS'])
+            with open(counter) as f:
+                self.assertEqual(f.read(), 'x')
+            self.assertEqual(list(env['CFLAGS']), ['-O2', '-Wall', '-Wextra'])
+            self.assertEqual(list(env['CXXFLAGS']), ['-g'])
+            self.assertEqual(variables.files, [filename])
+            self.assertIs(variables.args, arguments)
+        finally:
+            shutil.rmtree(tmpdir)
+
+#############################################################################
+class Test_MergeInto(unittest.TestCase):
+    def test_merge_into(self):
+        "Flags.MergeInto() merges generated flags into flag arguments"
+        env = {'CCFLAGS' : '-O2 -flto=4 -g'}
+        report = SConsCommonArguments.Flags.MergeInto(Args(), env, ['CCFLAGS', 'SHCCFLAGS'], ['-flto=thin'])
+        self.assertEqual(list(env['CCFLAGS']), ['-O2', '-g', '-flto=thin'])
+        self.assertEqual(list(env['SHCCFLAGS']), ['-flto=thin'])
+        self.assertEqual(report, {'CCFLAGS' : [('overridden', '-flto=4', '-flto=thin')]})
+
+    def test_keeps_options_with_arg(self):
+        "Flags.MergeInto() keeps repeated options with arguments already present"
+        env = {'LINKFLAGS' : '-z relro -z now -mllvm -a -mllvm -b'}
+        SConsCommonArguments.Flags.MergeInto(Args(), env, ['LINKFLAGS'], ['-fuse-ld=lld'])
+        self.assertEqual(list(env['LINKFLAGS']), ['-z', 'relro', '-z', 'now', '-mllvm', '-a', '-mllvm', '-b', '-fuse-ld=lld'])
+
+#############################################################################
+if __name__ == "__main__":
+    ldr = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    # Load tests to test suite
+    tclasses = [ Test_Tokenize,
+                 Test_FlagList,
+                 Test_LinkerName,
+                 Test_Postprocess,
+                 Test_Merge,
+                 Test_MergePostprocess,
+                 Test_MergeInto
+               ]
+
+    for tclass in tclasses:
+        suite.addTests(ldr.loadTestsFromTestCase(tclass))
+
+    if not unittest.TextTestRunner(verbosity = 2).run(suite).wasSuccessful():
+        sys.exit(1)
+
+# Local Variables:
+# # tab-width:4
+# # indent-tabs-mode:nil
+# # End:
+# vim: set syntax=python expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,166 @@
+""" SConsCommonArguments.IncrementalTests
+
+Unit tests for SConsCommonArguments.Incremental
+"""
+
+__docformat__ = "restructuredText"
+
+#
+# Copyright (c) 2016 by Pawel Tomulik
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+
+import SConsCommonArguments.Incremental
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+#############################################################################
+class _Variables(object):
+    def __init__(self, args, options = None):
+        self.args = args
+        self.files = []
+        self.options = options or []
+
+class _Option(object):
+    """Variable converting values to upper case and logging calls"""
+    def __init__(self, key, log):
+        self.key = key
+        self.log = log
+    def converter(self, value):
+        self.log.append(('converter', self.key))
+        return value.upper()
+    def validator(self, key, value, env):
+        self.log.append(('validator', key))
+
+class _Args(object):
+    def __init__(self):
+        self.postprocessed = 0
+    def EnvProxy(self, env):
+        return env
+    def Postprocess(self, env, variables, options = False):
+        self.postprocessed += 1
+        env.update(variables.args)
+        for option in variables.options:
+            if option.key in variables.args:
+                env[option.key] = option.converter(env[option.key])
+                option.validator(option.key, env[option.key], env)
+
+class Test_Postprocess(unittest.TestCase):
+    def test_first_run(self):
+        "Incremental.Postprocess() reports all resolved names on first run"
+        args, env = _Args(), {'CC' : 'org_cc'}
+        snap = SConsCommonArguments.Incremental.Snapshot()
+        changed = SConsCommonArguments.Incremental.Postprocess(args, env, _Variables({'CXX' : 'g++'}), names = ['CC', 'CXX', 'LINK'], snapshot = snap)
+        self.assertEqual(changed, ['CC', 'CXX'])
+        self.assertEqual(args.postprocessed, 1)
+
+    def test_unchanged_inputs_skip_postprocess(self):
+        "Incremental.Postprocess() applies snapshot when inputs didn't change"
+        snap = SConsCommonArguments.Incremental.Snapshot()
+        SConsCommonArguments.Incremental.Postprocess(_Args(), {'CC' : 'org_cc'}, _Variables({'CXX' : 'g++'}), names = ['CC', 'CXX'], snapshot = snap)
+        args, env = _Args(), {'CC' : 'org_cc'}
+        changed = SConsCommonArguments.Incremental.Postprocess(args, env, _Variables({'CXX' : 'g++'}), names = ['CC', 'CXX'], snapshot = snap)
+        self.assertEqual(changed, [])
+        self.assertEqual(args.postprocessed, 0)
+        self.assertEqual(env, {'CC' : 'org_cc', 'CXX' : 'g++'})
+
+    def test_changed_inputs(self):
+        "Incremental.Postprocess() reports changed arguments"
+        snap = SConsCommonArguments.Incremental.Snapshot()
+        SConsCommonArguments.Incremental.Postprocess(_Args(), {'CC' : 'org_cc'}, _Variables({'CXX' : 'g++'}), names = ['CC', 'CXX'], snapshot = snap)
+        args, env = _Args(), {'CC' : 'org_cc'}
+        changed = SConsCommonArguments.Incremental.Postprocess(args, env, _Variables({'CXX' : 'clang++'}), names = ['CC', 'CXX'], snapshot = snap)
+        self.assertEqual(changed, ['CXX'])
+        self.assertEqual(args.postprocessed, 1)
+
+    def test_changed_keys_only(self):
+        "Incremental.Postprocess() converts and validates only arguments whose variables changed"
+        log = []
+        options = [_Option('CC', log), _Option('CXX', log)]
+        snap = SConsCommonArguments.Incremental.Snapshot()
+        SConsCommonArguments.Incremental.Postprocess(_Args(), {}, _Variables({'CC' : 'gcc', 'CXX' : 'g++'}, options), names = ['CC', 'CXX'], snapshot = snap)
+        del log[:]
+        args, env = _Args(), {}
+        changed = SConsCommonArguments.Incremental.Postprocess(args, env, _Variables({'CC' : 'gcc', 'CXX' : 'clang++'}, options), names = ['CC', 'CXX'], snapshot = snap)
+        self.assertEqual(changed, ['CXX'])
+        self.assertEqual(args.postprocessed, 0)
+        self.assertEqual(log, [('converter', 'CXX'), ('validator', 'CXX')])
+        self.assertEqual(env, {'CC' : 'GCC', 'CXX' : 'CLANG++'})
+
+    def test_removed_variable(self):
+        "Incremental.Postprocess() restores environment value when a variable is removed"
+        log = []
+        options = [_Option('CC', log), _Option('CXX', log)]
+        snap = SConsCommonArguments.Incremental.Snapshot()
+        SConsCommonArguments.Incremental.Postprocess(_Args(), {'CXX' : 'c++'}, _Variables({'CC' : 'gcc', 'CXX' : 'g++'}, options), names = ['CC', 'CXX'], snapshot = snap)
+        del log[:]
+        args, env = _Args(), {'CXX' : 'c++'}
+        changed = SConsCommonArguments.Incremental.Postprocess(args, env, _Variables({'CC' : 'gcc'}, options), names = ['CC', 'CXX'], snapshot = snap)
+        self.assertEqual(changed, ['CXX'])
+        self.assertEqual(args.postprocessed, 0)
+        self.assertEqual(log, [])
+        self.assertEqual(env, {'CC' : 'GCC', 'CXX' : 'c++'})
+
+    def test_changed_common_inputs(self):
+        "Incremental.Postprocess() runs full postprocessing when variable files change"
+        log = []
+        options = [_Option('CC', log)]
+        snap = SConsCommonArguments.Incremental.Snapshot()
+        SConsCommonArguments.Incremental.Postprocess(_Args(), {}, _Variables({'CC' : 'gcc'}, options), names = ['CC'], snapshot = snap)
+        variables = _Variables({'CC' : 'gcc'}, options)
+        variables.files = ['nosuchfile.py']
+        args = _Args()
+        SConsCommonArguments.Incremental.Postprocess(args, {}, variables, names = ['CC'], snapshot = snap)
+        self.assertEqual(args.postprocessed, 1)
+
+    def test_snapshot_file(self):
+        "Incremental.Postprocess() keeps snapshot in a file"
+        tmpdir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(tmpdir, 'sub', 'snapshot.json')
+            SConsCommonArguments.Incremental.Postprocess(_Args(), {}, _Variables({'CC' : 'gcc'}), names = ['CC'], snapshot = filename)
+            args = _Args()
+            changed = SConsCommonArguments.Incremental.Postprocess(args, {}, _Variables({'CC' : 'gcc'}), names = ['CC'], snapshot = filename)
+        finally:
+            shutil.rmtree(tmpdir)
+        self.assertEqual(changed, [])
+        self.assertEqual(args.postprocessed, 0)
+
+#############################################################################
+if __name__ == "__main__":
+    ldr = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    # Load tests to test suite
+    tclasses = [ Test_Postprocess
+               ]
+
+    for tclass in tclasses:
+        suite.addTests(ldr.loadTestsFromTestCase(tclass))
+
+    if not unittest.TextTestRunner(verbosity = 2).run(suite).wasSuccessful():
+        sys.exit(1)
+
+# Local Variables:
+# # tab-width:4
+# # indent-tabs-mode:nil
+# # End:
+# vim: set syntax=python expandtab tabstop=4 shiftwidth=4:
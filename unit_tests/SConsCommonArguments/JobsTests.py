@@ -0,0 +1,193 @@
+""" SConsCommonArguments.JobsTests
+
+Unit tests for SConsCommonArguments.Jobs
+"""
+
+__docformat__ = "restructuredText"
+
+#
+# Copyright (c) 2016 by Pawel Tomulik
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+
+import SConsCommonArguments.Jobs
+from unit_tests.SConsCommonArguments import Args
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+#############################################################################
+class Test_AvailableCPUs(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, name, data):
+        filename = os.path.join(self.root, name)
+        if not os.path.isdir(os.path.dirname(filename)):
+            os.makedirs(os.path.dirname(filename))
+        with open(filename, 'w') as f:
+            f.write(data)
+
+    def test_available(self):
+        "Jobs.AvailableCPUs() returns a positive number"
+        self.assertGreaterEqual(SConsCommonArguments.Jobs.AvailableCPUs(), 1)
+
+    def quota(self):
+        return SConsCommonArguments.Jobs._cgroup_quota(self.root, os.path.join(self.root, 'proc'))
+
+    def test_cgroup_v2(self):
+        "Jobs._cgroup_quota() reads cgroup v2 cpu.max"
+        self.write('cpu.max', '250000 100000\n')
+        self.assertEqual(self.quota(), 3)
+        self.write('cpu.max', 'max 100000\n')
+        self.assertIsNone(self.quota())
+
+    def test_cgroup_v2_own(self):
+        "Jobs._cgroup_quota() reads cpu.max of process' own cgroup and its parents"
+        self.write('proc', '0::/build.slice/job.scope\n')
+        self.write('cgroup.controllers', 'cpu\n')
+        self.write('build.slice/job.scope/cpu.max', '150000 100000\n')
+        self.assertEqual(self.quota(), 2)
+        self.write('build.slice/cpu.max', '100000 100000\n')
+        self.assertEqual(self.quota(), 1)
+        self.write('build.slice/job.scope/cpu.max', 'max 100000\n')
+        self.write('build.slice/cpu.max', 'max 100000\n')
+        self.assertIsNone(self.quota())
+
+    def test_cgroup_v1(self):
+        "Jobs._cgroup_quota() reads cgroup v1 cpu.cfs_quota_us"
+        self.write('cpu/cpu.cfs_quota_us', '200000\n')
+        self.write('cpu/cpu.cfs_period_us', '100000\n')
+        self.assertEqual(self.quota(), 2)
+        self.write('cpu/cpu.cfs_quota_us', '-1\n')
+        self.assertIsNone(self.quota())
+
+    def test_cgroup_v1_own(self):
+        "Jobs._cgroup_quota() reads cpu.cfs_quota_us of process' own cgroup"
+        self.write('proc', '5:memory:/docker/abc\n4:cpu,cpuacct:/docker/abc\n')
+        self.write('cpu,cpuacct/docker/abc/cpu.cfs_quota_us', '400000\n')
+        self.write('cpu,cpuacct/docker/abc/cpu.cfs_period_us', '100000\n')
+        self.write('cpu,cpuacct/cpu.cfs_quota_us', '-1\n')
+        self.write('cpu,cpuacct/cpu.cfs_period_us', '100000\n')
+        self.assertEqual(self.quota(), 4)
+
+#############################################################################
+class Test_Declarations(unittest.TestCase):
+    def test_defaults(self):
+        "Jobs.Declarations() computes defaults from available CPUs"
+        decls = SConsCommonArguments.Jobs.Declarations()
+        cpus = SConsCommonArguments.Jobs.AvailableCPUs()
+        self.assertEqual(sorted(decls.keys()), ['JOBS', 'LINK_THREADS', 'LTO_JOBS'])
+        self.assertEqual(decls['JOBS']['default'], cpus)
+        self.assertIs(decls['JOBS']['converter'], SConsCommonArguments.Jobs.Count)
+
+    def test_user_defaults(self):
+        "Jobs.Declarations() prefers user-specified defaults"
+        decls = SConsCommonArguments.Jobs.Declarations(defaults = {'JOBS' : 2})
+        self.assertEqual(decls['JOBS']['default'], 2)
+
+    def test_count(self):
+        "Jobs.Count() accepts positive numbers only"
+        self.assertEqual(SConsCommonArguments.Jobs.Count('4'), 4)
+        self.assertRaises(ValueError, SConsCommonArguments.Jobs.Count, '0')
+        self.assertRaises(ValueError, SConsCommonArguments.Jobs.Count, 'x')
+
+#############################################################################
+class Test_Apply(unittest.TestCase):
+    def apply(self, **env):
+        env.setdefault('CC', 'gcc')
+        SConsCommonArguments.Jobs.Apply(Args(), env, set_option = False)
+        return env
+
+    def test_lto_jobs(self):
+        "Jobs.Apply() sets LTO partition jobs"
+        env = self.apply(LTO_JOBS = '4', LINKFLAGS = '-flto -O2', SHLINKFLAGS = '-flto=thin')
+        self.assertEqual(list(env['LINKFLAGS']), ['-flto=4', '-O2'])
+        self.assertEqual(list(env['SHLINKFLAGS']), ['-flto=thin', '-Wl,--thinlto-jobs=4'])
+
+    def test_lto_jobs_clang(self):
+        "Jobs.Apply() leaves Clang's full LTO flag untouched"
+        env = self.apply(CC = 'clang', LTO_JOBS = '4', LINKFLAGS = '-flto -O2', SHLINKFLAGS = '-flto=thin')
+        self.assertEqual(env['LINKFLAGS'], '-flto -O2')
+        self.assertEqual(list(env['SHLINKFLAGS']), ['-flto=thin', '-Wl,--thinlto-jobs=4'])
+        env = {'LTO_JOBS' : '4', 'LINKFLAGS' : '-flto'}
+        SConsCommonArguments.Jobs.Apply(Args(), env, set_option = False, family = 'clang')
+        self.assertEqual(env['LINKFLAGS'], '-flto')
+
+    def test_no_lto(self):
+        "Jobs.Apply() leaves flags without LTO untouched"
+        env = self.apply(LTO_JOBS = 4, LINKFLAGS = '-O2')
+        self.assertEqual(env['LINKFLAGS'], '-O2')
+
+    def test_link_threads(self):
+        "Jobs.Apply() adds linker-specific thread options"
+        env = self.apply(LINK_THREADS = 8, LINKFLAGS = '-fuse-ld=lld', SHLINKFLAGS = '-fuse-ld=gold')
+        self.assertEqual(list(env['LINKFLAGS']), ['-fuse-ld=lld', '-Wl,--threads=8'])
+        self.assertEqual(list(env['SHLINKFLAGS']), ['-fuse-ld=gold', '-Wl,--threads', '-Wl,--thread-count=8'])
+        env = self.apply(LINK_THREADS = 8, LINKFLAGS = '-fuse-ld=/usr/bin/ld.lld')
+        self.assertEqual(list(env['LINKFLAGS']), ['-fuse-ld=/usr/bin/ld.lld', '-Wl,--threads=8'])
+
+    def test_explicit_lto_jobs(self):
+        "Jobs.Apply() keeps job counts set by user"
+        env = self.apply(LTO_JOBS = 4, LINKFLAGS = '-flto=jobserver', SHLINKFLAGS = '-flto=2')
+        self.assertEqual(env['LINKFLAGS'], '-flto=jobserver')
+        self.assertEqual(env['SHLINKFLAGS'], '-flto=2')
+        env = self.apply(LTO_JOBS = 4, LINK_THREADS = 8, LINKFLAGS = '-flto=thin -Wl,--thinlto-jobs=1 -fuse-ld=lld -Wl,--threads=2')
+        self.assertEqual(env['LINKFLAGS'], '-flto=thin -Wl,--thinlto-jobs=1 -fuse-ld=lld -Wl,--threads=2')
+
+    def test_prefixed(self):
+        "Jobs.Apply() reads and updates prefixed arguments"
+        env = {'ARM_LTO_JOBS' : '4', 'ARM_LINK_THREADS' : '8', 'X_LINKFLAGS' : '-flto -fuse-ld=lld',
+               'X_CC' : 'gcc', 'LINKFLAGS' : '-flto', 'LTO_JOBS' : '2', 'CC' : 'clang'}
+        SConsCommonArguments.Jobs.Apply(Args('ARM_'), env, Args('X_'), set_option = False)
+        self.assertEqual(list(env['X_LINKFLAGS']), ['-flto=4', '-fuse-ld=lld', '-Wl,--threads=8'])
+        self.assertEqual(env['LINKFLAGS'], '-flto')
+
+    def test_idempotent(self):
+        "Jobs.Apply() may be applied repeatedly"
+        env = self.apply(LINK_THREADS = 8, LTO_JOBS = 2, LINKFLAGS = '-flto -fuse-ld=mold')
+        SConsCommonArguments.Jobs.Apply(Args(), env, set_option = False)
+        self.assertEqual(list(env['LINKFLAGS']), ['-flto=2', '-fuse-ld=mold', '-Wl,--thread-count=8'])
+
+#############################################################################
+if __name__ == "__main__":
+    ldr = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    # Load tests to test suite
+    tclasses = [ Test_AvailableCPUs,
+                 Test_Declarations,
+                 Test_Apply
+               ]
+
+    for tclass in tclasses:
+        suite.addTests(ldr.loadTestsFromTestCase(tclass))
+
+    if not unittest.TextTestRunner(verbosity = 2).run(suite).wasSuccessful():
+        sys.exit(1)
+
+# Local Variables:
+# # tab-width:4
+# # indent-tabs-mode:nil
+# # End:
+# vim: set syntax=python expandtab tabstop=4 shiftwidth=4:
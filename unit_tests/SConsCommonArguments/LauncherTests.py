@@ -0,0 +1,115 @@
+""" SConsCommonArguments.LauncherTests
+
+Unit tests for SConsCommonArguments.Launcher
+"""
+
+__docformat__ = "restructuredText"
+
+#
+# Copyright (c) 2016 by Pawel Tomulik
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+
+import SConsCommonArguments.Launcher
+from unit_tests.SConsCommonArguments import Args
+import sys
+import unittest
+
+#############################################################################
+class Test_Declarations(unittest.TestCase):
+    def test_declares_all_names(self):
+        "Launcher.Declarations() declares all launcher arguments"
+        decls = SConsCommonArguments.Launcher.Declarations()
+        self.assertEqual(sorted(decls.keys()), sorted(SConsCommonArguments.Launcher.Names()))
+
+    def test_include_cache(self):
+        "Launcher.Declarations(include_cache = False) skips cache settings"
+        decls = SConsCommonArguments.Launcher.Declarations(include_cache = False)
+        self.assertEqual(sorted(decls.keys()), ['CC_LAUNCHER', 'CXX_LAUNCHER', 'LINK_LAUNCHER'])
+
+    def test_prefix(self):
+        "Launcher.Declarations() respects env_key_prefix"
+        decls = SConsCommonArguments.Launcher.Declarations(env_key_prefix = 'ARM_')
+        self.assertEqual(decls['CC_LAUNCHER']['env_key'], 'ARM_CC_LAUNCHER')
+
+#############################################################################
+class Test_Inject(unittest.TestCase):
+    def test_inject(self):
+        "Launcher.Inject() prepends launchers to programs"
+        env = {'CC' : 'gcc', 'SHCC' : 'gcc -fPIC', 'CXX' : ['g++'], 'LINK' : 'g++',
+               'CC_LAUNCHER' : 'ccache', 'CXX_LAUNCHER' : 'ccache', 'ENV' : {}}
+        updated = SConsCommonArguments.Launcher.Inject(Args(), env)
+        self.assertEqual(updated, ['CC', 'SHCC', 'CXX'])
+        self.assertEqual(env['CC'], 'ccache gcc')
+        self.assertEqual(env['SHCC'], 'ccache gcc -fPIC')
+        self.assertEqual(list(env['CXX']), ['ccache', 'g++'])
+        self.assertEqual(env['LINK'], 'g++')
+
+    def test_not_twice(self):
+        "Launcher.Inject() never applies a launcher twice"
+        env = {'CC' : 'gcc', 'CXX' : 'distcc g++', 'CC_LAUNCHER' : '/usr/bin/ccache',
+               'CXX_LAUNCHER' : 'ccache', 'ENV' : {}}
+        SConsCommonArguments.Launcher.Inject(Args(), env)
+        updated = SConsCommonArguments.Launcher.Inject(Args(), env)
+        self.assertEqual(updated, [])
+        self.assertEqual(env['CC'], '/usr/bin/ccache gcc')
+        self.assertEqual(env['CXX'], 'distcc g++')
+
+    def test_empty(self):
+        "Launcher.Inject() skips empty programs and launchers"
+        env = {'CC' : [], 'CXX' : '', 'LINK' : 'g++', 'CC_LAUNCHER' : 'ccache',
+               'CXX_LAUNCHER' : 'ccache', 'LINK_LAUNCHER' : [], 'ENV' : {}}
+        self.assertEqual(SConsCommonArguments.Launcher.Inject(Args(), env), [])
+        self.assertEqual(env['CC'], [])
+        self.assertEqual(env['LINK'], 'g++')
+
+    def test_prefixed(self):
+        "Launcher.Inject() works with prefixed endpoint names"
+        env = {'ARM_CC' : 'arm-gcc', 'CC' : 'gcc', 'X_CC_LAUNCHER' : 'sccache', 'ENV' : {}}
+        SConsCommonArguments.Launcher.Inject(Args('X_'), env, Args('ARM_'))
+        self.assertEqual(env['ARM_CC'], 'sccache arm-gcc')
+        self.assertEqual(env['CC'], 'gcc')
+
+    def test_cache_settings(self):
+        "Launcher.Inject() exports cache settings for known launchers"
+        env = {'CC' : 'gcc', 'CC_LAUNCHER' : 'ccache', 'LAUNCHER_CACHE_DIR' : '/tmp/cc',
+               'LAUNCHER_CACHE_SIZE' : '5G', 'ENV' : {}}
+        SConsCommonArguments.Launcher.Inject(Args(), env)
+        self.assertEqual(env['ENV'], {'CCACHE_DIR' : '/tmp/cc', 'CCACHE_MAXSIZE' : '5G'})
+
+#############################################################################
+if __name__ == "__main__":
+    ldr = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    # Load tests to test suite
+    tclasses = [ Test_Declarations,
+                 Test_Inject
+               ]
+
+    for tclass in tclasses:
+        suite.addTests(ldr.loadTestsFromTestCase(tclass))
+
+    if not unittest.TextTestRunner(verbosity = 2).run(suite).wasSuccessful():
+        sys.exit(1)
+
+# Local Variables:
+# # tab-width:4
+# # indent-tabs-mode:nil
+# # End:
+# vim: set syntax=python expandtab tabstop=4 shiftwidth=4:
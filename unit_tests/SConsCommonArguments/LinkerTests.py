@@ -0,0 +1,139 @@
+""" SConsCommonArguments.LinkerTests
+
+Unit tests for SConsCommonArguments.Linker
+"""
+
+__docformat__ = "restructuredText"
+
+#
+# Copyright (c) 2016 by Pawel Tomulik
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+
+import SConsCommonArguments.Linker
+from unit_tests.SConsCommonArguments import Args
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+#############################################################################
+_fake_cc = r"""#!/bin/sh
+echo "$@" >> "%(log)s"
+case "$*" in
+  *-fuse-ld=lld*|*-fuse-ld=gold*|*-fuse-ld=bfd*) echo "GNU ld" ;;
+  *) exit 1 ;;
+esac
+"""
+
+@unittest.skipIf(os.name == 'nt', "requires POSIX shell")
+class Test_AvailableLinkers(unittest.TestCase):
+    def setUp(self):
+        SConsCommonArguments.Linker._available.clear()
+        self.tmpdir = tempfile.mkdtemp()
+        self.log = os.path.join(self.tmpdir, 'log')
+        self.cc = os.path.join(self.tmpdir, 'fakecc')
+        with open(self.cc, 'w') as f:
+            f.write(_fake_cc % {'log' : self.log})
+        os.chmod(self.cc, 0o755)
+        self.cache_dir = os.path.join(self.tmpdir, 'cache')
+
+    def tearDown(self):
+        SConsCommonArguments.Linker._available.clear()
+        shutil.rmtree(self.tmpdir)
+
+    def calls(self):
+        with open(self.log) as f:
+            return len(f.readlines())
+
+    def test_detect(self):
+        "Linker.AvailableLinkers() asks compiler driver for linkers"
+        linkers = SConsCommonArguments.Linker.AvailableLinkers('fakecc', self.tmpdir, self.cache_dir)
+        self.assertEqual(linkers, ['lld', 'gold', 'bfd'])
+
+    def test_cached(self):
+        "Linker.AvailableLinkers() caches results in memory and on disk"
+        SConsCommonArguments.Linker.AvailableLinkers('fakecc', self.tmpdir, self.cache_dir)
+        calls = self.calls()
+        SConsCommonArguments.Linker.AvailableLinkers('fakecc', self.tmpdir, self.cache_dir)
+        SConsCommonArguments.Linker._available.clear()
+        linkers = SConsCommonArguments.Linker.AvailableLinkers('fakecc', self.tmpdir, self.cache_dir)
+        self.assertEqual(self.calls(), calls)
+        self.assertEqual(linkers, ['lld', 'gold', 'bfd'])
+
+    def test_executables(self):
+        "Linker.AvailableLinkers() searches for linker executables without compiler"
+        os.symlink(self.cc, os.path.join(self.tmpdir, 'ld.gold'))
+        self.assertEqual(SConsCommonArguments.Linker.AvailableLinkers(None, self.tmpdir, False), ['gold'])
+
+    def test_apply_auto(self):
+        "Linker.Apply() picks the fastest available linker for LINKER=auto"
+        env = {'LINK' : 'fakecc', 'LINKER' : 'auto', 'LINKFLAGS' : '-fuse-ld=bfd -s', 'ENV' : {'PATH' : self.tmpdir}}
+        self.assertEqual(SConsCommonArguments.Linker.Apply(Args(), env, cache_dir = False), 'lld')
+        self.assertEqual(list(env['LINKFLAGS']), ['-s', '-fuse-ld=lld'])
+        self.assertEqual(list(env['SHLINKFLAGS']), ['-fuse-ld=lld'])
+
+#############################################################################
+class Test_Select(unittest.TestCase):
+    def test_select(self):
+        "Linker.Select() resolves linker choice"
+        self.assertEqual(SConsCommonArguments.Linker.Select('auto', ['bfd', 'gold', 'mold']), 'mold')
+        self.assertEqual(SConsCommonArguments.Linker.Select('auto', ['bfd']), None)
+        self.assertEqual(SConsCommonArguments.Linker.Select('gold', []), 'gold')
+
+    def test_explicit(self):
+        "Linker.Apply() uses explicitly selected linker as is"
+        env = {'LINK' : 'nosuchcc', 'LINKER' : 'mold'}
+        self.assertEqual(SConsCommonArguments.Linker.Apply(Args(), env, cache_dir = False), 'mold')
+        self.assertEqual(list(env['LINKFLAGS']), ['-fuse-ld=mold'])
+
+    def test_prefixed(self):
+        "Linker.Apply() reads and updates prefixed arguments"
+        env = {'X_LINK' : 'nosuchcc', 'ARM_LINKER' : 'gold', 'LINKER' : 'mold', 'X_LINKFLAGS' : '-s'}
+        self.assertEqual(SConsCommonArguments.Linker.Apply(Args('ARM_'), env, Args('X_'), cache_dir = False), 'gold')
+        self.assertEqual(list(env['X_LINKFLAGS']), ['-s', '-fuse-ld=gold'])
+        self.assertNotIn('LINKFLAGS', env)
+
+    def test_declarations(self):
+        "Linker.Declarations() declares LINKER defaulting to auto"
+        decls = SConsCommonArguments.Linker.Declarations()
+        self.assertEqual(decls['LINKER']['default'], 'auto')
+        self.assertRaises(ValueError, decls['LINKER']['converter'], 'ld')
+
+#############################################################################
+if __name__ == "__main__":
+    ldr = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    # Load tests to test suite
+    tclasses = [ Test_AvailableLinkers,
+                 Test_Select
+               ]
+
+    for tclass in tclasses:
+        suite.addTests(ldr.loadTestsFromTestCase(tclass))
+
+    if not unittest.TextTestRunner(verbosity = 2).run(suite).wasSuccessful():
+        sys.exit(1)
+
+# Local Variables:
+# # tab-width:4
+# # indent-tabs-mode:nil
+# # End:
+# vim: set syntax=python expandtab tabstop=4 shiftwidth=4:
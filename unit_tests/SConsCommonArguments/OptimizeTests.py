@@ -0,0 +1,109 @@
+""" SConsCommonArguments.OptimizeTests
+
+Unit tests for SConsCommonArguments.Optimize
+"""
+
+__docformat__ = "restructuredText"
+
+#
+# Copyright (c) 2016 by Pawel Tomulik
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+
+import SConsCommonArguments.Optimize
+from unit_tests.SConsCommonArguments import Args
+import sys
+import unittest
+
+#############################################################################
+class Test_Flags(unittest.TestCase):
+    def test_profiles(self):
+        "Optimize.Flags() has flags for every preset and family"
+        for family in ('gcc', 'clang'):
+            for profile in SConsCommonArguments.Optimize.Profiles():
+                compile_flags, link_flags = SConsCommonArguments.Optimize.Flags(profile, None, family)
+                self.assertTrue(compile_flags[0].startswith('-O'))
+
+    def test_arch(self):
+        "Optimize.Flags() adds -march= for TARGET_ARCH"
+        self.assertEqual(SConsCommonArguments.Optimize.Flags('size', 'native', 'clang'),
+                         (('-Oz', '-DNDEBUG', '-ffunction-sections', '-fdata-sections', '-march=native'),
+                          ('-Wl,--gc-sections', '-march=native')))
+
+    def test_resolved_once(self):
+        "Optimize.Flags() resolves flags once"
+        self.assertIs(SConsCommonArguments.Optimize.Flags('fast', None, 'gcc'),
+                      SConsCommonArguments.Optimize.Flags('fast', None, 'gcc'))
+
+    def test_immutable(self):
+        "Optimize.Flags() returns flags which can't be modified by callers"
+        compile_flags, link_flags = SConsCommonArguments.Optimize.Flags('debug', None, 'gcc')
+        self.assertIsInstance(compile_flags, tuple)
+        self.assertIsInstance(link_flags, tuple)
+
+    def test_invalid(self):
+        "Optimize.Flags() rejects unknown presets"
+        self.assertRaises(ValueError, SConsCommonArguments.Optimize.Flags, 'turbo')
+
+#############################################################################
+class Test_Apply(unittest.TestCase):
+    def test_apply(self):
+        "Optimize.Apply() replaces conflicting flags"
+        env = {'CC' : 'gcc', 'OPT_PROFILE' : 'fast', 'TARGET_ARCH' : 'x86-64-v3',
+               'CCFLAGS' : '-O2 -march=native -Wall'}
+        SConsCommonArguments.Optimize.Apply(Args(), env)
+        self.assertEqual(list(env['CCFLAGS']), ['-Wall', '-O3', '-DNDEBUG', '-march=x86-64-v3'])
+        self.assertEqual(list(env['LINKFLAGS']), ['-Wl,-O1', '-march=x86-64-v3'])
+
+    def test_prefixed(self):
+        "Optimize.Apply() reads and updates prefixed arguments"
+        env = {'X_CC' : 'gcc', 'ARM_OPT_PROFILE' : 'fast', 'ARM_TARGET_ARCH' : 'armv8-a',
+               'X_CCFLAGS' : '-O2 -Wall', 'CCFLAGS' : '-O0', 'OPT_PROFILE' : 'debug'}
+        SConsCommonArguments.Optimize.Apply(Args('ARM_'), env, Args('X_'))
+        self.assertEqual(list(env['X_CCFLAGS']), ['-Wall', '-O3', '-DNDEBUG', '-march=armv8-a'])
+        self.assertEqual(list(env['X_LINKFLAGS']), ['-Wl,-O1', '-march=armv8-a'])
+        self.assertEqual(env['CCFLAGS'], '-O0')
+        self.assertNotIn('LINKFLAGS', env)
+
+    def test_declarations(self):
+        "Optimize.Declarations() declares OPT_PROFILE and TARGET_ARCH"
+        decls = SConsCommonArguments.Optimize.Declarations()
+        self.assertEqual(sorted(decls.keys()), ['OPT_PROFILE', 'TARGET_ARCH'])
+        self.assertEqual(decls['OPT_PROFILE']['converter']('Release'), 'release')
+
+#############################################################################
+if __name__ == "__main__":
+    ldr = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    # Load tests to test suite
+    tclasses = [ Test_Flags,
+                 Test_Apply
+               ]
+
+    for tclass in tclasses:
+        suite.addTests(ldr.loadTestsFromTestCase(tclass))
+
+    if not unittest.TextTestRunner(verbosity = 2).run(suite).wasSuccessful():
+        sys.exit(1)
+
+# Local Variables:
+# # tab-width:4
+# # indent-tabs-mode:nil
+# # End:
+# vim: set syntax=python expandtab tabstop=4 shiftwidth=4:
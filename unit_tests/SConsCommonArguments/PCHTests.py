@@ -0,0 +1,136 @@
+""" SConsCommonArguments.PCHTests
+
+Unit tests for SConsCommonArguments.PCH
+"""
+
+__docformat__ = "restructuredText"
+
+#
+# Copyright (c) 2016 by Pawel Tomulik
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+
+import SConsCommonArguments.PCH
+from unit_tests.SConsCommonArguments import Args
+import os
+import sys
+import unittest
+
+#############################################################################
+class Test_Declarations(unittest.TestCase):
+    def test_declarations(self):
+        "PCH.Declarations() declares precompiled header arguments"
+        decls = SConsCommonArguments.PCH.Declarations()
+        self.assertEqual(sorted(decls.keys()), sorted(SConsCommonArguments.PCH.Names()))
+        self.assertEqual(decls['PCH']['default'], 'no')
+        self.assertEqual(decls['PCH_DIR']['default'], 'build/pch')
+        self.assertEqual(decls['PCH_GCC_FLAGS']['default'], '-include ${PCH_BASE} -Winvalid-pch')
+
+    def test_include_templates(self):
+        "PCH.Names(include_templates = False) omits flag templates"
+        self.assertEqual(SConsCommonArguments.PCH.Names(include_templates = False),
+                         ['PCH', 'PCH_HEADER', 'PCH_DIR'])
+
+#############################################################################
+class Test_Flags(unittest.TestCase):
+    def test_gcc(self):
+        "PCH.Flags() returns GCC flags"
+        pch = SConsCommonArguments.PCH.Flags('src/all.h', 'build/pch', 'gcc')
+        self.assertEqual(pch['static'], os.path.join('build', 'pch', 'all.h.gch'))
+        self.assertEqual(pch['shared'], os.path.join('build', 'pch', 'shared', 'all.h.gch'))
+        self.assertEqual(pch['use_static'], ['-include', os.path.join('build', 'pch', 'all.h'), '-Winvalid-pch'])
+        self.assertEqual(pch['build_static'], ['-x', 'c++-header', '-o', pch['static'], 'src/all.h'])
+
+    def test_clang(self):
+        "PCH.Flags() returns Clang flags"
+        pch = SConsCommonArguments.PCH.Flags('src/all.h', 'build/pch', 'clang')
+        self.assertEqual(pch['use_static'], ['-include-pch', os.path.join('build', 'pch', 'all.h.pch')])
+
+    def test_default_dir(self):
+        "PCH.Flags() places precompiled headers in build directory by default"
+        pch = SConsCommonArguments.PCH.Flags('src/all.h')
+        self.assertEqual(pch['static'], os.path.join('build', 'pch', 'all.h.gch'))
+        self.assertEqual(pch['shared'], os.path.join('build', 'pch', 'shared', 'all.h.gch'))
+
+    def test_unknown(self):
+        "PCH.Flags() returns None for unknown compilers"
+        self.assertIsNone(SConsCommonArguments.PCH.Flags('all.h', None, 'unknown'))
+
+#############################################################################
+class Test_Apply(unittest.TestCase):
+    def test_apply(self):
+        "PCH.Apply() merges flags into CXXFLAGS and SHCXXFLAGS"
+        env = {'CXX' : 'g++', 'PCH' : 'yes', 'PCH_HEADER' : 'all.h', 'PCH_DIR' : 'pch',
+               'PCH_GCC_FLAGS' : '-include ${PCH_BASE}', 'CXXFLAGS' : '-O2'}
+        SConsCommonArguments.PCH.Apply(Args(), env)
+        SConsCommonArguments.PCH.Apply(Args(), env)
+        self.assertEqual(list(env['CXXFLAGS']), ['-O2', '-include', os.path.join('pch', 'all.h')])
+        self.assertEqual(list(env['SHCXXFLAGS']), ['-include', os.path.join('pch', 'shared', 'all.h')])
+
+    def test_apply_clang(self):
+        "PCH.Apply() may be applied repeatedly for Clang"
+        env = {'CXX' : 'clang++', 'PCH' : 'yes', 'PCH_HEADER' : 'all.h', 'PCH_DIR' : 'pch'}
+        SConsCommonArguments.PCH.Apply(Args(), env)
+        SConsCommonArguments.PCH.Apply(Args(), env)
+        self.assertEqual(list(env['CXXFLAGS']), ['-include-pch', os.path.join('pch', 'all.h.pch')])
+
+    def test_apply_unknown_compiler(self):
+        "PCH.Apply() uses GCC flags if compiler family can't be guessed"
+        env = {'PCH' : 'yes', 'PCH_HEADER' : 'all.h', 'PCH_DIR' : 'pch'}
+        pch = SConsCommonArguments.PCH.Apply(Args(), env)
+        self.assertEqual(pch['static'], os.path.join('pch', 'all.h.gch'))
+        self.assertEqual(list(env['CXXFLAGS']), ['-include', os.path.join('pch', 'all.h'), '-Winvalid-pch'])
+
+    def test_prefixed(self):
+        "PCH.Apply() reads and updates prefixed arguments"
+        env = {'X_CXX' : 'g++', 'ARM_PCH' : 'yes', 'ARM_PCH_HEADER' : 'all.h', 'ARM_PCH_DIR' : 'pch',
+               'X_CXXFLAGS' : '-O2', 'CXXFLAGS' : '-O0', 'PCH' : 'no'}
+        SConsCommonArguments.PCH.Apply(Args('ARM_'), env, Args('X_'))
+        self.assertEqual(list(env['X_CXXFLAGS'])[0], '-O2')
+        self.assertIn('X_SHCXXFLAGS', env)
+        self.assertEqual(env['CXXFLAGS'], '-O0')
+        self.assertNotIn('SHCXXFLAGS', env)
+
+    def test_disabled(self):
+        "PCH.Apply() does nothing unless PCH=yes"
+        env = {'CXX' : 'g++', 'PCH' : 'no', 'PCH_HEADER' : 'all.h'}
+        self.assertIsNone(SConsCommonArguments.PCH.Apply(Args(), env))
+        self.assertNotIn('CXXFLAGS', env)
+
+#############################################################################
+if __name__ == "__main__":
+    ldr = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    # Load tests to test suite
+    tclasses = [ Test_Declarations,
+                 Test_Flags,
+                 Test_Apply
+               ]
+
+    for tclass in tclasses:
+        suite.addTests(ldr.loadTestsFromTestCase(tclass))
+
+    if not unittest.TextTestRunner(verbosity = 2).run(suite).wasSuccessful():
+        sys.exit(1)
+
+# Local Variables:
+# # tab-width:4
+# # indent-tabs-mode:nil
+# # End:
+# vim: set syntax=python expandtab tabstop=4 shiftwidth=4:
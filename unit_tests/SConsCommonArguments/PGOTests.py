@@ -0,0 +1,109 @@
+""" SConsCommonArguments.PGOTests
+
+Unit tests for SConsCommonArguments.PGO
+"""
+
+__docformat__ = "restructuredText"
+
+#
+# Copyright (c) 2016 by Pawel Tomulik
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+
+import SConsCommonArguments.PGO
+from unit_tests.SConsCommonArguments import Args
+import sys
+import unittest
+
+#############################################################################
+class Test_Declarations(unittest.TestCase):
+    def test_declarations(self):
+        "PGO.Declarations() declares PGO/LTO arguments with converters"
+        decls = SConsCommonArguments.PGO.Declarations()
+        self.assertEqual(sorted(decls.keys()), ['LTO', 'PGO_DIR', 'PGO_MODE'])
+        self.assertEqual(decls['PGO_MODE']['default'], 'off')
+        self.assertEqual(decls['LTO']['converter']('FULL'), 'full')
+        self.assertRaises(ValueError, decls['PGO_MODE']['converter'], 'train')
+        self.assertNotIn('converter', decls['PGO_DIR'])
+
+#############################################################################
+class Test_Flags(unittest.TestCase):
+    def test_off(self):
+        "PGO.Flags() returns no flags by default"
+        self.assertEqual(SConsCommonArguments.PGO.Flags(), ([], []))
+
+    def test_gcc(self):
+        "PGO.Flags() returns GCC flags"
+        self.assertEqual(SConsCommonArguments.PGO.Flags('generate', 'pgo', 'thin', 'gcc')[0],
+                         ['-fprofile-generate=pgo', '-flto'])
+        self.assertEqual(SConsCommonArguments.PGO.Flags('use', 'pgo', 'full', 'gcc')[1],
+                         ['-fprofile-use=pgo', '-fprofile-correction', '-flto'])
+
+    def test_clang(self):
+        "PGO.Flags() returns Clang flags"
+        self.assertEqual(SConsCommonArguments.PGO.Flags('use', None, 'thin', 'clang')[0],
+                         ['-fprofile-use', '-Wno-profile-instr-unprofiled', '-flto=thin'])
+
+#############################################################################
+class Test_Apply(unittest.TestCase):
+    def test_apply(self):
+        "PGO.Apply() merges flags into CC flag arguments"
+        env = {'CC' : 'clang', 'PGO_MODE' : 'generate', 'PGO_DIR' : 'build/pgo', 'LTO' : 'thin',
+               'CCFLAGS' : '-O2 -flto'}
+        SConsCommonArguments.PGO.Apply(Args(), env)
+        self.assertEqual(list(env['CCFLAGS']), ['-O2', '-fprofile-generate=build/pgo', '-flto=thin'])
+        self.assertEqual(list(env['SHLINKFLAGS']), ['-fprofile-generate=build/pgo', '-flto=thin'])
+
+    def test_prefixed(self):
+        "PGO.Apply() reads and updates prefixed arguments"
+        env = {'X_CC' : 'clang', 'ARM_PGO_MODE' : 'generate', 'ARM_PGO_DIR' : 'build/pgo', 'ARM_LTO' : 'thin',
+               'X_CCFLAGS' : '-O2 -flto', 'CCFLAGS' : '-O0', 'PGO_MODE' : 'off'}
+        SConsCommonArguments.PGO.Apply(Args('ARM_'), env, Args('X_'))
+        self.assertEqual(list(env['X_CCFLAGS']), ['-O2', '-fprofile-generate=build/pgo', '-flto=thin'])
+        self.assertEqual(list(env['X_SHLINKFLAGS']), ['-fprofile-generate=build/pgo', '-flto=thin'])
+        self.assertEqual(env['CCFLAGS'], '-O0')
+        self.assertNotIn('SHLINKFLAGS', env)
+
+    def test_off(self):
+        "PGO.Apply() leaves flags untouched when disabled"
+        env = {'CC' : 'gcc', 'PGO_MODE' : 'off', 'LTO' : 'off', 'CCFLAGS' : '-O2'}
+        SConsCommonArguments.PGO.Apply(Args(), env)
+        self.assertEqual(env, {'CC' : 'gcc', 'PGO_MODE' : 'off', 'LTO' : 'off', 'CCFLAGS' : '-O2'})
+
+#############################################################################
+if __name__ == "__main__":
+    ldr = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    # Load tests to test suite
+    tclasses = [ Test_Declarations,
+                 Test_Flags,
+                 Test_Apply
+               ]
+
+    for tclass in tclasses:
+        suite.addTests(ldr.loadTestsFromTestCase(tclass))
+
+    if not unittest.TextTestRunner(verbosity = 2).run(suite).wasSuccessful():
+        sys.exit(1)
+
+# Local Variables:
+# # tab-width:4
+# # indent-tabs-mode:nil
+# # End:
+# vim: set syntax=python expandtab tabstop=4 shiftwidth=4:
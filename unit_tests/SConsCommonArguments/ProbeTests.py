@@ -0,0 +1,172 @@
+""" SConsCommonArguments.ProbeTests
+
+Unit tests for SConsCommonArguments.Probe
+"""
+
+__docformat__ = "restructuredText"
+
+#
+# Copyright (c) 2016 by Pawel Tomulik
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+
+import SConsCommonArguments.Probe
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+#############################################################################
+_fake_cc = r"""#!/bin/sh
+echo "$@" >> "%(log)s"
+case "$*" in
+  --version) echo "fakecc (GCC) 4.9.0"; echo "Copyright (C) Free Software Foundation" ;;
+  *-std=c++98*|*-std=c++11*|*-std=c99*|*-std=c89*) cat > /dev/null ;;
+  *-std=*) cat > /dev/null; exit 1 ;;
+  *-flto*) cat > /dev/null ;;
+  *) exit 1 ;;
+esac
+"""
+
+@unittest.skipIf(os.name == 'nt', "requires POSIX shell")
+class Test_ProbeProgram(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.log = os.path.join(self.tmpdir, 'log')
+        self.cc = os.path.join(self.tmpdir, 'fakecc')
+        with open(self.cc, 'w') as f:
+            f.write(_fake_cc % {'log' : self.log})
+        os.chmod(self.cc, 0o755)
+        self.cache_dir = os.path.join(self.tmpdir, 'cache')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def calls(self):
+        with open(self.log) as f:
+            return len(f.readlines())
+
+    def test_probe(self):
+        "Probe.ProbeProgram() probes version, std levels and LTO"
+        caps = SConsCommonArguments.Probe.ProbeProgram('fakecc', 'c++', self.tmpdir, self.cache_dir)
+        self.assertEqual(caps.path, os.path.realpath(self.cc))
+        self.assertEqual(caps.version, 'fakecc (GCC) 4.9.0')
+        self.assertEqual(caps.family, 'gcc')
+        self.assertEqual(caps.std, ['c++98', 'c++11'])
+        self.assertTrue(caps.lto)
+
+    def test_cached(self):
+        "Probe.ProbeProgram() caches results on disk"
+        caps1 = SConsCommonArguments.Probe.ProbeProgram('fakecc', 'c', self.tmpdir, self.cache_dir)
+        calls = self.calls()
+        caps2 = SConsCommonArguments.Probe.ProbeProgram('fakecc', 'c', self.tmpdir, self.cache_dir)
+        self.assertEqual(self.calls(), calls)
+        self.assertEqual(caps1.as_dict(), caps2.as_dict())
+
+    def test_cache_keyed_by_flags(self):
+        "Probe.ProbeProgram() caches results per flags"
+        SConsCommonArguments.Probe.ProbeProgram('fakecc', 'c', self.tmpdir, self.cache_dir)
+        calls = self.calls()
+        SConsCommonArguments.Probe.ProbeProgram('fakecc -m32', 'c', self.tmpdir, self.cache_dir)
+        self.assertGreater(self.calls(), calls)
+
+    def _launcher(self):
+        launcher = os.path.join(self.tmpdir, 'ccache')
+        with open(launcher, 'w') as f:
+            f.write('#!/bin/sh\nexec "$@"\n')
+        os.chmod(launcher, 0o755)
+        return launcher
+
+    def test_launcher(self):
+        "Probe.ProbeProgram() probes and caches the compiler behind a launcher"
+        self._launcher()
+        SConsCommonArguments.Probe.ProbeProgram('fakecc', 'c', self.tmpdir, self.cache_dir)
+        calls = self.calls()
+        caps = SConsCommonArguments.Probe.ProbeProgram('ccache fakecc', 'c', self.tmpdir, self.cache_dir)
+        self.assertEqual(self.calls(), calls)
+        self.assertEqual(caps.path, os.path.realpath(self.cc))
+
+    def test_launcher_masquerade(self):
+        "Probe.ProbeProgram() skips launcher masquerade directories"
+        launcher = self._launcher()
+        masquerade = os.path.join(self.tmpdir, 'masquerade')
+        os.mkdir(masquerade)
+        os.symlink(launcher, os.path.join(masquerade, 'fakecc'))
+        path = os.pathsep.join([masquerade, self.tmpdir])
+        caps = SConsCommonArguments.Probe.ProbeProgram('fakecc', 'c', path, self.cache_dir)
+        self.assertEqual(caps.path, os.path.realpath(self.cc))
+        self.assertEqual(caps.version, 'fakecc (GCC) 4.9.0')
+
+    def test_missing(self):
+        "Probe.ProbeProgram() handles missing programs"
+        caps = SConsCommonArguments.Probe.ProbeProgram('nosuchcc', 'c', self.tmpdir, self.cache_dir)
+        self.assertIsNone(caps.path)
+        self.assertIsNone(caps.version)
+
+    def test_probe_programs(self):
+        "Probe.ProbePrograms() probes several programs"
+        caps = SConsCommonArguments.Probe.ProbePrograms({'CC' : 'fakecc', 'CXX' : 'fakecc', 'LINK' : 'fakecc'}, self.tmpdir, False)
+        self.assertEqual(caps['CC'].std, ['c89', 'c99'])
+        self.assertEqual(caps['CXX'].std, ['c++98', 'c++11'])
+        self.assertEqual(caps['LINK'].std, [])
+        self.assertTrue(caps['LINK'].lto)
+
+#############################################################################
+class Test_StripLaunchers(unittest.TestCase):
+    def test_strip(self):
+        "Probe.StripLaunchers() removes leading launchers only"
+        strip = SConsCommonArguments.Probe.StripLaunchers
+        self.assertEqual(strip(['ccache', 'gcc', '-m32']), ['gcc', '-m32'])
+        self.assertEqual(strip(['/usr/bin/distcc', 'ccache', 'g++']), ['g++'])
+        self.assertEqual(strip(['gcc', 'ccache']), ['gcc', 'ccache'])
+        self.assertEqual(strip(['ccache']), [])
+        self.assertEqual(strip([]), [])
+
+#############################################################################
+class Test_GuessFamily(unittest.TestCase):
+    def test_guess(self):
+        "Probe.GuessFamily() guesses compiler family from program name"
+        self.assertEqual(SConsCommonArguments.Probe.GuessFamily('/usr/bin/clang++-14 -m32'), 'clang')
+        self.assertEqual(SConsCommonArguments.Probe.GuessFamily('ccache x86_64-linux-gnu-gcc'), 'gcc')
+        self.assertEqual(SConsCommonArguments.Probe.GuessFamily(['g++']), 'gcc')
+        self.assertEqual(SConsCommonArguments.Probe.GuessFamily('icc'), 'unknown')
+        self.assertEqual(SConsCommonArguments.Probe.GuessFamily(''), 'unknown')
+
+#############################################################################
+if __name__ == "__main__":
+    ldr = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    # Load tests to test suite
+    tclasses = [ Test_ProbeProgram,
+                 Test_StripLaunchers,
+                 Test_GuessFamily
+               ]
+
+    for tclass in tclasses:
+        suite.addTests(ldr.loadTestsFromTestCase(tclass))
+
+    if not unittest.TextTestRunner(verbosity = 2).run(suite).wasSuccessful():
+        sys.exit(1)
+
+# Local Variables:
+# # tab-width:4
+# # indent-tabs-mode:nil
+# # End:
+# vim: set syntax=python expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,142 @@
+""" SConsCommonArguments.ProfileTests
+
+Unit tests for SConsCommonArguments.Profile
+"""
+
+__docformat__ = "restructuredText"
+
+#
+# Copyright (c) 2016 by Pawel Tomulik
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+
+import SConsCommonArguments.Profile
+import gc
+import json
+import os
+import shutil
+import sys
+import tempfile
+import types
+import unittest
+
+#############################################################################
+class _Decls(object):
+    def Commit(self, *args):
+        return _Args()
+
+class _Args(object):
+    def Postprocess(self, *args):
+        return [_Args() for i in range(10)]
+
+class Test_instrument(unittest.TestCase):
+    def tearDown(self):
+        SConsCommonArguments.Profile.Disable()
+        SConsCommonArguments.Profile.Reset()
+
+    def test_counts_calls(self):
+        "Profile.instrument() records calls per phase and family"
+        mod = types.ModuleType('fake')
+        mod.Declarations = lambda : _Decls()
+        SConsCommonArguments.Profile.instrument(mod, 'Declarations', 'Declarations', 'FAKE')
+        SConsCommonArguments.Profile.instrument(_Decls, 'Commit', 'Commit')
+        SConsCommonArguments.Profile.instrument(_Args, 'Postprocess', 'Postprocess')
+        mod.Declarations().Commit().Postprocess()
+        mod.Declarations()
+        stats = dict([((s['phase'], s['family']), s) for s in SConsCommonArguments.Profile.Stats()])
+        self.assertEqual(stats[('Declarations', 'FAKE')]['calls'], 2)
+        self.assertEqual(stats[('Commit', 'FAKE')]['calls'], 1)
+        self.assertEqual(stats[('Postprocess', 'FAKE')]['calls'], 1)
+        self.assertGreaterEqual(stats[('Postprocess', 'FAKE')]['allocs'], 10)
+
+    def test_gc_left_alone(self):
+        "Profile.instrument() leaves garbage collection enabled by default"
+        seen = []
+        mod = types.ModuleType('fake')
+        mod.Names = lambda : seen.append(gc.isenabled())
+        SConsCommonArguments.Profile.instrument(mod, 'Names', 'Names', 'FAKE')
+        mod.Names()
+        SConsCommonArguments.Profile._disable_gc = True
+        mod.Names()
+        self.assertEqual(seen, [gc.isenabled(), False])
+
+    def test_disable_restores(self):
+        "Profile.Disable() restores original functions"
+        original = _Args.__dict__['Postprocess']
+        SConsCommonArguments.Profile.instrument(_Args, 'Postprocess', 'Postprocess')
+        self.assertIsNot(_Args.__dict__['Postprocess'], original)
+        SConsCommonArguments.Profile.Disable()
+        self.assertIs(_Args.__dict__['Postprocess'], original)
+
+#############################################################################
+class Test_ParseSetting(unittest.TestCase):
+    def test_parse(self):
+        "Profile.ParseSetting() treats 0, no, false and off as disabled"
+        for value in (None, '', '0', 'no', 'False', 'OFF'):
+            self.assertIsNone(SConsCommonArguments.Profile.ParseSetting(value))
+        for value in ('1', '-', 'prof.json'):
+            self.assertEqual(SConsCommonArguments.Profile.ParseSetting(value), value)
+
+#############################################################################
+class Test_Dump(unittest.TestCase):
+    def setUp(self):
+        SConsCommonArguments.Profile._record('Declarations', 'CC', 0.5, 3)
+
+    def tearDown(self):
+        SConsCommonArguments.Profile.Reset()
+
+    def test_table(self):
+        "Profile.FormatTable() formats statistics as table"
+        table = SConsCommonArguments.Profile.FormatTable()
+        self.assertIn('Declarations', table)
+        self.assertIn('0.500000', table)
+
+    def test_json(self):
+        "Profile.Dump() writes JSON to *.json files"
+        tmpdir = tempfile.mkdtemp()
+        try:
+            output = os.path.join(tmpdir, 'prof.json')
+            SConsCommonArguments.Profile.Dump(output)
+            with open(output) as f:
+                stats = json.load(f)
+        finally:
+            shutil.rmtree(tmpdir)
+        self.assertEqual(stats, [{'phase' : 'Declarations', 'family' : 'CC', 'calls' : 1, 'seconds' : 0.5, 'allocs' : 3}])
+
+#############################################################################
+if __name__ == "__main__":
+    ldr = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    # Load tests to test suite
+    tclasses = [ Test_instrument,
+                 Test_ParseSetting,
+                 Test_Dump
+               ]
+
+    for tclass in tclasses:
+        suite.addTests(ldr.loadTestsFromTestCase(tclass))
+
+    if not unittest.TextTestRunner(verbosity = 2).run(suite).wasSuccessful():
+        sys.exit(1)
+
+# Local Variables:
+# # tab-width:4
+# # indent-tabs-mode:nil
+# # End:
+# vim: set syntax=python expandtab tabstop=4 shiftwidth=4:
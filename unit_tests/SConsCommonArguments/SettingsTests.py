@@ -0,0 +1,123 @@
+""" SConsCommonArguments.SettingsTests
+
+Unit tests for SConsCommonArguments.Settings
+"""
+
+__docformat__ = "restructuredText"
+
+#
+# Copyright (c) 2016 by Pawel Tomulik
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+
+import SConsCommonArguments.Settings
+from unit_tests.SConsCommonArguments import Args
+import SConsCommonArguments.Flags
+import SCons.Util
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+#############################################################################
+class Test_ExportLoad(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def roundtrip(self, filename):
+        env = {'CC' : 'gcc', 'CFLAGS' : SCons.Util.CLVar(['-O2', '-g']), 'CXX' : None}
+        filename = os.path.join(self.tmpdir, filename)
+        exported = SConsCommonArguments.Settings.Export(Args(), env, ['CC', 'CXX', 'CFLAGS', 'LINK'], filename)
+        self.assertEqual(exported, {'CC' : 'gcc', 'CFLAGS' : ['-O2', '-g'], 'CXX' : None})
+        self.assertEqual(SConsCommonArguments.Settings.Load(filename), exported)
+
+    def test_json(self):
+        "Settings.Export() and Settings.Load() round-trip JSON files"
+        self.roundtrip('toolchain.json')
+
+    def test_marshal(self):
+        "Settings.Export() and Settings.Load() round-trip marshal files"
+        self.roundtrip('toolchain.marshal')
+
+    def test_invalid(self):
+        "Settings.Load() rejects invalid files"
+        filename = os.path.join(self.tmpdir, 'bad.json')
+        with open(filename, 'w') as f:
+            f.write('[1, 2]')
+        self.assertRaises(ValueError, SConsCommonArguments.Settings.Load, filename)
+
+#############################################################################
+class Test_VariablesArgs(unittest.TestCase):
+    def test_prefix(self):
+        "Settings.VariablesArgs() honours var_key_prefix and command line"
+        values = {'CC' : 'gcc', 'CFLAGS' : ['-O2', '-g'], 'CXX' : None}
+        result = SConsCommonArguments.Settings.VariablesArgs(values, {'ARM_CC' : 'clang'}, var_key_prefix = 'ARM_')
+        self.assertEqual(result, {'ARM_CC' : 'clang', 'ARM_CFLAGS' : '-O2 -g'})
+
+    @unittest.skipIf(os.name == 'nt', "POSIX quoting")
+    def test_round_trip(self):
+        "Settings.VariablesArgs() quotes list items, so they are tokenized back unchanged"
+        values = {'CPPFLAGS' : ['-DNAME=a b', "-DQ='x'", '-I/usr/include']}
+        result = SConsCommonArguments.Settings.VariablesArgs(values)
+        self.assertEqual(list(SConsCommonArguments.Flags.Tokenize(result['CPPFLAGS'])), values['CPPFLAGS'])
+
+#############################################################################
+class Test_Apply(unittest.TestCase):
+    def test_apply(self):
+        "Settings.Apply() validates and sets only changed entries"
+        validated = []
+        validators = {'CC' : validated.append, 'CFLAGS' : validated.append}
+        env = {'X_CC' : 'gcc'}
+        changed = SConsCommonArguments.Settings.Apply({'CC' : 'gcc', 'CFLAGS' : ['-O2']}, env, validators,
+                                                     env_key_prefix = 'X_')
+        self.assertEqual(changed, ['CFLAGS'])
+        self.assertEqual(validated, [['-O2']])
+        self.assertEqual(list(env['X_CFLAGS']), ['-O2'])
+
+    def test_invalid(self):
+        "Settings.Apply() propagates validation errors"
+        def _validator(value):
+            raise ValueError(value)
+        self.assertRaises(ValueError, SConsCommonArguments.Settings.Apply, {'CC' : 'x'}, {}, {'CC' : _validator})
+
+#############################################################################
+if __name__ == "__main__":
+    ldr = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    # Load tests to test suite
+    tclasses = [ Test_ExportLoad,
+                 Test_VariablesArgs,
+                 Test_Apply
+               ]
+
+    for tclass in tclasses:
+        suite.addTests(ldr.loadTestsFromTestCase(tclass))
+
+    if not unittest.TextTestRunner(verbosity = 2).run(suite).wasSuccessful():
+        sys.exit(1)
+
+# Local Variables:
+# # tab-width:4
+# # indent-tabs-mode:nil
+# # End:
+# vim: set syntax=python expandtab tabstop=4 shiftwidth=4:
@@ -0,0 +1,300 @@
+""" SConsCommonArguments.UtilTests
+
+Unit tests for SConsCommonArguments.Util
+"""
+
+__docformat__ = "restructuredText"
+
+#
+# Copyright (c) 2016 by Pawel Tomulik
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE
+
+import SConsCommonArguments.Util
+import SConsArguments
+import sys
+import re
+import unittest
+
+#############################################################################
+class Test_declarations_cache_key(unittest.TestCase):
+    def test_equal_keywords_give_equal_keys(self):
+        "declarations_cache_key() normalizes dicts and sequences"
+        k1 = SConsCommonArguments.Util.declarations_cache_key('F', {'defaults' : {'A' : 1, 'B' : 2}, 'name_filter' : ['A', 'B']})
+        k2 = SConsCommonArguments.Util.declarations_cache_key('F', {'name_filter' : ('A', 'B'), 'defaults' : {'B' : 2, 'A' : 1}})
+        self.assertEqual(k1, k2)
+
+    def test_family_is_part_of_key(self):
+        "declarations_cache_key() distinguishes argument families"
+        k1 = SConsCommonArguments.Util.declarations_cache_key('F1', {})
+        k2 = SConsCommonArguments.Util.declarations_cache_key('F2', {})
+        self.assertNotEqual(k1, k2)
+
+    def test_unhashable_gives_none(self):
+        "declarations_cache_key() returns None for unhashable keywords"
+        class Unhashable(object):
+            __hash__ = None
+        k = SConsCommonArguments.Util.declarations_cache_key('F', {'x' : Unhashable()})
+        self.assertIsNone(k)
+
+#############################################################################
+class Test_DeclarationsCache(unittest.TestCase):
+    def test_miss_then_hit(self):
+        "DeclarationsCache counts hits and misses"
+        cache = SConsCommonArguments.Util.DeclarationsCache()
+        self.assertIsNone(cache.get(('F', 1)))
+        cache.put(('F', 1), [('A', {'help' : 'a'})])
+        self.assertEqual(cache.get(('F', 1)), [('A', {'help' : 'a'})])
+        self.assertEqual(cache.info(), {'hits' : 1, 'misses' : 1, 'size' : 1, 'maxsize' : 64})
+
+    def test_get_returns_frozen_records(self):
+        "DeclarationsCache.get() returns immutable copies of cached decls"
+        cache = SConsCommonArguments.Util.DeclarationsCache()
+        specs = [('A', {'help' : 'a'})]
+        cache.put(('F', 1), specs)
+        specs[0][1]['help'] = 'x'
+        decl = cache.get(('F', 1))[0][1]
+        with self.assertRaises(TypeError):
+            decl['help'] = 'y'
+        with self.assertRaises(AttributeError):
+            decl.help = 'y'
+        self.assertEqual(cache.get(('F', 1)), [('A', {'help' : 'a'})])
+
+    def test_lru_eviction(self):
+        "DeclarationsCache evicts least recently used entries"
+        cache = SConsCommonArguments.Util.DeclarationsCache(maxsize = 2)
+        cache.put(('F', 1), [])
+        cache.put(('F', 2), [])
+        cache.get(('F', 1))
+        cache.put(('F', 3), [])
+        self.assertEqual(len(cache), 2)
+        self.assertIsNotNone(cache.get(('F', 1)))
+        self.assertIsNone(cache.get(('F', 2)))
+
+    def test_invalidate(self):
+        "DeclarationsCache.invalidate() drops entries of a family or all"
+        cache = SConsCommonArguments.Util.DeclarationsCache()
+        cache.put(('F1', 1), [])
+        cache.put(('F2', 1), [])
+        cache.invalidate('F1')
+        self.assertIsNone(cache.get(('F1', 1)))
+        self.assertIsNotNone(cache.get(('F2', 1)))
+        cache.invalidate()
+        self.assertEqual(len(cache), 0)
+
+#############################################################################
+class Test_name_filter_predicate(unittest.TestCase):
+    def test_sequence(self):
+        "name_filter_predicate() accepts sequences of names"
+        pred = SConsCommonArguments.Util.name_filter_predicate(['A', 'B'])
+        self.assertTrue(pred('A'))
+        self.assertFalse(pred('C'))
+
+    def test_glob(self):
+        "name_filter_predicate() accepts glob patterns"
+        pred = SConsCommonArguments.Util.name_filter_predicate('SH*FLAGS')
+        self.assertTrue(pred('SHCFLAGS'))
+        self.assertFalse(pred('CFLAGS'))
+        self.assertFalse(pred('SHCFLAGSX'))
+
+    def test_regex(self):
+        "name_filter_predicate() accepts compiled regular expressions"
+        pred = SConsCommonArguments.Util.name_filter_predicate(re.compile('C+$'))
+        self.assertTrue(pred('CC'))
+        self.assertFalse(pred('CXX'))
+
+    def test_callable(self):
+        "name_filter_predicate() returns callables unchanged"
+        f = lambda x : True
+        self.assertIs(SConsCommonArguments.Util.name_filter_predicate(f), f)
+
+#############################################################################
+class Test_ArgumentRegistry(unittest.TestCase):
+    def setUp(self):
+        self.reg = SConsCommonArguments.Util.ArgumentRegistry([
+            ('progs', [('CC', 'cc'), ('CXX', 'cxx')]),
+            ('flags', [('CFLAGS', 'cflags'), ('CXXFLAGS', 'cxxflags')]),
+        ])
+
+    def test_families(self):
+        "ArgumentRegistry.families() lists families in order of registration"
+        self.assertEqual(self.reg.families(), ['progs', 'flags'])
+        self.assertEqual(self.reg.family('CFLAGS'), 'flags')
+
+    def test_selected(self):
+        "ArgumentRegistry.selected() honors include_<family> keywords"
+        self.assertEqual(self.reg.selected({}), ['progs', 'flags'])
+        self.assertEqual(self.reg.selected({'include_progs' : False, 'other' : 1}), ['flags'])
+
+    def test_select_all(self):
+        "ArgumentRegistry.select() returns all tuples by default"
+        self.assertEqual(self.reg.names(), ['CC', 'CXX', 'CFLAGS', 'CXXFLAGS'])
+
+    def test_select_families(self):
+        "ArgumentRegistry.select() selects families"
+        self.assertEqual(self.reg.select(['flags']), [('CFLAGS', 'cflags'), ('CXXFLAGS', 'cxxflags')])
+
+    def test_select_sequence(self):
+        "ArgumentRegistry.select() with sequence filter keeps registration order"
+        self.assertEqual(self.reg.names(None, ['CXXFLAGS', 'CC', 'FOO']), ['CC', 'CXXFLAGS'])
+        self.assertEqual(self.reg.names(['progs'], ['CXXFLAGS', 'CC']), ['CC'])
+
+    def test_select_glob(self):
+        "ArgumentRegistry.select() with glob filter"
+        self.assertEqual(self.reg.names(None, 'CX*'), ['CXX', 'CXXFLAGS'])
+
+    def test_duplicate(self):
+        "ArgumentRegistry.add() rejects duplicated names"
+        with self.assertRaises(ValueError):
+            self.reg.add('other', [('CC',)])
+
+#############################################################################
+class _CountingNameConv(object):
+    def __init__(self):
+        self.calls = 0
+    def _transform(self, prefix, name):
+        self.calls += 1
+        return prefix + name
+    def env_key_transform(self, name):
+        return self._transform('e_', name)
+    def var_key_transform(self, name):
+        return self._transform('v_', name)
+    def opt_key_transform(self, name):
+        return self._transform('o_', name)
+    def option_transform(self, name):
+        return self._transform('--', name)
+
+class Test_convert_names(unittest.TestCase):
+    def test_columns(self):
+        "convert_names() returns parallel columns of keys"
+        nameconv = _CountingNameConv()
+        cols = SConsCommonArguments.Util.convert_names(['A', 'B'], nameconv = nameconv)
+        self.assertEqual(cols, (['e_A', 'e_B'], ['v_A', 'v_B'], ['o_A', 'o_B'], ['--A', '--B']))
+
+    def test_empty(self):
+        "convert_names() handles empty list of names"
+        cols = SConsCommonArguments.Util.convert_names([], nameconv = _CountingNameConv())
+        self.assertEqual(cols, ([], [], [], []))
+
+    def test_memoized(self):
+        "convert_names() memoizes results per nameconv settings and name"
+        nameconv = _CountingNameConv()
+        SConsCommonArguments.Util.convert_names(['A', 'B'], nameconv = nameconv)
+        SConsCommonArguments.Util.convert_names(['B', 'A', 'C'], nameconv = nameconv)
+        self.assertEqual(nameconv.calls, 12)
+
+#############################################################################
+class Test_DeclarationRecord(unittest.TestCase):
+    def test_dict_view(self):
+        "DeclarationRecord provides dict-compatible view"
+        rec = SConsCommonArguments.Util.DeclarationRecord(env_key = 'CC', type = 'string', nargs = 1, help = 'cc')
+        self.assertEqual(rec['env_key'], 'CC')
+        self.assertIn('help', rec)
+        self.assertNotIn('default', rec)
+        self.assertEqual(rec.get('default', 'x'), 'x')
+        self.assertRaises(KeyError, lambda : rec['default'])
+        self.assertEqual(dict(rec), rec.as_dict())
+        self.assertEqual(dict(**rec), rec.as_dict())
+        self.assertEqual(rec, rec.as_dict())
+
+    def test_interned_fields(self):
+        "DeclarationRecord interns type and metavar"
+        t1 = ''.join(['str', 'ing'])
+        t2 = ''.join(['stri', 'ng'])
+        r1 = SConsCommonArguments.Util.DeclarationRecord(type = t1)
+        r2 = SConsCommonArguments.Util.DeclarationRecord(type = t2)
+        self.assertIs(r1.type, r2.type)
+
+    def test_memory(self):
+        "DeclarationRecord takes less memory than equivalent dict"
+        specs = SConsCommonArguments.Util.specs_from_tuples([('CC', 'A C compiler', 'gcc')])
+        rec = specs[0][1]
+        self.assertIsInstance(rec, SConsCommonArguments.Util.DeclarationRecord)
+        self.assertEqual(len(rec), 9)
+        self.assertLess(sys.getsizeof(rec), sys.getsizeof(rec.as_dict()))
+
+    def test_declare_arguments(self):
+        "Util.declare_arguments() passes plain dictionaries to SConsArguments"
+        specs = SConsCommonArguments.Util.specs_from_tuples([('CC', 'A C compiler', 'gcc')])
+        passed = []
+        declare = SConsArguments.DeclareArguments
+        SConsArguments.DeclareArguments = lambda decls : passed.extend(decls) or declare(decls)
+        try:
+            SConsCommonArguments.Util.declare_arguments(specs)
+        finally:
+            SConsArguments.DeclareArguments = declare
+        self.assertIs(type(passed[0][1]), dict)
+        self.assertEqual(passed[0][1], specs[0][1].as_dict())
+
+#############################################################################
+class Test_choice_converter(unittest.TestCase):
+    def test_choices(self):
+        "Util.choice_converter() accepts only listed values"
+        conv = SConsCommonArguments.Util.choice_converter('LTO', ('off', 'thin', 'full'))
+        self.assertEqual(conv('Thin'), 'thin')
+        self.assertRaises(ValueError, conv, 'fat')
+
+#############################################################################
+class Test_specs_from_tuples(unittest.TestCase):
+    def test_converted_names(self):
+        "Util.specs_from_tuples() returns a spec for every selected tuple"
+        tuples = [('CC', 'A C compiler', 'gcc'), ('CXX', 'A C++ compiler', 'g++'), ('LINK', 'A linker')]
+        specs = SConsCommonArguments.Util.specs_from_tuples(tuples, name_filter = lambda x : x != 'LINK',
+                                                            env_key_prefix = 'X_')
+        self.assertEqual([name for (name, decl) in specs], ['CC', 'CXX'])
+        self.assertEqual([decl['env_key'] for (name, decl) in specs], ['X_CC', 'X_CXX'])
+
+#############################################################################
+class Test_proxy_value(unittest.TestCase):
+    def test_value(self):
+        "Util.proxy_value() returns default for missing, None and empty values"
+        proxy = {'A' : 'x', 'B' : None, 'C' : '', 'D' : 0}
+        self.assertEqual(SConsCommonArguments.Util.proxy_value(proxy, 'A'), 'x')
+        self.assertEqual(SConsCommonArguments.Util.proxy_value(proxy, 'D', 1), 0)
+        for name in ('B', 'C', 'E'):
+            self.assertIsNone(SConsCommonArguments.Util.proxy_value(proxy, name))
+            self.assertEqual(SConsCommonArguments.Util.proxy_value(proxy, name, 'y'), 'y')
+
+#############################################################################
+if __name__ == "__main__":
+    ldr = unittest.TestLoader()
+    suite = unittest.TestSuite()
+    # Load tests to test suite
+    tclasses = [ Test_declarations_cache_key,
+                 Test_DeclarationsCache,
+                 Test_name_filter_predicate,
+                 Test_ArgumentRegistry,
+                 Test_convert_names,
+                 Test_DeclarationRecord,
+                 Test_choice_converter,
+                 Test_specs_from_tuples,
+                 Test_proxy_value
+               ]
+
+    for tclass in tclasses:
+        suite.addTests(ldr.loadTestsFromTestCase(tclass))
+
+    if not unittest.TextTestRunner(verbosity = 2).run(suite).wasSuccessful():
+        sys.exit(1)
+
+# Local Variables:
+# # tab-width:4
+# # indent-tabs-mode:nil
+# # End:
+# vim: set syntax=python expandtab tabstop=4 shiftwidth=4:
@@ -21,6 +21,27 @@
 
 __docformat__ = "restructuredText"
 
+#############################################################################
+class EnvProxy(object):
+    """Stand-in for environment proxies of committed arguments; maps argument
+    name ``NAME`` to construction variable ``<prefix>NAME`` of `env`"""
+    def __init__(self, env, prefix = ''):
+        self.env = env
+        self.prefix = prefix
+    def __getitem__(self, name):
+        return self.env[self.prefix + name]
+    def __setitem__(self, name, value):
+        self.env[self.prefix + name] = value
+    def __contains__(self, name):
+        return (self.prefix + name) in self.env
+
+class Args(object):
+    """Stand-in for committed arguments (as returned by ``decls.Commit()``),
+    declared with ``env_key_prefix = prefix``"""
+    def __init__(self, prefix = ''):
+        self.prefix = prefix
+    def EnvProxy(self, env):
+        return EnvProxy(env, self.prefix)
 
 # Local Variables:
 # # tab-width:4
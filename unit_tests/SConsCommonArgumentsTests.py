@@ -3,6 +3,9 @@
 Unit tests for SConsCommonArguments
 """
 
+# Avoid implicit relative import of unit_tests/SConsCommonArguments package.
+from __future__ import absolute_import
+
 __docformat__ = "restructuredText"
 
 #
@@ -27,6 +30,9 @@ __docformat__ = "restructuredText"
 # SOFTWARE
 
 import SConsCommonArguments
+import os
+import subprocess
+import sys
 import unittest
 
 # The mock module does not come as a part of python 2.x stdlib, it has to be
@@ -53,12 +59,48 @@ class Test_Xyz(unittest.TestCase):
         "Test foo"
         self.assertTrue(True)
 
+#############################################################################
+class Test_Families(unittest.TestCase):
+    def test_families(self):
+        "SConsCommonArguments.Families() lists argument families"
+        self.assertIn('CC', SConsCommonArguments.Families())
+
+    def test_family_description(self):
+        "SConsCommonArguments.FamilyDescription() describes families"
+        self.assertTrue(SConsCommonArguments.FamilyDescription('CC'))
+        with self.assertRaises(KeyError):
+            SConsCommonArguments.FamilyDescription('Xyz')
+
+    def test_lazy_attribute(self):
+        "SConsCommonArguments.<family> imports the family on first access"
+        # other tests import the families, so check it in a fresh interpreter
+        script = '; '.join([
+            "import sys",
+            "import SConsCommonArguments",
+            "families = ['SConsCommonArguments.%s' % f for f in SConsCommonArguments.Families()]",
+            "print(sorted([f for f in families if f in sys.modules]))",
+            "print(SConsCommonArguments.CC is sys.modules['SConsCommonArguments.CC'])",
+            "print(sorted([f for f in families if f in sys.modules]))",
+            "print('CC' in dir(SConsCommonArguments))",
+        ])
+        env = dict(os.environ, PYTHONPATH = os.pathsep.join(sys.path))
+        env.pop('SCONS_COMMON_ARGS_PROFILE', None)
+        output = subprocess.check_output([sys.executable, '-c', script], env = env)
+        lines = output.decode('ascii').splitlines()
+        self.assertEqual(lines, ['[]', 'True', "['SConsCommonArguments.CC']", 'True'])
+
+    def test_unknown_attribute(self):
+        "SConsCommonArguments.<unknown> raises AttributeError"
+        with self.assertRaises(AttributeError):
+            SConsCommonArguments.Xyz
+
 #############################################################################
 if __name__ == "__main__":
     ldr = unittest.TestLoader()
     suite = unittest.TestSuite()
     # Load tests to test suite
-    tclasses = [ Test_Xyz
+    tclasses = [ Test_Xyz,
+                 Test_Families
                ]
 
     for tclass in tclasses: